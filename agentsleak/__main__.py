@@ -3,10 +3,35 @@
 from __future__ import annotations
 
 import argparse
+import importlib.util
+import os
 import sys
 from pathlib import Path
 
 
+def _server_backends() -> tuple[str, str]:
+    """Pick the fastest available uvicorn event loop and HTTP parser.
+
+    uvloop and httptools come with ``uvicorn[standard]`` but are not
+    available everywhere (uvloop has no Windows build), so fall back to
+    the pure-Python implementations when they cannot be imported.
+    """
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    return loop, http
+
+
+def _positive_int(value: str) -> int:
+    """argparse type for options that need a count of at least one."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
 def main() -> int:
     """Main entry point for the AgentsLeak CLI."""
     parser = argparse.ArgumentParser(
@@ -49,6 +74,16 @@ def main() -> int:
         help="Enable auto-reload for development",
     )
 
+    parser.add_argument(
+        "--workers",
+        type=_positive_int,
+        default=1,
+        help="Number of worker processes (default: 1). Each worker keeps its own "
+        "policy engine, sequence detector and caches, so multi-step sequence "
+        "detection, policy reloads and live WebSocket updates only see the events "
+        "that worker received",
+    )
+
     parser.add_argument(
         "--version",
         action="version",
@@ -78,9 +113,24 @@ def main() -> int:
         setattr(settings, k, v)
     set_settings(settings)
 
+    # Reload and worker processes import the app fresh and rebuild settings
+    # from the environment, so pass the CLI overrides down that way.
+    os.environ["AGENTSLEAK_HOST"] = settings.host
+    os.environ["AGENTSLEAK_PORT"] = str(settings.port)
+    os.environ["AGENTSLEAK_DB_PATH"] = str(settings.db_path)
+    os.environ["AGENTSLEAK_LOG_LEVEL"] = settings.log_level
+
+    loop, http = _server_backends()
+
     print(f"Starting AgentsLeak server on http://{args.host}:{args.port}")
     print(f"Database: {settings.db_path}")
     print(f"Log level: {args.log_level}")
+    if args.workers > 1:
+        print(f"Workers: {args.workers}")
+        print(
+            "Warning: detection state is per worker; sequence detection, policy "
+            "reloads and live updates do not span workers"
+        )
     print()
     print("Press Ctrl+C to stop")
     print()
@@ -91,6 +141,10 @@ def main() -> int:
         host=args.host,
         port=args.port,
         reload=args.reload,
+        workers=args.workers,
+        loop=loop,
+        http=http,
+        interface="asgi3",
         log_level=args.log_level.lower(),
     )
 
@@ -0,0 +1,28 @@
+"""Shared FastAPI dependencies for AgentsLeak routes.
+
+These are declared ``async`` so FastAPI resolves them inline on the event
+loop; a plain ``def`` dependency costs a threadpool round-trip per request
+even when it only returns an existing object.
+"""
+
+from __future__ import annotations
+
+from fastapi import Request
+
+from agentsleak.engine.processor import Engine, get_engine
+from agentsleak.store.database import Database, get_database
+
+
+async def get_db(request: Request) -> Database:
+    """Return the database opened by the application lifespan.
+
+    Falls back to the global instance when the app was started without
+    its lifespan (e.g. in tests).
+    """
+    database = getattr(request.app.state, "db", None)
+    return database if database is not None else get_database()
+
+
+async def get_current_engine() -> Engine:
+    """Return the global processing engine."""
+    return get_engine()
@@ -10,7 +10,9 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel, Field
 
-from agentsleak.store.database import Database, get_database
+from agentsleak.api.dependencies import get_db
+from agentsleak.models.events import Event
+from agentsleak.store.database import Database
 
 logger = logging.getLogger(__name__)
 
@@ -84,9 +86,13 @@ async def list_events(
     blocked: bool | None = Query(None, description="Filter blocked events"),
     from_date: datetime | None = Query(None, description="Filter from date"),
     to_date: datetime | None = Query(None, description="Filter to date"),
-    db: Database = Depends(get_database),
-) -> EventListResponse:
-    """List events with pagination and filters."""
+    db: Database = Depends(get_db),
+) -> dict[str, Any]:
+    """List events with pagination and filters.
+
+    Returns stored events as-is; FastAPI validates them once against
+    ``EventListResponse``.
+    """
     result = db.get_events_paginated(
         page=page,
         page_size=page_size,
@@ -99,36 +105,20 @@ async def list_events(
         to_date=to_date,
     )
 
-    items = [
-        EventSummary(
-            id=e.id,
-            session_id=e.session_id,
-            timestamp=e.timestamp,
-            hook_type=e.hook_type,
-            tool_name=e.tool_name,
-            category=e.category.value,
-            severity=e.severity.value,
-            file_paths=e.file_paths,
-            commands=e.commands,
-            urls=e.urls,
-        )
-        for e in result["items"]
-    ]
-
-    return EventListResponse(
-        items=items,
-        total=result["total"],
-        page=page,
-        page_size=page_size,
-        pages=(result["total"] + page_size - 1) // page_size,
-    )
+    return {
+        "items": result["items"],
+        "total": result["total"],
+        "page": page,
+        "page_size": page_size,
+        "pages": (result["total"] + page_size - 1) // page_size,
+    }
 
 
 @router.get("/{event_id}", response_model=EventDetail)
 async def get_event(
     event_id: UUID,
-    db: Database = Depends(get_database),
-) -> EventDetail:
+    db: Database = Depends(get_db),
+) -> Event:
     """Get event by ID with full details."""
     event = db.get_event_by_id(event_id)
     if event is None:
@@ -137,21 +127,4 @@ async def get_event(
             detail=f"Event {event_id} not found",
         )
 
-    return EventDetail(
-        id=event.id,
-        session_id=event.session_id,
-        timestamp=event.timestamp,
-        hook_type=event.hook_type,
-        tool_name=event.tool_name,
-        tool_input=event.tool_input,
-        tool_result=event.tool_result,
-        category=event.category.value,
-        severity=event.severity.value,
-        file_paths=event.file_paths,
-        commands=event.commands,
-        urls=event.urls,
-        ip_addresses=event.ip_addresses,
-        processed=event.processed,
-        enriched=event.enriched,
-        raw_payload=event.raw_payload,
-    )
+    return event
@@ -3,21 +3,20 @@
 from __future__ import annotations
 
 import logging
-from datetime import datetime
+import os
+from collections import Counter, defaultdict
+from datetime import UTC, datetime
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from pydantic import BaseModel
 
-from agentsleak.store.database import Database, get_database
+from agentsleak.api.dependencies import get_db
+from agentsleak.api.responses import ORJSONResponse, dumps
+from agentsleak.store.database import Database
 
 logger = logging.getLogger(__name__)
 
-
-def _naive(dt: datetime) -> datetime:
-    """Strip timezone info to allow safe min/max comparison of mixed datetimes."""
-    return dt.replace(tzinfo=None) if dt.tzinfo is not None else dt
-
 router = APIRouter(prefix="/graph", tags=["graph"])
 
 
@@ -87,10 +86,42 @@ class CytoscapeGraphResponse(BaseModel):
     stats: GraphStatsResponse
 
 
+# =============================================================================
+# Helpers
+# =============================================================================
+
+
+def _summarize_cluster(
+    file_nodes: list[dict[str, Any]],
+) -> tuple[int, int, datetime, datetime]:
+    """Total access/alert counts and the seen range of a directory cluster.
+
+    Computed in one pass; ties keep the first node, as min()/max() would.
+    """
+    first = file_nodes[0]
+    total_access = total_alerts = 0
+    min_first, max_last = first["first_seen"], first["last_seen"]
+    for n in file_nodes:
+        total_access += n["access_count"]
+        total_alerts += n["alert_count"]
+        if n["first_seen"] < min_first:
+            min_first = n["first_seen"]
+        if n["last_seen"] > max_last:
+            max_last = n["last_seen"]
+    return total_access, total_alerts, min_first, max_last
+
+
 # =============================================================================
 # Endpoints
 # =============================================================================
 
+# Graph responses can hold thousands of nodes and edges, so endpoints build
+# them as plain dicts in the response model shapes and render them with
+# orjson themselves. response_model is kept for the OpenAPI schema; returning
+# a Response skips FastAPI's second validation and encoding pass.
+# The full graph endpoints also keep rendered bodies in db.graph_cache, since
+# the dashboard refetches the same view repeatedly.
+
 
 @router.get("/session/{session_id}", response_model=GraphResponse)
 async def get_session_graph(
@@ -98,8 +129,8 @@ async def get_session_graph(
     cluster_dirs: bool = Query(False, description="Cluster file nodes by directory"),
     from_date: datetime | None = Query(None, description="Filter nodes by first_seen >= date"),
     to_date: datetime | None = Query(None, description="Filter nodes by last_seen <= date"),
-    db: Database = Depends(get_database),
-) -> GraphResponse:
+    db: Database = Depends(get_db),
+) -> Response:
     """Get graph nodes and edges for a specific session."""
     # Verify session exists
     session = db.get_session_by_id(session_id)
@@ -109,90 +140,77 @@ async def get_session_graph(
             detail=f"Session {session_id} not found",
         )
 
-    graph_data = db.get_session_graph(session_id)
+    # Stored times are aware UTC; treat naive query values as UTC too, which
+    # also keeps equal windows under one cache key
+    if from_date and from_date.tzinfo is None:
+        from_date = from_date.replace(tzinfo=UTC)
+    if to_date and to_date.tzinfo is None:
+        to_date = to_date.replace(tzinfo=UTC)
+
+    cache_key = ("session", session_id, cluster_dirs, from_date, to_date)
+    cached = db.graph_cache.get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+    generation = db.graph_cache.generation
+
+    graph_data = db.get_session_graph(session_id, from_date=from_date, to_date=to_date)
 
     raw_nodes = graph_data["nodes"]
     raw_edges = graph_data["edges"]
 
-    # Compute full time range before any filtering
+    # Full time range of the session, before the time window
     time_range = None
-    if raw_nodes:
-        all_times = [_naive(n.first_seen) for n in raw_nodes] + [_naive(n.last_seen) for n in raw_nodes]
+    if graph_data["time_range"]:
+        min_time, max_time = graph_data["time_range"]
         time_range = {
-            "min": min(all_times).isoformat(),
-            "max": max(all_times).isoformat(),
+            "min": min_time.isoformat(),
+            "max": max_time.isoformat(),
         }
 
-    # Apply time window filter
-    # Strip timezone info to avoid naive vs aware datetime comparison errors
-    # (JS sends UTC with 'Z' suffix, but DB stores naive datetimes)
-    if from_date and from_date.tzinfo is not None:
-        from_date = from_date.replace(tzinfo=None)
-    if to_date and to_date.tzinfo is not None:
-        to_date = to_date.replace(tzinfo=None)
-
-    if from_date or to_date:
-        filtered_ids: set[str] = set()
-        filtered_nodes = []
-        for n in raw_nodes:
-            if from_date and _naive(n.last_seen) < from_date:
-                continue
-            if to_date and _naive(n.first_seen) > to_date:
-                continue
-            filtered_nodes.append(n)
-            filtered_ids.add(str(n.id))
-        raw_nodes = filtered_nodes
-        raw_edges = [
-            e for e in raw_edges
-            if str(e.source_id) in filtered_ids and str(e.target_id) in filtered_ids
-        ]
-
     # Inject session_source into session node color field
     source_val = getattr(session, "session_source", None) or "claude_code"
-    nodes = [
-        GraphNodeResponse(
-            id=str(n.id),
-            node_type=n.node_type.value,
-            label=n.label,
-            value=n.value,
-            first_seen=n.first_seen,
-            last_seen=n.last_seen,
-            access_count=n.access_count,
-            alert_count=n.alert_count,
-            size=n.size,
-            color=source_val if n.node_type.value == "session" else n.color,
-        )
+    nodes: list[dict[str, Any]] = [
+        {
+            "id": str(n.id),
+            "node_type": n.node_type,
+            "label": n.label,
+            "value": n.value,
+            "first_seen": n.first_seen,
+            "last_seen": n.last_seen,
+            "access_count": n.access_count,
+            "alert_count": n.alert_count,
+            "size": n.size,
+            "color": source_val if n.node_type == "session" else n.color,
+        }
         for n in raw_nodes
     ]
 
-    edges = [
-        GraphEdgeResponse(
-            id=str(e.id),
-            source_id=str(e.source_id),
-            target_id=str(e.target_id),
-            relation=e.relation.value,
-            first_seen=e.first_seen,
-            last_seen=e.last_seen,
-            count=e.count,
-            weight=e.weight,
-            color=e.color,
-        )
+    edges: list[dict[str, Any]] = [
+        {
+            "id": str(e.id),
+            "source_id": str(e.source_id),
+            "target_id": str(e.target_id),
+            "relation": e.relation,
+            "first_seen": e.first_seen,
+            "last_seen": e.last_seen,
+            "count": e.count,
+            "weight": e.weight,
+            "color": e.color,
+        }
         for e in raw_edges
     ]
 
     # Cluster file nodes by directory
     if cluster_dirs:
-        import os
-
         file_types = {"file", "directory"}
-        dir_groups: dict[str, list[GraphNodeResponse]] = {}
-        non_file_nodes: list[GraphNodeResponse] = []
+        dir_groups: defaultdict[str, list[dict[str, Any]]] = defaultdict(list)
+        non_file_nodes: list[dict[str, Any]] = []
 
         for n in nodes:
-            if n.node_type in file_types:
-                parent = os.path.dirname(n.value) or os.path.dirname(n.label)
+            if n["node_type"] in file_types:
+                parent = os.path.dirname(n["value"]) or os.path.dirname(n["label"])
                 if parent:
-                    dir_groups.setdefault(parent, []).append(n)
+                    dir_groups[parent].append(n)
                 else:
                     non_file_nodes.append(n)
             else:
@@ -205,82 +223,59 @@ async def get_session_graph(
         for dir_path, file_nodes in dir_groups.items():
             if len(file_nodes) >= 3:
                 cluster_id = f"dir:{dir_path}"
-                total_access = sum(n.access_count for n in file_nodes)
-                total_alerts = sum(n.alert_count for n in file_nodes)
-                min_first = min(file_nodes, key=lambda n: _naive(n.first_seen)).first_seen
-                max_last = max(file_nodes, key=lambda n: _naive(n.last_seen)).last_seen
-
-                cluster_node = GraphNodeResponse(
-                    id=cluster_id,
-                    node_type="directory",
-                    label=f"{dir_path}/ ({len(file_nodes)} files)",
-                    value=dir_path,
-                    first_seen=min_first,
-                    last_seen=max_last,
-                    access_count=total_access,
-                    alert_count=total_alerts,
-                    size=len(file_nodes) * 1.5,
-                    color=None,
-                )
+                total_access, total_alerts, min_first, max_last = _summarize_cluster(file_nodes)
+
+                cluster_node = {
+                    "id": cluster_id,
+                    "node_type": "directory",
+                    "label": f"{dir_path}/ ({len(file_nodes)} files)",
+                    "value": dir_path,
+                    "first_seen": min_first,
+                    "last_seen": max_last,
+                    "access_count": total_access,
+                    "alert_count": total_alerts,
+                    "size": len(file_nodes) * 1.5,
+                    "color": None,
+                }
                 # Store children IDs as extra data (via label for now)
                 clustered_nodes.append(cluster_node)
 
                 for fn in file_nodes:
-                    clustered_ids[fn.id] = cluster_id
+                    clustered_ids[fn["id"]] = cluster_id
             else:
                 clustered_nodes.extend(file_nodes)
 
         # Redirect and deduplicate edges
         if clustered_ids:
-            seen_edges: set[tuple[str, str, str]] = set()
-            new_edges: list[GraphEdgeResponse] = []
+            # The edge dicts were built for this response, so redirect them
+            # in place; the dict keeps the first edge per key, in order
+            deduped: dict[tuple[str, str, str], dict[str, Any]] = {}
             for e in edges:
-                src = clustered_ids.get(e.source_id, e.source_id)
-                tgt = clustered_ids.get(e.target_id, e.target_id)
-                key = (src, tgt, e.relation)
-                if key not in seen_edges:
-                    seen_edges.add(key)
-                    new_edges.append(GraphEdgeResponse(
-                        id=e.id,
-                        source_id=src,
-                        target_id=tgt,
-                        relation=e.relation,
-                        first_seen=e.first_seen,
-                        last_seen=e.last_seen,
-                        count=e.count,
-                        weight=e.weight,
-                        color=e.color,
-                    ))
-            edges = new_edges
+                source_id = e["source_id"] = clustered_ids.get(e["source_id"], e["source_id"])
+                target_id = e["target_id"] = clustered_ids.get(e["target_id"], e["target_id"])
+                deduped.setdefault((source_id, target_id, e["relation"]), e)
+            edges = list(deduped.values())
 
         nodes = clustered_nodes
 
     # Calculate stats
-    nodes_by_type: dict[str, int] = {}
-    for n in nodes:
-        t = n.node_type
-        nodes_by_type[t] = nodes_by_type.get(t, 0) + 1
-
-    edges_by_relation: dict[str, int] = {}
-    for e in edges:
-        r = e.relation
-        edges_by_relation[r] = edges_by_relation.get(r, 0) + 1
-
-    stats = GraphStatsResponse(
-        total_nodes=len(nodes),
-        total_edges=len(edges),
-        nodes_by_type=nodes_by_type,
-        edges_by_relation=edges_by_relation,
-    )
+    stats = {
+        "total_nodes": len(nodes),
+        "total_edges": len(edges),
+        "nodes_by_type": Counter(n["node_type"] for n in nodes),
+        "edges_by_relation": Counter(e["relation"] for e in edges),
+    }
 
-    return GraphResponse(nodes=nodes, edges=edges, stats=stats, time_range=time_range)
+    body = dumps({"nodes": nodes, "edges": edges, "stats": stats, "time_range": time_range})
+    db.graph_cache.set(cache_key, body, generation)
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/session/{session_id}/cytoscape", response_model=CytoscapeGraphResponse)
 async def get_session_graph_cytoscape(
     session_id: str,
-    db: Database = Depends(get_database),
-) -> CytoscapeGraphResponse:
+    db: Database = Depends(get_db),
+) -> ORJSONResponse:
     """Get graph in Cytoscape.js format for session visualization."""
     session = db.get_session_by_id(session_id)
     if session is None:
@@ -291,60 +286,48 @@ async def get_session_graph_cytoscape(
 
     graph_data = db.get_session_graph(session_id)
 
-    elements: list[CytoscapeElement] = []
-
-    # Add nodes
-    for node in graph_data["nodes"]:
-        elements.append(
-            CytoscapeElement(
-                data={
-                    "id": str(node.id),
-                    "label": node.label,
-                    "type": node.node_type.value,
-                    "value": node.value,
-                    "size": node.size,
-                    "accessCount": node.access_count,
-                    "alertCount": node.alert_count,
-                },
-                classes=node.node_type.value,
-            )
-        )
-
-    # Add edges
-    for edge in graph_data["edges"]:
-        elements.append(
-            CytoscapeElement(
-                data={
-                    "id": str(edge.id),
-                    "source": str(edge.source_id),
-                    "target": str(edge.target_id),
-                    "label": edge.relation.value,
-                    "weight": edge.weight,
-                    "count": edge.count,
-                },
-                classes=edge.relation.value,
-            )
-        )
+    # Elements are plain {"data": ..., "classes": ...} dicts in the
+    # CytoscapeElement shape; building models only to dump them again is
+    # slower than encoding the dicts directly. Nodes come first, then edges
+    elements: list[dict[str, Any]] = [
+        {
+            "data": {
+                "id": node.id,
+                "label": node.label,
+                "type": node.node_type,
+                "value": node.value,
+                "size": node.size,
+                "accessCount": node.access_count,
+                "alertCount": node.alert_count,
+            },
+            "classes": node.node_type,
+        }
+        for node in graph_data["nodes"]
+    ]
+    elements.extend(
+        {
+            "data": {
+                "id": edge.id,
+                "source": edge.source_id,
+                "target": edge.target_id,
+                "label": edge.relation,
+                "weight": edge.weight,
+                "count": edge.count,
+            },
+            "classes": edge.relation,
+        }
+        for edge in graph_data["edges"]
+    )
 
     # Calculate stats
-    nodes_by_type: dict[str, int] = {}
-    for n in graph_data["nodes"]:
-        t = n.node_type.value
-        nodes_by_type[t] = nodes_by_type.get(t, 0) + 1
-
-    edges_by_relation: dict[str, int] = {}
-    for e in graph_data["edges"]:
-        r = e.relation.value
-        edges_by_relation[r] = edges_by_relation.get(r, 0) + 1
-
-    stats = GraphStatsResponse(
-        total_nodes=len(graph_data["nodes"]),
-        total_edges=len(graph_data["edges"]),
-        nodes_by_type=nodes_by_type,
-        edges_by_relation=edges_by_relation,
-    )
+    stats = {
+        "total_nodes": len(graph_data["nodes"]),
+        "total_edges": len(graph_data["edges"]),
+        "nodes_by_type": Counter(n.node_type for n in graph_data["nodes"]),
+        "edges_by_relation": Counter(e.relation for e in graph_data["edges"]),
+    }
 
-    return CytoscapeGraphResponse(elements=elements, stats=stats)
+    return ORJSONResponse({"elements": elements, "stats": stats})
 
 
 @router.get("/global", response_model=GraphResponse)
@@ -355,14 +338,16 @@ async def get_global_graph(
     limit_nodes: int = Query(500, ge=1, le=2000, description="Max nodes to return"),
     endpoint: str | None = Query(None, description="Filter by endpoint hostname"),
     session_source: str | None = Query(None, description="Filter by session source (claude_code, cursor)"),
-    db: Database = Depends(get_database),
-) -> GraphResponse:
+    db: Database = Depends(get_db),
+) -> Response:
     """Get aggregated graph across all sessions with optional time filter."""
-    # Strip timezone info to avoid naive vs aware datetime comparison errors
-    if from_date and from_date.tzinfo is not None:
-        from_date = from_date.replace(tzinfo=None)
-    if to_date and to_date.tzinfo is not None:
-        to_date = to_date.replace(tzinfo=None)
+    cache_key = (
+        "global", from_date, to_date, cluster_dirs, limit_nodes, endpoint, session_source
+    )
+    cached = db.graph_cache.get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+    generation = db.graph_cache.generation
 
     graph_data = db.get_global_graph(
         from_date=from_date,
@@ -372,133 +357,117 @@ async def get_global_graph(
         session_source=session_source,
     )
 
-    nodes = [
-        GraphNodeResponse(
-            id=str(n.id),
-            node_type=n.node_type.value,
-            label=n.label,
-            value=n.value,
-            first_seen=n.first_seen,
-            last_seen=n.last_seen,
-            access_count=n.access_count,
-            alert_count=n.alert_count,
-            size=n.size,
-            color=n.color,
-        )
+    nodes: list[dict[str, Any]] = [
+        {
+            "id": str(n.id),
+            "node_type": n.node_type,
+            "label": n.label,
+            "value": n.value,
+            "first_seen": n.first_seen,
+            "last_seen": n.last_seen,
+            "access_count": n.access_count,
+            "alert_count": n.alert_count,
+            "size": n.size,
+            "color": n.color,
+        }
         for n in graph_data["nodes"]
     ]
 
-    edges = [
-        GraphEdgeResponse(
-            id=str(e.id),
-            source_id=str(e.source_id),
-            target_id=str(e.target_id),
-            relation=e.relation.value,
-            first_seen=e.first_seen,
-            last_seen=e.last_seen,
-            count=e.count,
-            weight=e.weight,
-            color=e.color,
-        )
+    edges: list[dict[str, Any]] = [
+        {
+            "id": str(e.id),
+            "source_id": str(e.source_id),
+            "target_id": str(e.target_id),
+            "relation": e.relation,
+            "first_seen": e.first_seen,
+            "last_seen": e.last_seen,
+            "count": e.count,
+            "weight": e.weight,
+            "color": e.color,
+        }
         for e in graph_data["edges"]
     ]
 
     # --- Inject synthetic User/Endpoint nodes + session source ---
-    # Build a mapping from session_id -> endpoint label
-    session_nodes = [n for n in nodes if n.node_type == "session"]
+    session_nodes = [n for n in nodes if n["node_type"] == "session"]
     if session_nodes:
-        # Collect all session_ids present in the graph's session nodes
-        {n.value for n in session_nodes}
-        # Also collect from raw graph data for session_id mapping
-        raw_session_map: dict[str, str] = {}  # session_id -> node.id
-        for n in graph_data["nodes"]:
-            if n.node_type.value == "session":
-                raw_session_map[n.value] = str(n.id)
-
         # Query endpoint + source info for these sessions
-        with db.transaction() as cursor:
-            cursor.execute(
-                "SELECT session_id, endpoint_hostname, endpoint_user, "
-                "COALESCE(session_source, 'claude_code') as session_source "
-                "FROM sessions WHERE endpoint_hostname IS NOT NULL"
-            )
-            endpoint_rows = cursor.fetchall()
-
-        # Inject session_source into session node color field
-        session_source_map: dict[str, str] = {}
-        for row in endpoint_rows:
-            session_source_map[row["session_id"]] = row["session_source"]
-        for sn in session_nodes:
-            sn.color = session_source_map.get(sn.value, "claude_code")
+        endpoint_rows = db.get_session_endpoints([n["value"] for n in session_nodes])
 
-        # Group sessions by endpoint label
-        endpoint_sessions: dict[str, list[str]] = {}  # label -> [session_ids]
+        # Map session_id -> source and session_id -> endpoint label
+        session_source_map: dict[str, str] = {}
+        endpoint_labels: dict[str, str] = {}
         for row in endpoint_rows:
             sid = row["session_id"]
-            if sid not in raw_session_map:
-                continue
+            session_source_map[sid] = row["session_source"]
             user = row["endpoint_user"] or ""
             host = row["endpoint_hostname"]
-            label = f"{user}@{host}" if user else host
-            endpoint_sessions.setdefault(label, []).append(sid)
+            endpoint_labels[sid] = f"{user}@{host}" if user else host
+
+        # Inject session_source into session node color field, and group
+        # session nodes by endpoint label in one pass over the nodes
+        endpoint_sessions: dict[str, list[dict[str, Any]]] = {}
+        for sn in session_nodes:
+            sn["color"] = session_source_map.get(sn["value"], "claude_code")
+            label = endpoint_labels.get(sn["value"])
+            if label is not None:
+                endpoint_sessions.setdefault(label, []).append(sn)
 
         # Create user nodes and edges
-        for ep_label, session_ids in endpoint_sessions.items():
+        for ep_label, matching_session_nodes in endpoint_sessions.items():
             user_node_id = f"user:{ep_label}"
             # Calculate aggregated stats
-            matching_session_nodes = [
-                n for n in session_nodes
-                if n.value in session_ids
-            ]
-            if not matching_session_nodes:
-                continue
-
-            total_alerts = sum(n.alert_count for n in matching_session_nodes)
-            min_first = min(matching_session_nodes, key=lambda n: _naive(n.first_seen)).first_seen
-            max_last = max(matching_session_nodes, key=lambda n: _naive(n.last_seen)).last_seen
-
-            user_node = GraphNodeResponse(
-                id=user_node_id,
-                node_type="user",
-                label=ep_label,
-                value=ep_label,
-                first_seen=min_first,
-                last_seen=max_last,
-                access_count=len(matching_session_nodes),
-                alert_count=total_alerts,
-                size=2.0,
-                color=None,
-            )
+            total_alerts = 0
+            min_first = matching_session_nodes[0]["first_seen"]
+            max_last = matching_session_nodes[0]["last_seen"]
+            for n in matching_session_nodes:
+                total_alerts += n["alert_count"]
+                if n["first_seen"] < min_first:
+                    min_first = n["first_seen"]
+                if n["last_seen"] > max_last:
+                    max_last = n["last_seen"]
+
+            user_node = {
+                "id": user_node_id,
+                "node_type": "user",
+                "label": ep_label,
+                "value": ep_label,
+                "first_seen": min_first,
+                "last_seen": max_last,
+                "access_count": len(matching_session_nodes),
+                "alert_count": total_alerts,
+                "size": 2.0,
+                "color": None,
+            }
             nodes.append(user_node)
 
             # Create edges from user -> each session node
             for sn in matching_session_nodes:
-                edge_id = f"user-edge:{ep_label}:{sn.id}"
-                edges.append(GraphEdgeResponse(
-                    id=edge_id,
-                    source_id=user_node_id,
-                    target_id=sn.id,
-                    relation="contains",
-                    first_seen=sn.first_seen,
-                    last_seen=sn.last_seen,
-                    count=1,
-                    weight=1.0,
-                    color=None,
-                ))
+                edges.append(
+                    {
+                        "id": f"user-edge:{ep_label}:{sn['id']}",
+                        "source_id": user_node_id,
+                        "target_id": sn["id"],
+                        "relation": "contains",
+                        "first_seen": sn["first_seen"],
+                        "last_seen": sn["last_seen"],
+                        "count": 1,
+                        "weight": 1.0,
+                        "color": None,
+                    }
+                )
 
     # Cluster file nodes by directory
     if cluster_dirs:
-        import os
-
         file_types = {"file", "directory"}
-        dir_groups: dict[str, list[GraphNodeResponse]] = {}
-        non_file_nodes: list[GraphNodeResponse] = []
+        dir_groups: defaultdict[str, list[dict[str, Any]]] = defaultdict(list)
+        non_file_nodes: list[dict[str, Any]] = []
 
         for n in nodes:
-            if n.node_type in file_types:
-                parent = os.path.dirname(n.value) or os.path.dirname(n.label)
+            if n["node_type"] in file_types:
+                parent = os.path.dirname(n["value"]) or os.path.dirname(n["label"])
                 if parent:
-                    dir_groups.setdefault(parent, []).append(n)
+                    dir_groups[parent].append(n)
                 else:
                     non_file_nodes.append(n)
             else:
@@ -510,73 +479,50 @@ async def get_global_graph(
         for dir_path, file_nodes in dir_groups.items():
             if len(file_nodes) >= 3:
                 cluster_id = f"dir:{dir_path}"
-                total_access = sum(n.access_count for n in file_nodes)
-                total_alerts = sum(n.alert_count for n in file_nodes)
-                min_first = min(file_nodes, key=lambda n: _naive(n.first_seen)).first_seen
-                max_last = max(file_nodes, key=lambda n: _naive(n.last_seen)).last_seen
-
-                cluster_node = GraphNodeResponse(
-                    id=cluster_id,
-                    node_type="directory",
-                    label=f"{dir_path}/ ({len(file_nodes)} files)",
-                    value=dir_path,
-                    first_seen=min_first,
-                    last_seen=max_last,
-                    access_count=total_access,
-                    alert_count=total_alerts,
-                    size=len(file_nodes) * 1.5,
-                    color=None,
-                )
+                total_access, total_alerts, min_first, max_last = _summarize_cluster(file_nodes)
+
+                cluster_node = {
+                    "id": cluster_id,
+                    "node_type": "directory",
+                    "label": f"{dir_path}/ ({len(file_nodes)} files)",
+                    "value": dir_path,
+                    "first_seen": min_first,
+                    "last_seen": max_last,
+                    "access_count": total_access,
+                    "alert_count": total_alerts,
+                    "size": len(file_nodes) * 1.5,
+                    "color": None,
+                }
                 clustered_nodes.append(cluster_node)
 
                 for fn in file_nodes:
-                    clustered_ids[fn.id] = cluster_id
+                    clustered_ids[fn["id"]] = cluster_id
             else:
                 clustered_nodes.extend(file_nodes)
 
         if clustered_ids:
-            seen_edges: set[tuple[str, str, str]] = set()
-            new_edges: list[GraphEdgeResponse] = []
+            # The edge dicts were built for this response, so redirect them
+            # in place; the dict keeps the first edge per key, in order
+            deduped: dict[tuple[str, str, str], dict[str, Any]] = {}
             for e in edges:
-                src = clustered_ids.get(e.source_id, e.source_id)
-                tgt = clustered_ids.get(e.target_id, e.target_id)
-                key = (src, tgt, e.relation)
-                if key not in seen_edges:
-                    seen_edges.add(key)
-                    new_edges.append(GraphEdgeResponse(
-                        id=e.id,
-                        source_id=src,
-                        target_id=tgt,
-                        relation=e.relation,
-                        first_seen=e.first_seen,
-                        last_seen=e.last_seen,
-                        count=e.count,
-                        weight=e.weight,
-                        color=e.color,
-                    ))
-            edges = new_edges
+                source_id = e["source_id"] = clustered_ids.get(e["source_id"], e["source_id"])
+                target_id = e["target_id"] = clustered_ids.get(e["target_id"], e["target_id"])
+                deduped.setdefault((source_id, target_id, e["relation"]), e)
+            edges = list(deduped.values())
 
         nodes = clustered_nodes
 
     # Calculate stats
-    nodes_by_type: dict[str, int] = {}
-    for n in nodes:
-        t = n.node_type
-        nodes_by_type[t] = nodes_by_type.get(t, 0) + 1
-
-    edges_by_relation: dict[str, int] = {}
-    for e in edges:
-        r = e.relation
-        edges_by_relation[r] = edges_by_relation.get(r, 0) + 1
-
-    stats = GraphStatsResponse(
-        total_nodes=len(nodes),
-        total_edges=len(edges),
-        nodes_by_type=nodes_by_type,
-        edges_by_relation=edges_by_relation,
-    )
+    stats = {
+        "total_nodes": len(nodes),
+        "total_edges": len(edges),
+        "nodes_by_type": Counter(n["node_type"] for n in nodes),
+        "edges_by_relation": Counter(e["relation"] for e in edges),
+    }
 
-    return GraphResponse(nodes=nodes, edges=edges, stats=stats)
+    body = dumps({"nodes": nodes, "edges": edges, "stats": stats, "time_range": None})
+    db.graph_cache.set(cache_key, body, generation)
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/global/cytoscape", response_model=CytoscapeGraphResponse)
@@ -584,73 +530,55 @@ async def get_global_graph_cytoscape(
     from_date: datetime | None = Query(None, description="Start of time range"),
     to_date: datetime | None = Query(None, description="End of time range"),
     limit_nodes: int = Query(500, ge=1, le=2000, description="Max nodes to return"),
-    db: Database = Depends(get_database),
-) -> CytoscapeGraphResponse:
+    db: Database = Depends(get_db),
+) -> ORJSONResponse:
     """Get global graph in Cytoscape.js format for visualization."""
-    # Strip timezone info to avoid naive vs aware datetime comparison errors
-    if from_date and from_date.tzinfo is not None:
-        from_date = from_date.replace(tzinfo=None)
-    if to_date and to_date.tzinfo is not None:
-        to_date = to_date.replace(tzinfo=None)
-
     graph_data = db.get_global_graph(
         from_date=from_date,
         to_date=to_date,
         limit_nodes=limit_nodes,
     )
 
-    elements: list[CytoscapeElement] = []
-
-    # Add nodes
-    for node in graph_data["nodes"]:
-        elements.append(
-            CytoscapeElement(
-                data={
-                    "id": str(node.id),
-                    "label": node.label,
-                    "type": node.node_type.value,
-                    "value": node.value,
-                    "size": node.size,
-                    "accessCount": node.access_count,
-                    "alertCount": node.alert_count,
-                    "sessionCount": len(node.session_ids),
-                },
-                classes=node.node_type.value,
-            )
-        )
-
-    # Add edges
-    for edge in graph_data["edges"]:
-        elements.append(
-            CytoscapeElement(
-                data={
-                    "id": str(edge.id),
-                    "source": str(edge.source_id),
-                    "target": str(edge.target_id),
-                    "label": edge.relation.value,
-                    "weight": edge.weight,
-                    "count": edge.count,
-                },
-                classes=edge.relation.value,
-            )
-        )
-
-    # Calculate stats
-    nodes_by_type: dict[str, int] = {}
-    for n in graph_data["nodes"]:
-        t = n.node_type.value
-        nodes_by_type[t] = nodes_by_type.get(t, 0) + 1
-
-    edges_by_relation: dict[str, int] = {}
-    for e in graph_data["edges"]:
-        r = e.relation.value
-        edges_by_relation[r] = edges_by_relation.get(r, 0) + 1
-
-    stats = GraphStatsResponse(
-        total_nodes=len(graph_data["nodes"]),
-        total_edges=len(graph_data["edges"]),
-        nodes_by_type=nodes_by_type,
-        edges_by_relation=edges_by_relation,
+    # Elements are plain {"data": ..., "classes": ...} dicts in the
+    # CytoscapeElement shape; building models only to dump them again is
+    # slower than encoding the dicts directly. Nodes come first, then edges
+    elements: list[dict[str, Any]] = [
+        {
+            "data": {
+                "id": node.id,
+                "label": node.label,
+                "type": node.node_type,
+                "value": node.value,
+                "size": node.size,
+                "accessCount": node.access_count,
+                "alertCount": node.alert_count,
+                "sessionCount": len(node.session_ids),
+            },
+            "classes": node.node_type,
+        }
+        for node in graph_data["nodes"]
+    ]
+    elements.extend(
+        {
+            "data": {
+                "id": edge.id,
+                "source": edge.source_id,
+                "target": edge.target_id,
+                "label": edge.relation,
+                "weight": edge.weight,
+                "count": edge.count,
+            },
+            "classes": edge.relation,
+        }
+        for edge in graph_data["edges"]
     )
 
-    return CytoscapeGraphResponse(elements=elements, stats=stats)
+    # Calculate stats
+    stats = {
+        "total_nodes": len(graph_data["nodes"]),
+        "total_edges": len(graph_data["edges"]),
+        "nodes_by_type": Counter(n.node_type for n in graph_data["nodes"]),
+        "edges_by_relation": Counter(e.relation for e in graph_data["edges"]),
+    }
+
+    return ORJSONResponse({"elements": elements, "stats": stats})
@@ -2,15 +2,18 @@
 
 from __future__ import annotations
 
-import json
 import logging
+from collections import OrderedDict
 from datetime import datetime
 from typing import Any
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from pydantic import BaseModel, Field
 
+from agentsleak.api.dependencies import get_db
+from agentsleak.api.responses import body_etag, conditional_response, dumps
 from agentsleak.config.settings import get_settings
 from agentsleak.engine.processor import get_engine
 from agentsleak.models.alerts import (
@@ -20,7 +23,7 @@ from agentsleak.models.alerts import (
     RuleCondition,
 )
 from agentsleak.models.events import EventCategory, Severity
-from agentsleak.store.database import Database, get_database
+from agentsleak.store.database import Database
 
 logger = logging.getLogger(__name__)
 
@@ -247,6 +250,62 @@ User: "Block any file writes to system directories"
 IMPORTANT: Output ONLY valid JSON. No markdown, no code fences, no extra text.\
 """
 
+_CATEGORY_BY_VALUE: dict[str, EventCategory] = {c.value: c for c in EventCategory}
+
+# Validated assistant replies by prompt, so resubmitting a prompt from the UI
+# does not wait on another model call. Only touched from the event loop.
+_GENERATED_POLICY_CACHE_SIZE = 256
+_generated_policies: OrderedDict[str, GeneratePolicyResponse] = OrderedDict()
+
+
+# =============================================================================
+# Helpers
+# =============================================================================
+
+
+def _resolve_categories(raw: list[str]) -> list[EventCategory]:
+    """Convert category strings from a request, rejecting unknown ones with a 400."""
+    categories = []
+    for cat in raw:
+        category = _CATEGORY_BY_VALUE.get(cat)
+        if category is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid category: {cat}",
+            )
+        categories.append(category)
+    return categories
+
+
+def _build_policy_detail(policy: Policy, hit_count: int = 0) -> dict[str, Any]:
+    """Build the detail response for a stored policy, in the PolicyDetail shape."""
+    return {
+        "id": policy.id,
+        "name": policy.name,
+        "description": policy.description,
+        "enabled": policy.enabled,
+        "categories": policy.categories,
+        "tools": policy.tools,
+        "conditions": [
+            {
+                "field": c.field,
+                "operator": c.operator,
+                "value": c.value,
+                "case_sensitive": c.case_sensitive,
+            }
+            for c in policy.conditions
+        ],
+        "condition_logic": policy.condition_logic,
+        "action": policy.action,
+        "severity": policy.severity,
+        "alert_title": policy.alert_title,
+        "alert_description": policy.alert_description,
+        "tags": policy.tags,
+        "created_at": policy.created_at,
+        "updated_at": policy.updated_at,
+        "hit_count": hit_count,
+    }
+
 
 # =============================================================================
 # Endpoints
@@ -255,44 +314,29 @@ IMPORTANT: Output ONLY valid JSON. No markdown, no code fences, no extra text.\
 
 @router.get("")
 async def list_policies(
+    request: Request,
     enabled_only: bool = Query(False, description="Only return enabled policies"),
-    db: Database = Depends(get_database),
-) -> dict:
+    db: Database = Depends(get_db),
+) -> Response:
     """List all policies."""
-    policies = db.get_all_policies(enabled_only=enabled_only)
-    hit_counts = db.get_alert_counts_by_policy()
-
-    items = [
-        PolicyDetail(
-            id=p.id,
-            name=p.name,
-            description=p.description,
-            enabled=p.enabled,
-            categories=[c.value for c in p.categories],
-            tools=p.tools,
-            conditions=[
-                RuleConditionCreate(
-                    field=c.field,
-                    operator=c.operator,
-                    value=c.value,
-                    case_sensitive=c.case_sensitive,
-                )
-                for c in p.conditions
-            ],
-            condition_logic=p.condition_logic,
-            action=p.action.value,
-            severity=p.severity.value,
-            alert_title=p.alert_title,
-            alert_description=p.alert_description,
-            tags=p.tags,
-            created_at=p.created_at,
-            updated_at=p.updated_at,
-            hit_count=hit_counts.get(str(p.id), 0),
-        )
-        for p in policies
-    ]
+    # The dashboard polls this list; the rendered body and its ETag are cached
+    # until a policy changes or a new alert moves the hit counts
+    cached = db.policy_list_cache.get(enabled_only)
+    if cached is not None:
+        body, etag = cached
+    else:
+        generation = db.policy_list_cache.generation
+
+        policies = db.get_all_policies(enabled_only=enabled_only)
+        hit_counts = db.get_alert_counts_by_policy()
+
+        items = [_build_policy_detail(p, hit_counts.get(str(p.id), 0)) for p in policies]
 
-    return {"items": items, "total": len(items)}
+        body = dumps({"items": items, "total": len(items)})
+        etag = body_etag(body)
+        db.policy_list_cache.set(enabled_only, (body, etag), generation)
+
+    return conditional_response(request, body, etag)
 
 
 # --- Policy Assistant (must be registered before /{policy_id}) ---
@@ -316,6 +360,11 @@ async def generate_policy(request: GeneratePolicyRequest) -> GeneratePolicyRespo
             detail="Policy Assistant is not available. Set ANTHROPIC_API_KEY to enable it.",
         )
 
+    cached = _generated_policies.get(request.prompt)
+    if cached is not None:
+        _generated_policies.move_to_end(request.prompt)
+        return cached
+
     try:
         import anthropic
     except ImportError:
@@ -329,7 +378,14 @@ async def generate_policy(request: GeneratePolicyRequest) -> GeneratePolicyRespo
         message = client.messages.create(
             model="claude-sonnet-4-20250514",
             max_tokens=1024,
-            system=POLICY_ASSISTANT_SYSTEM_PROMPT,
+            # The system prompt is identical on every call; let the API cache it
+            system=[
+                {
+                    "type": "text",
+                    "text": POLICY_ASSISTANT_SYSTEM_PROMPT,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ],
             messages=[{"role": "user", "content": request.prompt}],
         )
     except anthropic.AuthenticationError:
@@ -361,8 +417,8 @@ async def generate_policy(request: GeneratePolicyRequest) -> GeneratePolicyRespo
         raw_text = "\n".join(lines).strip()
 
     try:
-        parsed = json.loads(raw_text)
-    except json.JSONDecodeError:
+        parsed = orjson.loads(raw_text)
+    except orjson.JSONDecodeError:
         logger.error(f"Failed to parse Claude response as JSON: {raw_text[:200]}")
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
@@ -384,17 +440,22 @@ async def generate_policy(request: GeneratePolicyRequest) -> GeneratePolicyRespo
             detail=f"Generated policy failed validation: {e}",
         )
 
-    return GeneratePolicyResponse(
+    response = GeneratePolicyResponse(
         policy=policy,
         explanation=parsed["explanation"],
     )
+    _generated_policies[request.prompt] = response
+    if len(_generated_policies) > _GENERATED_POLICY_CACHE_SIZE:
+        _generated_policies.popitem(last=False)
+    return response
 
 
 @router.get("/{policy_id}", response_model=PolicyDetail)
 async def get_policy(
     policy_id: UUID,
-    db: Database = Depends(get_database),
-) -> PolicyDetail:
+    request: Request,
+    db: Database = Depends(get_db),
+) -> Response:
     """Get policy by ID."""
     policy = db.get_policy_by_id(policy_id)
     if policy is None:
@@ -403,51 +464,18 @@ async def get_policy(
             detail=f"Policy {policy_id} not found",
         )
 
-    conditions = [
-        RuleConditionCreate(
-            field=c.field,
-            operator=c.operator,
-            value=c.value,
-            case_sensitive=c.case_sensitive,
-        )
-        for c in policy.conditions
-    ]
-
-    return PolicyDetail(
-        id=policy.id,
-        name=policy.name,
-        description=policy.description,
-        enabled=policy.enabled,
-        categories=[c.value for c in policy.categories],
-        tools=policy.tools,
-        conditions=conditions,
-        condition_logic=policy.condition_logic,
-        action=policy.action.value,
-        severity=policy.severity.value,
-        alert_title=policy.alert_title,
-        alert_description=policy.alert_description,
-        tags=policy.tags,
-        created_at=policy.created_at,
-        updated_at=policy.updated_at,
-    )
+    body = dumps(_build_policy_detail(policy))
+    return conditional_response(request, body, body_etag(body))
 
 
 @router.post("", response_model=PolicyResponse, status_code=status.HTTP_201_CREATED)
 async def create_policy(
     request: PolicyCreateRequest,
-    db: Database = Depends(get_database),
+    db: Database = Depends(get_db),
 ) -> PolicyResponse:
     """Create a new policy."""
     # Convert categories from strings to EventCategory enum
-    categories = []
-    for cat in request.categories:
-        try:
-            categories.append(EventCategory(cat))
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid category: {cat}",
-            )
+    categories = _resolve_categories(request.categories)
 
     # Convert conditions
     conditions = [
@@ -485,8 +513,8 @@ async def create_policy(
             )
         raise
 
-    # Reload engine policies so new policy takes effect immediately
-    get_engine().reload_policies()
+    # Register with the engine so the new policy takes effect immediately
+    get_engine().add_policy(policy)
 
     logger.info(f"Created policy: {policy.name} ({policy.id})")
 
@@ -502,7 +530,7 @@ async def create_policy(
 async def update_policy(
     policy_id: UUID,
     request: PolicyUpdateRequest,
-    db: Database = Depends(get_database),
+    db: Database = Depends(get_db),
 ) -> PolicyResponse:
     """Update an existing policy."""
     existing = db.get_policy_by_id(policy_id)
@@ -522,16 +550,7 @@ async def update_policy(
     if request.enabled is not None:
         update_data["enabled"] = request.enabled
     if request.categories is not None:
-        categories = []
-        for cat in request.categories:
-            try:
-                categories.append(EventCategory(cat))
-            except ValueError:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Invalid category: {cat}",
-                )
-        update_data["categories"] = categories
+        update_data["categories"] = _resolve_categories(request.categories)
     if request.tools is not None:
         update_data["tools"] = request.tools
     if request.conditions is not None:
@@ -559,8 +578,8 @@ async def update_policy(
 
     updated_policy = db.update_policy(policy_id, update_data)
 
-    # Reload engine policies so changes take effect immediately
-    get_engine().reload_policies()
+    # Swap the engine's copy so changes take effect immediately
+    get_engine().replace_policy(updated_policy)
 
     logger.info(f"Updated policy: {updated_policy.name} ({policy_id})")
 
@@ -575,7 +594,7 @@ async def update_policy(
 @router.delete("/{policy_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_policy(
     policy_id: UUID,
-    db: Database = Depends(get_database),
+    db: Database = Depends(get_db),
 ) -> None:
     """Delete a policy."""
     existing = db.get_policy_by_id(policy_id)
@@ -587,8 +606,8 @@ async def delete_policy(
 
     db.delete_policy(policy_id)
 
-    # Reload engine policies so deletion takes effect immediately
-    get_engine().reload_policies()
+    # Drop from the engine so deletion takes effect immediately
+    get_engine().remove_policy(policy_id)
 
     logger.info(f"Deleted policy: {existing.name} ({policy_id})")
 
@@ -596,7 +615,7 @@ async def delete_policy(
 @router.post("/{policy_id}/toggle", response_model=PolicyResponse)
 async def toggle_policy(
     policy_id: UUID,
-    db: Database = Depends(get_database),
+    db: Database = Depends(get_db),
 ) -> PolicyResponse:
     """Enable or disable a policy (toggle current state)."""
     existing = db.get_policy_by_id(policy_id)
@@ -609,8 +628,8 @@ async def toggle_policy(
     new_enabled = not existing.enabled
     updated_policy = db.update_policy(policy_id, {"enabled": new_enabled})
 
-    # Reload engine policies so toggle takes effect immediately
-    get_engine().reload_policies()
+    # Swap the engine's copy so the toggle takes effect immediately
+    get_engine().replace_policy(updated_policy)
 
     action = "enabled" if new_enabled else "disabled"
     logger.info(f"Policy {action}: {updated_policy.name} ({policy_id})")
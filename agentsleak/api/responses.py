@@ -0,0 +1,67 @@
+"""Shared response classes for AgentsLeak API routes."""
+
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Iterable
+from typing import Any
+
+import orjson
+from fastapi import Request, Response, status
+from fastapi.responses import JSONResponse
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content to JSON bytes with the options used by API responses."""
+    # OPT_UTC_Z writes UTC datetimes with a "Z" suffix, as pydantic does
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+
+
+def page_body(items_json: bytes, **fields: Any) -> bytes:
+    """Encode a ``{"items": [...], **fields}`` page around an encoded items array."""
+    return b'{"items":' + items_json + (b"," + dumps(fields)[1:] if fields else b"}")
+
+
+def body_etag(body: bytes) -> str:
+    """Weak ETag from a hash of a rendered JSON body.
+
+    Hashing the content, rather than versioning it with a cache generation
+    (which restarts at zero with the process) or an updated_at column
+    (stamped with one-second precision), means two different bodies never
+    share a tag.
+    """
+    return f'W/"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+
+def conditional_response(request: Request, body: bytes, etag: str) -> Response:
+    """JSON response for body, or an empty 304 if the client already has etag."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson.
+
+    orjson encodes datetime, UUID and enum values natively, so handlers
+    returning plain dicts can pass model attributes through unconverted.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class ORJSONPageResponse(Response):
+    """Paginated ``{"items": [...], **fields}`` response rendered with orjson.
+
+    The whole page is encoded in one call and sent as a single body;
+    streaming it per item cost a threadpool hop and an ASGI send for every
+    entry. ``items_key`` renames the array for responses that call it
+    something else.
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, items: Iterable[Any], items_key: str = "items", **fields: Any) -> None:
+        super().__init__(dumps({items_key: list(items), **fields}))
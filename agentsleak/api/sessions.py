@@ -2,21 +2,28 @@
 
 from __future__ import annotations
 
+import base64
 import logging
+from collections.abc import Callable
 from datetime import datetime
 from typing import Any
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from pydantic import BaseModel, Field, TypeAdapter
 
+from agentsleak.api.dependencies import get_db
+from agentsleak.api.responses import ORJSONResponse, dumps, page_body
 from agentsleak.models.events import Event, EventCategory
-from agentsleak.store.database import Database, get_database
+from agentsleak.store.database import Database
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/sessions", tags=["sessions"])
 
+# Serializes a page of events to JSON in one pydantic-core call
+_EVENT_LIST_ADAPTER = TypeAdapter(list[Event])
+
 
 # =============================================================================
 # Response Models
@@ -81,12 +88,23 @@ class SessionTimelineResponse(BaseModel):
     entries: list[TimelineEntry]
     total_events: int
     total_alerts: int
+    next_cursor: str | None = Field(
+        None,
+        description=(
+            "Opaque cursor for the last entry; pass it back as `after` for the events "
+            "that follow. Absent once a page comes back empty."
+        ),
+    )
 
 
 # =============================================================================
 # Endpoints
 # =============================================================================
 
+# List and timeline endpoints build plain dicts in the response model shapes
+# and encode them with orjson. response_model is kept for the OpenAPI schema;
+# returning a Response skips FastAPI's validation and encoding pass.
+
 
 @router.get("", response_model=SessionListResponse)
 async def list_sessions(
@@ -99,8 +117,8 @@ async def list_sessions(
     session_source: str | None = Query(None, description="Filter by session source (claude_code, cursor)"),
     from_date: datetime | None = Query(None, description="Filter from date"),
     to_date: datetime | None = Query(None, description="Filter to date"),
-    db: Database = Depends(get_database),
-) -> SessionListResponse:
+    db: Database = Depends(get_db),
+) -> Response:
     """List sessions with pagination and filters."""
     # The 'endpoint' parameter is an alias for hostname filtering
     effective_hostname = hostname or endpoint
@@ -117,42 +135,43 @@ async def list_sessions(
 
     # Compute actual event/alert counts for listed sessions
     session_ids = [s.session_id for s in result["items"]]
-    event_counts = db.get_event_counts_by_session(session_ids) if session_ids else {}
-    alert_counts = db.get_alert_counts_by_session(session_ids) if session_ids else {}
+    counts = db.get_session_counts(session_ids)
 
     items = [
-        SessionSummary(
-            id=s.id,
-            session_id=s.session_id,
-            started_at=s.started_at,
-            ended_at=s.ended_at,
-            cwd=s.cwd,
-            parent_session_id=s.parent_session_id,
-            event_count=event_counts.get(s.session_id, s.event_count),
-            alert_count=alert_counts.get(s.session_id, s.alert_count),
-            risk_score=s.risk_score,
-            status=s.status,
-            endpoint_hostname=s.endpoint_hostname,
-            endpoint_user=s.endpoint_user,
-            session_source=s.session_source,
-        )
+        {
+            "id": s.id,
+            "session_id": s.session_id,
+            "started_at": s.started_at,
+            "ended_at": s.ended_at,
+            "cwd": s.cwd,
+            "parent_session_id": s.parent_session_id,
+            "event_count": counts[s.session_id][0],
+            "alert_count": counts[s.session_id][1],
+            "risk_score": s.risk_score,
+            "status": s.status,
+            "endpoint_hostname": s.endpoint_hostname,
+            "endpoint_user": s.endpoint_user,
+            "session_source": s.session_source,
+        }
         for s in result["items"]
     ]
 
-    return SessionListResponse(
-        items=items,
-        total=result["total"],
+    total = result["total"]
+    body = page_body(
+        dumps(items),
+        total=total,
         page=page,
         page_size=page_size,
-        pages=(result["total"] + page_size - 1) // page_size,
+        pages=(total + page_size - 1) // page_size,
     )
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/{session_id}", response_model=SessionDetail)
 async def get_session(
     session_id: str,
-    db: Database = Depends(get_database),
-) -> SessionDetail:
+    db: Database = Depends(get_db),
+) -> ORJSONResponse:
     """Get session by ID with event/alert counts."""
     session = db.get_session_by_id(session_id)
     if session is None:
@@ -168,26 +187,26 @@ async def get_session(
     actual_event_count = db.get_event_count(session_id=session_id)
     actual_alert_count = db.get_alert_count(session_id=session_id)
 
-    return SessionDetail(
-        id=session.id,
-        session_id=session.session_id,
-        started_at=session.started_at,
-        ended_at=session.ended_at,
-        cwd=session.cwd,
-        parent_session_id=session.parent_session_id,
-        event_count=actual_event_count,
-        alert_count=actual_alert_count,
-        risk_score=session.risk_score,
-        status=session.status,
-        endpoint_hostname=session.endpoint_hostname,
-        endpoint_user=session.endpoint_user,
-        session_source=session.session_source,
-        events_by_category=stats.get("events_by_category", {}),
-        events_by_severity=stats.get("events_by_severity", {}),
-        alerts_by_severity=stats.get("alerts_by_severity", {}),
-        first_event_at=stats.get("first_event_at"),
-        last_event_at=stats.get("last_event_at"),
-    )
+    return ORJSONResponse({
+        "id": session.id,
+        "session_id": session.session_id,
+        "started_at": session.started_at,
+        "ended_at": session.ended_at,
+        "cwd": session.cwd,
+        "parent_session_id": session.parent_session_id,
+        "event_count": actual_event_count,
+        "alert_count": actual_alert_count,
+        "risk_score": session.risk_score,
+        "status": session.status,
+        "endpoint_hostname": session.endpoint_hostname,
+        "endpoint_user": session.endpoint_user,
+        "session_source": session.session_source,
+        "events_by_category": stats.get("events_by_category", {}),
+        "events_by_severity": stats.get("events_by_severity", {}),
+        "alerts_by_severity": stats.get("alerts_by_severity", {}),
+        "first_event_at": stats.get("first_event_at"),
+        "last_event_at": stats.get("last_event_at"),
+    })
 
 
 @router.get("/{session_id}/events")
@@ -197,17 +216,9 @@ async def get_session_events(
     page_size: int = Query(50, ge=1, le=200),
     category: str | None = Query(None),
     severity: str | None = Query(None),
-    db: Database = Depends(get_database),
-) -> dict[str, Any]:
+    db: Database = Depends(get_db),
+) -> Response:
     """Get paginated events for a session."""
-    # Verify session exists
-    session = db.get_session_by_id(session_id)
-    if session is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Session {session_id} not found",
-        )
-
     result = db.get_events_paginated(
         session_id=session_id,
         category=category,
@@ -215,111 +226,140 @@ async def get_session_events(
         page=page,
         page_size=page_size,
     )
+    # Events imply the session exists; only an empty page needs the lookup
+    if not result["items"]:
+        _require_session(db, session_id)
 
     total = result["total"]
-    return {
-        "items": [e.model_dump(mode="json") for e in result["items"]],
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "pages": (total + page_size - 1) // page_size,
-    }
+    body = page_body(
+        _EVENT_LIST_ADAPTER.dump_json(result["items"]),
+        total=total,
+        page=page,
+        page_size=page_size,
+        pages=(total + page_size - 1) // page_size,
+    )
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/{session_id}/timeline", response_model=SessionTimelineResponse)
 async def get_session_timeline(
     session_id: str,
-    db: Database = Depends(get_database),
-) -> SessionTimelineResponse:
+    after: str | None = Query(
+        None, description="Cursor from a previous page; omit to start at the first event"
+    ),
+    limit: int = Query(1000, ge=1, le=1000, description="Max events to return"),
+    db: Database = Depends(get_db),
+) -> ORJSONResponse:
     """Get timeline data for session visualization."""
-    # Verify session exists
-    session = db.get_session_by_id(session_id)
-    if session is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Session {session_id} not found",
-        )
-
-    # Get all events for the session
-    events = db.get_events(session_id=session_id, limit=1000)
-
-    # Get alerts for the session to mark events that triggered alerts
-    alerts = db.get_alerts(session_id=session_id, limit=1000)
-    alert_event_ids = set()
-    for alert in alerts:
-        alert_event_ids.update(alert.event_ids)
-
-    entries = []
-    for event in events:
-        description = _format_event_description(event)
-        entries.append(
-            TimelineEntry(
-                timestamp=event.timestamp,
-                event_type=event.hook_type,
-                tool_name=event.tool_name,
-                category=event.category.value,
-                severity=event.severity.value,
-                description=description,
-                event_id=event.id,
-                has_alert=event.id in alert_event_ids,
-            )
-        )
-
-    # Sort by timestamp
-    entries.sort(key=lambda e: e.timestamp)
+    # One page of events in chronological order, already flagged if an
+    # alert references them: from the session start, or following a cursor
+    position = _decode_cursor(after) if after is not None else None
+    rows, total_alerts = db.get_timeline_rows(session_id, after=position, limit=limit)
+    if not rows:
+        _require_session(db, session_id)
+
+    entries = [
+        {
+            "timestamp": row["timestamp"],
+            "event_type": row["hook_type"],
+            "tool_name": row["tool_name"],
+            "category": row["category"],
+            "severity": row["severity"],
+            "description": _format_event_description(row),
+            "event_id": row["id"],
+            "has_alert": row["has_alert"],
+        }
+        for row in rows
+    ]
 
-    return SessionTimelineResponse(
-        session_id=session_id,
-        entries=entries,
-        total_events=len(events),
-        total_alerts=len(alerts),
-    )
+    return ORJSONResponse({
+        "session_id": session_id,
+        "entries": entries,
+        "total_events": len(rows),
+        "total_alerts": total_alerts,
+        # Carries the id as well as the timestamp, so events sharing the
+        # boundary timestamp are not skipped by the next page
+        "next_cursor": (
+            _encode_cursor(rows[-1]["timestamp"], rows[-1]["id"]) if rows else None
+        ),
+    })
 
 
 @router.post("/{session_id}/terminate", status_code=status.HTTP_200_OK)
 async def terminate_session(
     session_id: str,
-    db: Database = Depends(get_database),
+    db: Database = Depends(get_db),
 ) -> dict[str, str]:
     """Manually terminate (end) a session."""
-    session = db.get_session_by_id(session_id)
-    if session is None:
+    if not db.end_active_session(session_id):
+        _require_session(db, session_id)
+        return {"status": "already_ended", "session_id": session_id}
+
+    logger.info(f"Session {session_id} terminated manually")
+    return {"status": "terminated", "session_id": session_id}
+
+
+def _encode_cursor(timestamp: datetime, event_id: str) -> str:
+    """Encode a timeline position as an opaque cursor."""
+    raw = f"{timestamp.isoformat()}|{event_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, str]:
+    """Decode a timeline cursor, raising a 400 if it is malformed."""
+    try:
+        timestamp, event_id = base64.urlsafe_b64decode(cursor).decode().split("|")
+        return datetime.fromisoformat(timestamp), event_id
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid timeline cursor",
+        ) from None
+
+
+def _require_session(db: Database, session_id: str) -> None:
+    """Raise a 404 if the session does not exist."""
+    if db.get_session_by_id(session_id) is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Session {session_id} not found",
         )
-    if session.status == "ended":
-        return {"status": "already_ended", "session_id": session_id}
 
-    db.end_session(session_id)
-    logger.info(f"Session {session_id} terminated manually")
-    return {"status": "terminated", "session_id": session_id}
+
+def _format_paths(verb: str) -> Callable[[dict[str, Any]], str]:
+    def format_paths(row: dict[str, Any]) -> str:
+        return f"{verb} file(s): {', '.join(row['file_paths'][:3] or ['unknown'])}"
+
+    return format_paths
+
+
+def _format_command(row: dict[str, Any]) -> str:
+    cmd = row["commands"][0] if row["commands"] else "unknown"
+    if len(cmd) > 100:
+        cmd = cmd[:100] + "..."
+    return f"Executed command: {cmd}"
+
+
+def _format_network(row: dict[str, Any]) -> str:
+    return f"Network access: {', '.join(row['urls'][:2] or ['unknown'])}"
+
+
+def _format_tool(row: dict[str, Any]) -> str:
+    return f"Tool invocation: {row['tool_name'] or 'unknown'}"
+
+
+# Timeline description per event category; anything else is a tool invocation
+_DESCRIPTION_FORMATTERS: dict[str, Callable[[dict[str, Any]], str]] = {
+    EventCategory.FILE_READ: _format_paths("Read"),
+    EventCategory.FILE_WRITE: _format_paths("Wrote"),
+    EventCategory.FILE_DELETE: _format_paths("Deleted"),
+    EventCategory.COMMAND_EXEC: _format_command,
+    EventCategory.NETWORK_ACCESS: _format_network,
+    EventCategory.SUBAGENT_SPAWN: lambda row: "Spawned subagent",
+    EventCategory.SESSION_LIFECYCLE: lambda row: f"Session lifecycle: {row['hook_type']}",
+}
 
 
-def _format_event_description(event: Event) -> str:
-    """Format a human-readable description for an event."""
-    tool_name = event.tool_name or "unknown"
-
-    if event.category == EventCategory.FILE_READ:
-        paths = event.file_paths[:3] if event.file_paths else ["unknown"]
-        return f"Read file(s): {', '.join(paths)}"
-    elif event.category == EventCategory.FILE_WRITE:
-        paths = event.file_paths[:3] if event.file_paths else ["unknown"]
-        return f"Wrote file(s): {', '.join(paths)}"
-    elif event.category == EventCategory.FILE_DELETE:
-        paths = event.file_paths[:3] if event.file_paths else ["unknown"]
-        return f"Deleted file(s): {', '.join(paths)}"
-    elif event.category == EventCategory.COMMAND_EXEC:
-        cmd = event.commands[0] if event.commands else "unknown"
-        if len(cmd) > 100:
-            cmd = cmd[:100] + "..."
-        return f"Executed command: {cmd}"
-    elif event.category == EventCategory.NETWORK_ACCESS:
-        urls = event.urls[:2] if event.urls else ["unknown"]
-        return f"Network access: {', '.join(urls)}"
-    elif event.category == EventCategory.SUBAGENT_SPAWN:
-        return "Spawned subagent"
-    elif event.category == EventCategory.SESSION_LIFECYCLE:
-        return f"Session lifecycle: {event.hook_type}"
-    else:
-        return f"Tool invocation: {tool_name}"
+def _format_event_description(row: dict[str, Any]) -> str:
+    """Format a human-readable description for a timeline row."""
+    return _DESCRIPTION_FORMATTERS.get(row["category"], _format_tool)(row)
@@ -2,13 +2,19 @@
 
 from __future__ import annotations
 
+import asyncio
+import functools
 import logging
 from datetime import UTC, datetime, timedelta
+from typing import Any
 
-from fastapi import APIRouter, Depends, Query
+import anyio.to_thread
+from fastapi import APIRouter, Depends, Query, Request, Response
 from pydantic import BaseModel, Field
 
-from agentsleak.store.database import Database, get_database
+from agentsleak.api.dependencies import get_db
+from agentsleak.api.responses import body_etag, conditional_response, dumps
+from agentsleak.store.database import Database
 
 logger = logging.getLogger(__name__)
 
@@ -170,87 +176,113 @@ class TopDomainsResponse(BaseModel):
     total: int
 
 
+# =============================================================================
+# Helpers
+# =============================================================================
+
+
+def _cache_response(
+    request: Request,
+    db: Database,
+    cache_key: tuple[Any, ...],
+    generation: int,
+    content: dict[str, Any],
+) -> Response:
+    """Render a stats response and keep the body and its ETag in the stats cache."""
+    body = dumps(content)
+    etag = body_etag(body)
+    db.stats_cache.set(cache_key, (body, etag), generation)
+    return conditional_response(request, body, etag)
+
+
 # =============================================================================
 # Endpoints
 # =============================================================================
 
+# The database layer already returns rows as dicts, so the endpoints assemble
+# plain dicts in the response model shapes and render them with orjson.
+# response_model is kept for the OpenAPI schema. Dashboards poll these
+# aggregations, so rendered bodies are kept briefly in db.stats_cache and sent
+# with an ETag; a poll whose copy is current gets an empty 304.
+
 
 @router.get("/dashboard", response_model=DashboardStats)
 async def get_dashboard_stats(
+    request: Request,
     from_date: datetime | None = Query(None, description="Start of time range"),
     to_date: datetime | None = Query(None, description="End of time range"),
     endpoint: str | None = Query(None, description="Filter by endpoint hostname"),
-    db: Database = Depends(get_database),
-) -> DashboardStats:
+    db: Database = Depends(get_db),
+) -> Response:
     """Get dashboard overview statistics."""
-    # Strip timezone info to avoid naive vs aware datetime comparison errors
-    if from_date and from_date.tzinfo is not None:
-        from_date = from_date.replace(tzinfo=None)
-    if to_date and to_date.tzinfo is not None:
-        to_date = to_date.replace(tzinfo=None)
-    stats = db.get_dashboard_stats(from_date=from_date, to_date=to_date, endpoint=endpoint)
-
-    endpoint_count = db.get_unique_endpoint_count()
-
-    return DashboardStats(
-        total_sessions=stats["total_sessions"],
-        active_sessions=stats["active_sessions"],
-        total_events=stats["total_events"],
-        total_alerts=stats["total_alerts"],
-        new_alerts=stats["new_alerts"],
-        blocked_actions=stats["blocked_actions"],
-        endpoint_count=endpoint_count,
-        alerts_by_severity=AlertCountBySeverity(**stats["alerts_by_severity"]),
-        events_by_category=EventCountByCategory(**stats["events_by_category"]),
-        recent_alerts=[
-            RecentAlert(
-                id=str(a["id"]),
-                title=a["title"],
-                severity=a["severity"],
-                status=a["status"],
-                session_id=a["session_id"],
-                created_at=a["created_at"],
+    cache_key = ("dashboard", from_date, to_date, endpoint)
+    cached = db.stats_cache.get(cache_key)
+    if cached is not None:
+        return conditional_response(request, *cached)
+    generation = db.stats_cache.generation
+
+    # The two queries are independent; worker threads read on pooled
+    # connections, so they run side by side under WAL
+    stats, endpoint_count = await asyncio.gather(
+        anyio.to_thread.run_sync(
+            functools.partial(
+                db.get_dashboard_stats, from_date=from_date, to_date=to_date, endpoint=endpoint
             )
-            for a in stats["recent_alerts"]
-        ],
-        recent_events=[
-            RecentEvent(
-                id=str(e["id"]),
-                tool_name=e["tool_name"],
-                category=e["category"],
-                severity=e["severity"],
-                session_id=e["session_id"],
-                timestamp=e["timestamp"],
-            )
-            for e in stats["recent_events"]
-        ],
-        sessions_by_source=stats.get("sessions_by_source", {}),
+        ),
+        anyio.to_thread.run_sync(db.get_unique_endpoint_count),
     )
 
+    # recent_alerts / recent_events rows already carry the model's keys
+    response = {
+        "total_sessions": stats["total_sessions"],
+        "active_sessions": stats["active_sessions"],
+        "total_events": stats["total_events"],
+        "total_alerts": stats["total_alerts"],
+        "new_alerts": stats["new_alerts"],
+        "blocked_actions": stats["blocked_actions"],
+        "endpoint_count": endpoint_count,
+        "alerts_by_severity": stats["alerts_by_severity"],
+        "events_by_category": stats["events_by_category"],
+        "recent_alerts": stats["recent_alerts"],
+        "recent_events": stats["recent_events"],
+        "sessions_by_source": stats.get("sessions_by_source", {}),
+    }
+
+    return _cache_response(request, db, cache_key, generation, response)
+
 
 @router.get("/endpoints", response_model=EndpointStatsResponse)
 async def get_endpoint_stats(
-    db: Database = Depends(get_database),
-) -> EndpointStatsResponse:
+    request: Request,
+    db: Database = Depends(get_db),
+) -> Response:
     """Get aggregated statistics grouped by endpoint."""
+    cache_key = ("endpoints",)
+    cached = db.stats_cache.get(cache_key)
+    if cached is not None:
+        return conditional_response(request, *cached)
+    generation = db.stats_cache.generation
+
     endpoint_stats = db.get_endpoint_stats()
 
     items = [
-        EndpointStatsEntry(
-            endpoint_hostname=e["endpoint_hostname"],
-            endpoint_user=e["endpoint_user"],
-            session_count=e["session_count"],
-            total_events=e["total_events"],
-            total_alerts=e["total_alerts"],
-        )
+        {
+            "endpoint_hostname": e["endpoint_hostname"],
+            "endpoint_user": e["endpoint_user"],
+            "session_count": e["session_count"],
+            "total_events": e["total_events"],
+            "total_alerts": e["total_alerts"],
+        }
         for e in endpoint_stats
     ]
 
-    return EndpointStatsResponse(items=items, total=len(items))
+    response = {"items": items, "total": len(items)}
+    return _cache_response(request, db, cache_key, generation, response)
 
 
 @router.get("/timeline", response_model=TimelineResponse)
 async def get_timeline_stats(
+    request: Request,
     from_date: datetime | None = Query(
         None, description="Start of time range (defaults to 24 hours ago)"
     ),
@@ -266,9 +298,15 @@ async def get_timeline_stats(
     endpoint: str | None = Query(
         None, description="Filter by endpoint hostname"
     ),
-    db: Database = Depends(get_database),
-) -> TimelineResponse:
+    db: Database = Depends(get_db),
+) -> Response:
     """Get hourly/daily event and alert counts for charts."""
+    cache_key = ("timeline", from_date, to_date, interval, session_id, endpoint)
+    cached = db.stats_cache.get(cache_key)
+    if cached is not None:
+        return conditional_response(request, *cached)
+    generation = db.stats_cache.generation
+
     # Default time range: last 24 hours
     end_time = to_date or datetime.now(UTC)
     start_time = from_date or (end_time - timedelta(hours=24))
@@ -281,26 +319,19 @@ async def get_timeline_stats(
         endpoint=endpoint,
     )
 
-    points = [
-        TimelinePoint(
-            timestamp=p["timestamp"],
-            events=p["events"],
-            alerts=p["alerts"],
-        )
-        for p in timeline_data["points"]
-    ]
-
-    return TimelineResponse(
-        points=points,
-        total_events=timeline_data["total_events"],
-        total_alerts=timeline_data["total_alerts"],
-        start_time=start_time,
-        end_time=end_time,
-    )
+    response = {
+        "points": timeline_data["points"],
+        "total_events": timeline_data["total_events"],
+        "total_alerts": timeline_data["total_alerts"],
+        "start_time": start_time,
+        "end_time": end_time,
+    }
+    return _cache_response(request, db, cache_key, generation, response)
 
 
 @router.get("/top-files", response_model=TopFilesResponse)
 async def get_top_files(
+    request: Request,
     limit: int = Query(20, ge=1, le=100, description="Number of files to return"),
     sort_by: str = Query(
         "total_access", description="Sort by: total_access, read_count, write_count, alert_count"
@@ -308,33 +339,25 @@ async def get_top_files(
     from_date: datetime | None = Query(None, description="Start of time range"),
     to_date: datetime | None = Query(None, description="End of time range"),
     endpoint: str | None = Query(None, description="Filter by endpoint hostname"),
-    db: Database = Depends(get_database),
-) -> TopFilesResponse:
+    db: Database = Depends(get_db),
+) -> Response:
     """Get most accessed files."""
-    if from_date and from_date.tzinfo is not None:
-        from_date = from_date.replace(tzinfo=None)
-    if to_date and to_date.tzinfo is not None:
-        to_date = to_date.replace(tzinfo=None)
-    files = db.get_top_files(limit=limit, sort_by=sort_by, from_date=from_date, to_date=to_date, endpoint=endpoint)
+    cache_key = ("top-files", limit, sort_by, from_date, to_date, endpoint)
+    cached = db.stats_cache.get(cache_key)
+    if cached is not None:
+        return conditional_response(request, *cached)
+    generation = db.stats_cache.generation
 
-    items = [
-        TopFileEntry(
-            file_path=f["file_path"],
-            read_count=f["read_count"],
-            write_count=f["write_count"],
-            delete_count=f["delete_count"],
-            total_access=f["read_count"] + f["write_count"] + f["delete_count"],
-            last_accessed=f["last_accessed"],
-            alert_count=f["alert_count"],
-        )
-        for f in files
-    ]
+    files = db.get_top_files(limit=limit, sort_by=sort_by, from_date=from_date, to_date=to_date, endpoint=endpoint)
 
-    return TopFilesResponse(items=items, total=len(items))
+    # Rows already carry the TopFileEntry keys, total_access summed in SQL
+    response = {"items": files, "total": len(files)}
+    return _cache_response(request, db, cache_key, generation, response)
 
 
 @router.get("/top-commands", response_model=TopCommandsResponse)
 async def get_top_commands(
+    request: Request,
     limit: int = Query(20, ge=1, le=100, description="Number of commands to return"),
     sort_by: str = Query(
         "execution_count", description="Sort by: execution_count, alert_count"
@@ -342,30 +365,25 @@ async def get_top_commands(
     from_date: datetime | None = Query(None, description="Start of time range"),
     to_date: datetime | None = Query(None, description="End of time range"),
     endpoint: str | None = Query(None, description="Filter by endpoint hostname"),
-    db: Database = Depends(get_database),
-) -> TopCommandsResponse:
+    db: Database = Depends(get_db),
+) -> Response:
     """Get most executed commands."""
-    if from_date and from_date.tzinfo is not None:
-        from_date = from_date.replace(tzinfo=None)
-    if to_date and to_date.tzinfo is not None:
-        to_date = to_date.replace(tzinfo=None)
-    commands = db.get_top_commands(limit=limit, sort_by=sort_by, from_date=from_date, to_date=to_date, endpoint=endpoint)
+    cache_key = ("top-commands", limit, sort_by, from_date, to_date, endpoint)
+    cached = db.stats_cache.get(cache_key)
+    if cached is not None:
+        return conditional_response(request, *cached)
+    generation = db.stats_cache.generation
 
-    items = [
-        TopCommandEntry(
-            command=c["command"],
-            execution_count=c["execution_count"],
-            last_executed=c["last_executed"],
-            alert_count=c["alert_count"],
-        )
-        for c in commands
-    ]
+    commands = db.get_top_commands(limit=limit, sort_by=sort_by, from_date=from_date, to_date=to_date, endpoint=endpoint)
 
-    return TopCommandsResponse(items=items, total=len(items))
+    # Rows already carry the TopCommandEntry keys
+    response = {"items": commands, "total": len(commands)}
+    return _cache_response(request, db, cache_key, generation, response)
 
 
 @router.get("/top-domains", response_model=TopDomainsResponse)
 async def get_top_domains(
+    request: Request,
     limit: int = Query(20, ge=1, le=100, description="Number of domains to return"),
     sort_by: str = Query(
         "access_count", description="Sort by: access_count, alert_count"
@@ -373,23 +391,17 @@ async def get_top_domains(
     from_date: datetime | None = Query(None, description="Start of time range"),
     to_date: datetime | None = Query(None, description="End of time range"),
     endpoint: str | None = Query(None, description="Filter by endpoint hostname"),
-    db: Database = Depends(get_database),
-) -> TopDomainsResponse:
+    db: Database = Depends(get_db),
+) -> Response:
     """Get most accessed domains."""
-    if from_date and from_date.tzinfo is not None:
-        from_date = from_date.replace(tzinfo=None)
-    if to_date and to_date.tzinfo is not None:
-        to_date = to_date.replace(tzinfo=None)
-    domains = db.get_top_domains(limit=limit, sort_by=sort_by, from_date=from_date, to_date=to_date, endpoint=endpoint)
+    cache_key = ("top-domains", limit, sort_by, from_date, to_date, endpoint)
+    cached = db.stats_cache.get(cache_key)
+    if cached is not None:
+        return conditional_response(request, *cached)
+    generation = db.stats_cache.generation
 
-    items = [
-        TopDomainEntry(
-            hostname=d["hostname"],
-            access_count=d["access_count"],
-            last_accessed=d["last_accessed"],
-            alert_count=d["alert_count"],
-        )
-        for d in domains
-    ]
+    domains = db.get_top_domains(limit=limit, sort_by=sort_by, from_date=from_date, to_date=to_date, endpoint=endpoint)
 
-    return TopDomainsResponse(items=items, total=len(items))
+    # Rows already carry the TopDomainEntry keys
+    response = {"items": domains, "total": len(domains)}
+    return _cache_response(request, db, cache_key, generation, response)
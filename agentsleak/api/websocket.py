@@ -3,18 +3,30 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import contextlib
 import logging
+import weakref
+from collections import defaultdict
+from collections.abc import Iterable
 from datetime import UTC, datetime
 from typing import Any
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+import orjson
+from fastapi import APIRouter, WebSocket
 from pydantic import BaseModel
 
+from agentsleak.api.responses import dumps
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["websocket"])
 
+# A subscriber that cannot take a message within this many seconds is
+# dropped and closed instead of keeping its writer task blocked
+_SEND_TIMEOUT_SECONDS = 5.0
+# Messages buffered per connection; a client this far behind is dropped
+_SEND_QUEUE_SIZE = 1000
+
 
 # =============================================================================
 # WebSocket Message Types
@@ -42,86 +54,189 @@ class WSSubscription(BaseModel):
 
 
 class ConnectionManager:
-    """Manages WebSocket connections and subscriptions."""
+    """Manages WebSocket connections and subscriptions.
+
+    All state is touched only from the event loop, and no method awaits
+    between reading and updating it, so no lock is needed. Each connection
+    has a bounded outgoing queue drained by its own writer task, so
+    publishing never waits on a slow client.
+    """
 
     def __init__(self) -> None:
+        # Connections are held weakly, so a socket whose disconnect never ran
+        # is still collected; disconnect() remains the normal cleanup path
         # All active connections
-        self.active_connections: set[WebSocket] = set()
+        self.active_connections: weakref.WeakSet[WebSocket] = weakref.WeakSet()
         # Connection subscriptions: websocket -> set of channels
-        self.subscriptions: dict[WebSocket, set[str]] = {}
-        # Lock for thread safety
-        self._lock = asyncio.Lock()
+        self.subscriptions: weakref.WeakKeyDictionary[WebSocket, set[str]] = (
+            weakref.WeakKeyDictionary()
+        )
+        # Reverse indexes: exact channel -> subscribers, and wildcard prefix
+        # ("session:" for "session:*") -> subscribers
+        self.exact_index: defaultdict[str, weakref.WeakSet[WebSocket]] = defaultdict(
+            weakref.WeakSet
+        )
+        self.prefix_index: defaultdict[str, weakref.WeakSet[WebSocket]] = defaultdict(
+            weakref.WeakSet
+        )
+        # Outgoing message queues and the writer tasks draining them
+        self._queues: weakref.WeakKeyDictionary[WebSocket, asyncio.Queue[str]] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._writers: weakref.WeakKeyDictionary[WebSocket, asyncio.Task[None]] = (
+            weakref.WeakKeyDictionary()
+        )
+        # Closes of dropped connections still in flight, kept so they are
+        # not collected before they finish
+        self._closing: set[asyncio.Task[None]] = set()
 
     async def connect(self, websocket: WebSocket) -> None:
         """Accept and register a new connection."""
         await websocket.accept()
-        async with self._lock:
-            self.active_connections.add(websocket)
-            # Default subscriptions for new connections
-            self.subscriptions[websocket] = {"events", "alerts"}
+        self.active_connections.add(websocket)
+        # Default subscriptions for new connections
+        self.subscriptions[websocket] = set()
+        self._add_channels(websocket, ["events", "alerts"])
+
+        # The writer only holds a weak reference, and is cancelled if the
+        # socket is collected without a disconnect
+        queue: asyncio.Queue[str] = asyncio.Queue(maxsize=_SEND_QUEUE_SIZE)
+        writer = asyncio.create_task(self._write_loop(weakref.ref(websocket), queue))
+        self._queues[websocket] = queue
+        self._writers[websocket] = writer
+        weakref.finalize(websocket, writer.cancel)
         logger.info(f"WebSocket connected. Total connections: {len(self.active_connections)}")
 
     async def disconnect(self, websocket: WebSocket) -> None:
         """Remove a connection."""
-        async with self._lock:
-            self.active_connections.discard(websocket)
-            self.subscriptions.pop(websocket, None)
+        self.active_connections.discard(websocket)
+        if websocket in self.subscriptions:
+            self._remove_channels(websocket, list(self.subscriptions[websocket]))
+            del self.subscriptions[websocket]
+        self._queues.pop(websocket, None)
+        writer = self._writers.pop(websocket, None)
+        # A writer disconnecting its own failed connection just returns
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
         logger.info(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
 
     async def subscribe(self, websocket: WebSocket, channels: list[str]) -> None:
         """Subscribe a connection to channels."""
-        async with self._lock:
-            if websocket in self.subscriptions:
-                self.subscriptions[websocket].update(channels)
+        if websocket in self.subscriptions:
+            self._add_channels(websocket, channels)
         logger.debug(f"Subscribed to channels: {channels}")
 
     async def unsubscribe(self, websocket: WebSocket, channels: list[str]) -> None:
         """Unsubscribe a connection from channels."""
-        async with self._lock:
-            if websocket in self.subscriptions:
-                self.subscriptions[websocket].difference_update(channels)
+        if websocket in self.subscriptions:
+            self._remove_channels(websocket, channels)
         logger.debug(f"Unsubscribed from channels: {channels}")
 
     async def broadcast(self, channel: str, message: dict[str, Any]) -> None:
         """Broadcast a message to all connections subscribed to a channel."""
-        disconnected: list[WebSocket] = []
-
-        async with self._lock:
-            connections = list(self.active_connections)
-
-        for connection in connections:
-            # Check if connection is subscribed to this channel
-            if connection in self.subscriptions:
-                subs = self.subscriptions[connection]
-                # Match exact channel or wildcard
-                if channel in subs or self._matches_wildcard(channel, subs):
-                    try:
-                        await connection.send_json(message)
-                    except Exception as e:
-                        logger.warning(f"Failed to send to connection: {e}")
-                        disconnected.append(connection)
-
-        # Clean up disconnected clients
-        for conn in disconnected:
-            await self.disconnect(conn)
-
-    def _matches_wildcard(self, channel: str, subscriptions: set[str]) -> bool:
-        """Check if a channel matches any wildcard subscriptions."""
-        # Support patterns like "session:*" matching "session:abc123"
-        for sub in subscriptions:
-            if sub.endswith("*"):
-                prefix = sub[:-1]
+        await self.broadcast_multi((channel,), message)
+
+    async def broadcast_multi(self, channels: Iterable[str], message: dict[str, Any]) -> None:
+        """Broadcast a message once to every connection subscribed to any channel."""
+        targets: set[WebSocket] = set()
+        for channel in channels:
+            # Match exact channel or wildcard, e.g. "session:*" matching
+            # "session:abc123"; only the few distinct prefixes are scanned
+            targets.update(self.exact_index.get(channel, ()))
+            for prefix, subscribers in self.prefix_index.items():
                 if channel.startswith(prefix):
-                    return True
-        return False
+                    targets.update(subscribers)
+
+        if not targets:
+            return
+
+        # Encode once for the whole fan-out; the dashboard parses text frames.
+        # Message timestamps stay datetimes until orjson formats them here
+        text = dumps(message).decode()
+        for connection in targets:
+            await self._enqueue(connection, text)
+
+    def _add_channels(self, websocket: WebSocket, channels: list[str]) -> None:
+        """Record channels for a connection in its set and the indexes."""
+        self.subscriptions[websocket].update(channels)
+        for channel in channels:
+            if channel.endswith("*"):
+                self.prefix_index[channel[:-1]].add(websocket)
+            else:
+                self.exact_index[channel].add(websocket)
+
+    def _remove_channels(self, websocket: WebSocket, channels: list[str]) -> None:
+        """Drop channels for a connection, pruning emptied index entries."""
+        self.subscriptions[websocket].difference_update(channels)
+        for channel in channels:
+            if channel.endswith("*"):
+                index, key = self.prefix_index, channel[:-1]
+            else:
+                index, key = self.exact_index, channel
+            subscribers = index.get(key)
+            if subscribers is not None:
+                subscribers.discard(websocket)
+                if not subscribers:
+                    del index[key]
 
     async def send_personal(self, websocket: WebSocket, message: dict[str, Any]) -> None:
         """Send a message to a specific connection."""
+        await self._enqueue(websocket, dumps(message).decode())
+
+    async def _enqueue(self, websocket: WebSocket, text: str) -> None:
+        """Queue a message for a connection, dropping it if it has fallen behind."""
+        queue = self._queues.get(websocket)
+        if queue is None:
+            return
         try:
-            await websocket.send_json(message)
+            queue.put_nowait(text)
+        except asyncio.QueueFull:
+            logger.warning("WebSocket send queue full; dropping slow connection")
+            await self._drop(websocket)
+
+    async def _write_loop(
+        self, ref: weakref.ReferenceType[WebSocket], queue: asyncio.Queue[str]
+    ) -> None:
+        """Send queued messages to one connection until it fails or goes away."""
+        while True:
+            text = await queue.get()
+            try:
+                if not await self._send(ref, text):
+                    return
+            finally:
+                queue.task_done()
+
+    async def _send(self, ref: weakref.ReferenceType[WebSocket], text: str) -> bool:
+        """Send one message; returns False once the connection is gone."""
+        websocket = ref()
+        if websocket is None:
+            return False
+        try:
+            await asyncio.wait_for(websocket.send_text(text), timeout=_SEND_TIMEOUT_SECONDS)
         except Exception as e:
-            logger.warning(f"Failed to send personal message: {e}")
-            await self.disconnect(websocket)
+            logger.warning(f"Failed to send to connection: {e!r}")
+            await self._drop(websocket)
+            return False
+        return True
+
+    async def _drop(self, websocket: WebSocket) -> None:
+        """Disconnect a connection the server gave up on and close its socket.
+
+        The close runs in its own task, so a broadcast dropping a stuck
+        client never waits on it.
+        """
+        await self.disconnect(websocket)
+        close = asyncio.create_task(self._close(websocket))
+        self._closing.add(close)
+        close.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close(websocket: WebSocket) -> None:
+        """Close a dropped socket with 1013 (try again later)."""
+        # The socket may already be dead, in which case there is nothing
+        # left to close
+        with contextlib.suppress(Exception):
+            await asyncio.wait_for(websocket.close(code=1013), timeout=_SEND_TIMEOUT_SECONDS)
 
 
 # Global connection manager instance
@@ -156,58 +271,60 @@ async def websocket_endpoint(websocket: WebSocket) -> None:
     - {"type": "error", "message": "..."}
     """
     await manager.connect(websocket)
+    # The manager updates this set in place; replies serialize it sorted
+    subscriptions = manager.subscriptions[websocket]
 
     # Send initial subscription confirmation
     await manager.send_personal(
         websocket,
         {
             "type": "connected",
-            "timestamp": datetime.now(UTC).isoformat(),
+            "timestamp": datetime.now(UTC),
             "data": {
                 "message": "Connected to AgentsLeak WebSocket",
-                "subscriptions": list(manager.subscriptions.get(websocket, set())),
+                "subscriptions": sorted(subscriptions),
             },
         },
     )
 
     try:
-        while True:
-            # Receive message from client
-            data = await websocket.receive_text()
-
+        # Ends when the client disconnects
+        async for data in websocket.iter_text():
             try:
-                message = json.loads(data)
+                message = orjson.loads(data)
+                if not isinstance(message, dict):
+                    await manager.send_personal(
+                        websocket,
+                        {
+                            "type": "error",
+                            "timestamp": datetime.now(UTC),
+                            "data": {"message": "Message must be a JSON object"},
+                        },
+                    )
+                    continue
                 action = message.get("action")
 
                 if action == "subscribe":
-                    channels = message.get("channels", [])
+                    channels = _message_channels(message)
                     await manager.subscribe(websocket, channels)
                     await manager.send_personal(
                         websocket,
                         {
                             "type": "subscribed",
-                            "timestamp": datetime.now(UTC).isoformat(),
-                            "data": {
-                                "channels": list(
-                                    manager.subscriptions.get(websocket, set())
-                                )
-                            },
+                            "timestamp": datetime.now(UTC),
+                            "data": {"channels": sorted(subscriptions)},
                         },
                     )
 
                 elif action == "unsubscribe":
-                    channels = message.get("channels", [])
+                    channels = _message_channels(message)
                     await manager.unsubscribe(websocket, channels)
                     await manager.send_personal(
                         websocket,
                         {
                             "type": "unsubscribed",
-                            "timestamp": datetime.now(UTC).isoformat(),
-                            "data": {
-                                "channels": list(
-                                    manager.subscriptions.get(websocket, set())
-                                )
-                            },
+                            "timestamp": datetime.now(UTC),
+                            "data": {"channels": sorted(subscriptions)},
                         },
                     )
 
@@ -216,7 +333,7 @@ async def websocket_endpoint(websocket: WebSocket) -> None:
                         websocket,
                         {
                             "type": "pong",
-                            "timestamp": datetime.now(UTC).isoformat(),
+                            "timestamp": datetime.now(UTC),
                             "data": {},
                         },
                     )
@@ -226,25 +343,34 @@ async def websocket_endpoint(websocket: WebSocket) -> None:
                         websocket,
                         {
                             "type": "error",
-                            "timestamp": datetime.now(UTC).isoformat(),
+                            "timestamp": datetime.now(UTC),
                             "data": {"message": f"Unknown action: {action}"},
                         },
                     )
 
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 await manager.send_personal(
                     websocket,
                     {
                         "type": "error",
-                        "timestamp": datetime.now(UTC).isoformat(),
+                        "timestamp": datetime.now(UTC),
                         "data": {"message": "Invalid JSON message"},
                     },
                 )
 
-    except WebSocketDisconnect:
+    finally:
+        # Also runs when the handler fails, so no connection stays registered
         await manager.disconnect(websocket)
 
 
+def _message_channels(message: dict[str, Any]) -> list[str]:
+    """Channel names from a (un)subscribe message, skipping anything not a string."""
+    channels = message.get("channels", [])
+    if not isinstance(channels, list):
+        return []
+    return [channel for channel in channels if isinstance(channel, str)]
+
+
 # =============================================================================
 # Broadcast Functions (called from other parts of the app)
 # =============================================================================
@@ -254,42 +380,36 @@ async def broadcast_event(event_data: dict[str, Any]) -> None:
     """Broadcast a new event to subscribed clients."""
     message = {
         "type": "event",
-        "timestamp": datetime.now(UTC).isoformat(),
+        "timestamp": datetime.now(UTC),
         "payload": event_data,
     }
-    await manager.broadcast("events", message)
-
-    # Also broadcast to session-specific channel
+    # Also to the session-specific channel; a client on both gets it once
     session_id = event_data.get("session_id")
-    if session_id:
-        await manager.broadcast(f"session:{session_id}", message)
+    channels = ["events", f"session:{session_id}"] if session_id else ["events"]
+    await manager.broadcast_multi(channels, message)
 
 
 async def broadcast_alert(alert_data: dict[str, Any]) -> None:
     """Broadcast a new alert to subscribed clients."""
     message = {
         "type": "alert",
-        "timestamp": datetime.now(UTC).isoformat(),
+        "timestamp": datetime.now(UTC),
         "payload": alert_data,
     }
-    await manager.broadcast("alerts", message)
-
-    # Also broadcast to session-specific channel
+    # Also to the session-specific channel; a client on both gets it once
     session_id = alert_data.get("session_id")
-    if session_id:
-        await manager.broadcast(f"session:{session_id}", message)
+    channels = ["alerts", f"session:{session_id}"] if session_id else ["alerts"]
+    await manager.broadcast_multi(channels, message)
 
 
 async def broadcast_session_update(session_data: dict[str, Any]) -> None:
     """Broadcast a session update to subscribed clients."""
     message = {
         "type": "session_update",
-        "timestamp": datetime.now(UTC).isoformat(),
+        "timestamp": datetime.now(UTC),
         "payload": session_data,
     }
-    await manager.broadcast("sessions", message)
-
-    # Also broadcast to session-specific channel
+    # Also to the session-specific channel; a client on both gets it once
     session_id = session_data.get("session_id")
-    if session_id:
-        await manager.broadcast(f"session:{session_id}", message)
+    channels = ["sessions", f"session:{session_id}"] if session_id else ["sessions"]
+    await manager.broadcast_multi(channels, message)
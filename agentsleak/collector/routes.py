@@ -7,76 +7,93 @@ from typing import Any
 
 from fastapi import APIRouter, Depends, Request
 
-from agentsleak.engine.processor import Engine, get_engine
+from agentsleak.api.dependencies import get_current_engine, get_db
+from agentsleak.api.responses import ORJSONResponse
+from agentsleak.engine.processor import Engine
 from agentsleak.models.events import Event, HookPayload, Session
-from agentsleak.store.database import Database, get_database
+from agentsleak.store.database import Database
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/api/collect", tags=["collector"])
+# Hooks wait on these replies, so handlers return ORJSONResponse directly,
+# skipping FastAPI's response validation and jsonable_encoder pass
+router = APIRouter(prefix="/api/collect", tags=["collector"], default_response_class=ORJSONResponse)
 
 
-def _resolve_endpoint_fields(
+_DEFAULT_SESSION_SOURCE = "claude_code"
+
+# Header fallbacks for payload fields, as lowercase ASGI header names
+_ENDPOINT_HEADERS = (b"x-endpoint-hostname", b"x-endpoint-user", b"x-agentsleak-source")
+
+
+def _resolve_endpoint(
     payload: HookPayload,
     request: Request | None = None,
-) -> tuple[str | None, str | None]:
-    """Resolve endpoint_hostname and endpoint_user from payload or headers.
+) -> tuple[str | None, str | None, str]:
+    """Resolve endpoint_hostname, endpoint_user and session_source.
 
-    Returns (endpoint_hostname, endpoint_user).
+    Payload fields win; missing ones fall back to the X-Endpoint-Hostname,
+    X-Endpoint-User and X-AgentsLeak-Source headers, found in one pass over
+    the raw headers. session_source defaults to 'claude_code'.
     """
-    hostname = payload.endpoint_hostname
-    user = payload.endpoint_user
-    if request is not None:
-        if not hostname:
-            hostname = request.headers.get("X-Endpoint-Hostname")
-        if not user:
-            user = request.headers.get("X-Endpoint-User")
-    return hostname, user
-
-
-def _resolve_session_source(
+    values: list[str | None] = [
+        payload.endpoint_hostname,
+        payload.endpoint_user,
+        payload.session_source,
+    ]
+    if request is not None and not all(values):
+        headers: dict[bytes, bytes] = {}
+        for name, value in request.scope["headers"]:
+            # Like Headers.get, the first occurrence of a header wins
+            if name in _ENDPOINT_HEADERS and name not in headers:
+                headers[name] = value
+        for index, name in enumerate(_ENDPOINT_HEADERS):
+            if not values[index]:
+                raw = headers.get(name)
+                values[index] = raw.decode("latin-1") if raw is not None else None
+    hostname, user, source = values
+    return hostname, user, source or _DEFAULT_SESSION_SOURCE
+
+
+def _session_from_payload(
     payload: HookPayload,
     request: Request | None = None,
-) -> str:
-    """Resolve session_source from payload or headers. Defaults to 'claude_code'."""
-    source = payload.session_source
-    if not source and request is not None:
-        source = request.headers.get("X-AgentsLeak-Source")
-    return source or "claude_code"
+    **fields: Any,
+) -> Session:
+    """Build a Session from a hook payload, with endpoint fields resolved."""
+    hostname, user, source = _resolve_endpoint(payload, request)
+    return Session(
+        session_id=payload.session_id,
+        cwd=payload.session_cwd,
+        parent_session_id=payload.parent_session_id,
+        endpoint_hostname=hostname,
+        endpoint_user=user,
+        session_source=source,
+        **fields,
+    )
 
 
 def _create_or_update_session(
     payload: HookPayload,
     db: Database,
     request: Request | None = None,
-) -> Session:
-    """Create or update a session from a hook payload."""
-    session = db.get_session_by_id(payload.session_id)
-
-    if session is None:
-        hostname, user = _resolve_endpoint_fields(payload, request)
-        source = _resolve_session_source(payload, request)
-        session = Session(
-            session_id=payload.session_id,
-            cwd=payload.session_cwd,
-            parent_session_id=payload.parent_session_id,
-            endpoint_hostname=hostname,
-            endpoint_user=user,
-            session_source=source,
-        )
-        db.save_session(session)
-        logger.info(f"Created new session: {payload.session_id}")
-
-    return session
-
-
-@router.post("/pre-tool-use", response_model=dict[str, Any])
+) -> None:
+    """Create the payload's session if it has not been seen before."""
+    # Every hook lands here, so repeat sessions are answered from memory
+    if db.session_exists(payload.session_id):
+        return
+
+    db.save_session(_session_from_payload(payload, request))
+    logger.info(f"Created new session: {payload.session_id}")
+
+
+@router.post("/pre-tool-use")
 async def collect_pre_tool_use(
     payload: HookPayload,
     request: Request,
-    db: Database = Depends(get_database),
-    engine: Engine = Depends(get_engine),
-) -> dict[str, Any]:
+    db: Database = Depends(get_db),
+    engine: Engine = Depends(get_current_engine),
+) -> ORJSONResponse:
     """Collect pre-tool-use event and return a decision.
 
     This endpoint is called BEFORE a tool is executed.
@@ -87,64 +104,56 @@ async def collect_pre_tool_use(
     - {"continue": {...}} - Allow with modified input
     - {"block": "reason"} - Block execution
     """
-    logger.debug(f"PreToolUse: session={payload.session_id}, tool={payload.tool_name}")
+    logger.debug("PreToolUse: session=%s, tool=%s", payload.session_id, payload.tool_name)
 
     # Ensure session exists
     _create_or_update_session(payload, db, request)
 
     # Create and enqueue event
-    event = Event.from_hook_payload(payload)
-    event.hook_type = "PreToolUse"
+    event = Event.from_hook_payload(payload, hook_type="PreToolUse")
 
     # Synchronously evaluate for blocking decision
     decision = await engine.evaluate_pre_tool(event)
 
-    # Save event regardless of decision
-    db.save_event(event)
-    db.increment_session_event_count(payload.session_id)
+    # Save and process the event regardless of decision
+    await engine.enqueue_persist(event)
 
-    # Queue for async processing
-    await engine.enqueue(event)
-
-    return decision.to_hook_response()
+    return ORJSONResponse(decision.to_hook_response())
 
 
 @router.post("/post-tool-use")
 async def collect_post_tool_use(
     payload: HookPayload,
     request: Request,
-    db: Database = Depends(get_database),
-    engine: Engine = Depends(get_engine),
-) -> dict[str, Any]:
+    db: Database = Depends(get_db),
+    engine: Engine = Depends(get_current_engine),
+) -> ORJSONResponse:
     """Collect post-tool-use event.
 
     This endpoint is called AFTER a tool is executed.
     Used for logging, analysis, and retroactive alerting.
     """
-    logger.debug(f"PostToolUse: session={payload.session_id}, tool={payload.tool_name}")
+    logger.debug("PostToolUse: session=%s, tool=%s", payload.session_id, payload.tool_name)
 
     # Ensure session exists
     _create_or_update_session(payload, db, request)
 
     # Create event with result
-    event = Event.from_hook_payload(payload)
-    event.hook_type = "PostToolUse"
+    event = Event.from_hook_payload(payload, hook_type="PostToolUse")
 
     # Save and queue for processing
-    db.save_event(event)
-    db.increment_session_event_count(payload.session_id)
-    await engine.enqueue(event)
+    await engine.enqueue_persist(event)
 
-    return {"status": "received"}
+    return ORJSONResponse({"status": "received"})
 
 
 @router.post("/session-start")
 async def collect_session_start(
     payload: HookPayload,
     request: Request,
-    db: Database = Depends(get_database),
-    engine: Engine = Depends(get_engine),
-) -> dict[str, Any]:
+    db: Database = Depends(get_db),
+    engine: Engine = Depends(get_current_engine),
+) -> ORJSONResponse:
     """Collect session start event.
 
     Called when a new Claude Code session begins.
@@ -152,62 +161,48 @@ async def collect_session_start(
     logger.info(f"SessionStart: {payload.session_id} in {payload.session_cwd}")
 
     # Create new session
-    hostname, user = _resolve_endpoint_fields(payload, request)
-    source = _resolve_session_source(payload, request)
-    session = Session(
-        session_id=payload.session_id,
-        cwd=payload.session_cwd,
-        parent_session_id=payload.parent_session_id,
-        started_at=payload.timestamp,
-        endpoint_hostname=hostname,
-        endpoint_user=user,
-        session_source=source,
-    )
-    db.save_session(session)
+    db.save_session(_session_from_payload(payload, request, started_at=payload.timestamp))
 
     # Create session start event
-    event = Event.from_hook_payload(payload)
-    event.hook_type = "SessionStart"
-    db.save_event(event)
-    db.increment_session_event_count(payload.session_id)
-    await engine.enqueue(event)
+    event = Event.from_hook_payload(payload, hook_type="SessionStart")
+    await engine.enqueue_persist(event)
 
-    return {"status": "session_started", "session_id": payload.session_id}
+    return ORJSONResponse({"status": "session_started", "session_id": payload.session_id})
 
 
 @router.post("/session-end")
 async def collect_session_end(
     payload: HookPayload,
     request: Request,
-    db: Database = Depends(get_database),
-    engine: Engine = Depends(get_engine),
-) -> dict[str, Any]:
+    db: Database = Depends(get_db),
+    engine: Engine = Depends(get_current_engine),
+) -> ORJSONResponse:
     """Collect session end event.
 
     Called when a Claude Code session ends.
     """
     logger.info(f"SessionEnd: {payload.session_id}")
 
+    # Ensure session exists
+    _create_or_update_session(payload, db, request)
+
     # Update session status
     db.end_session(payload.session_id)
 
     # Create session end event
-    event = Event.from_hook_payload(payload)
-    event.hook_type = "SessionEnd"
-    db.save_event(event)
-    db.increment_session_event_count(payload.session_id)
-    await engine.enqueue(event)
+    event = Event.from_hook_payload(payload, hook_type="SessionEnd")
+    await engine.enqueue_persist(event)
 
-    return {"status": "session_ended", "session_id": payload.session_id}
+    return ORJSONResponse({"status": "session_ended", "session_id": payload.session_id})
 
 
 @router.post("/subagent-start")
 async def collect_subagent_start(
     payload: HookPayload,
     request: Request,
-    db: Database = Depends(get_database),
-    engine: Engine = Depends(get_engine),
-) -> dict[str, Any]:
+    db: Database = Depends(get_db),
+    engine: Engine = Depends(get_current_engine),
+) -> ORJSONResponse:
     """Collect subagent start event.
 
     Called when a subagent is spawned from a parent session.
@@ -217,126 +212,103 @@ async def collect_subagent_start(
     )
 
     # Create new session for subagent
-    hostname, user = _resolve_endpoint_fields(payload, request)
-    source = _resolve_session_source(payload, request)
-    session = Session(
-        session_id=payload.session_id,
-        cwd=payload.session_cwd,
-        parent_session_id=payload.parent_session_id,
-        started_at=payload.timestamp,
-        endpoint_hostname=hostname,
-        endpoint_user=user,
-        session_source=source,
-    )
-    db.save_session(session)
+    db.save_session(_session_from_payload(payload, request, started_at=payload.timestamp))
 
     # Create subagent start event
-    event = Event.from_hook_payload(payload)
-    event.hook_type = "SubagentStart"
-    db.save_event(event)
-    db.increment_session_event_count(payload.session_id)
-    await engine.enqueue(event)
+    event = Event.from_hook_payload(payload, hook_type="SubagentStart")
+    await engine.enqueue_persist(event)
 
-    return {
+    return ORJSONResponse({
         "status": "subagent_started",
         "session_id": payload.session_id,
         "parent_session_id": payload.parent_session_id,
-    }
+    })
 
 
 @router.post("/post-tool-use-error")
 async def collect_post_tool_use_error(
     payload: HookPayload,
     request: Request,
-    db: Database = Depends(get_database),
-    engine: Engine = Depends(get_engine),
-) -> dict[str, Any]:
+    db: Database = Depends(get_db),
+    engine: Engine = Depends(get_current_engine),
+) -> ORJSONResponse:
     """Collect post-tool-use-error event.
 
     Called when a tool execution fails.
     """
-    logger.debug(f"PostToolUseError: session={payload.session_id}, tool={payload.tool_name}")
+    logger.debug("PostToolUseError: session=%s, tool=%s", payload.session_id, payload.tool_name)
 
     # Ensure session exists
     _create_or_update_session(payload, db, request)
 
     # Create event with error info
-    event = Event.from_hook_payload(payload)
-    event.hook_type = "PostToolUseFailure"
+    event = Event.from_hook_payload(payload, hook_type="PostToolUseFailure")
 
     # Save and queue for processing
-    db.save_event(event)
-    db.increment_session_event_count(payload.session_id)
-    await engine.enqueue(event)
+    await engine.enqueue_persist(event)
 
-    return {"status": "received"}
+    return ORJSONResponse({"status": "received"})
 
 
 @router.post("/permission-request")
 async def collect_permission_request(
     payload: HookPayload,
     request: Request,
-    db: Database = Depends(get_database),
-    engine: Engine = Depends(get_engine),
-) -> dict[str, Any]:
+    db: Database = Depends(get_db),
+    engine: Engine = Depends(get_current_engine),
+) -> ORJSONResponse:
     """Collect permission request event.
 
     Called when Claude Code prompts the user for permission.
     Tracks approve/deny decisions for rubber-stamping detection.
     """
-    logger.debug(f"PermissionRequest: session={payload.session_id}, tool={payload.tool_name}")
+    logger.debug("PermissionRequest: session=%s, tool=%s", payload.session_id, payload.tool_name)
 
     # Ensure session exists
     _create_or_update_session(payload, db, request)
 
     # Create event
-    event = Event.from_hook_payload(payload)
-    event.hook_type = "PermissionRequest"
+    event = Event.from_hook_payload(payload, hook_type="PermissionRequest")
 
     # Save and queue for processing
-    db.save_event(event)
-    db.increment_session_event_count(payload.session_id)
-    await engine.enqueue(event)
+    await engine.enqueue_persist(event)
 
-    return {"status": "received"}
+    return ORJSONResponse({"status": "received"})
 
 
 @router.post("/user-prompt-submit")
 async def collect_user_prompt_submit(
     payload: HookPayload,
     request: Request,
-    db: Database = Depends(get_database),
-    engine: Engine = Depends(get_engine),
-) -> dict[str, Any]:
+    db: Database = Depends(get_db),
+    engine: Engine = Depends(get_current_engine),
+) -> ORJSONResponse:
     """Collect user prompt submit event.
 
     Called when a user submits a prompt to Claude Code.
     Used for audit trail and prompt injection detection.
     """
-    logger.debug(f"UserPromptSubmit: session={payload.session_id}")
+    logger.debug("UserPromptSubmit: session=%s", payload.session_id)
 
     # Ensure session exists
     _create_or_update_session(payload, db, request)
 
     # Create event
-    event = Event.from_hook_payload(payload)
-    event.hook_type = "UserPromptSubmit"
+    event = Event.from_hook_payload(payload, hook_type="UserPromptSubmit")
 
     # Save and queue for processing
-    db.save_event(event)
-    db.increment_session_event_count(payload.session_id)
-    await engine.enqueue(event)
+    await engine.enqueue_persist(event)
 
-    return {"status": "received"}
+    return ORJSONResponse({"status": "received"})
 
 
 @router.post("/subagent-stop")
 async def collect_subagent_stop(
     payload: HookPayload,
     request: Request,
-    db: Database = Depends(get_database),
-    engine: Engine = Depends(get_engine),
-) -> dict[str, Any]:
+    db: Database = Depends(get_db),
+    engine: Engine = Depends(get_current_engine),
+) -> ORJSONResponse:
     """Collect subagent stop event.
 
     Called when a subagent completes its task.
@@ -344,23 +316,23 @@ async def collect_subagent_stop(
     """
     logger.info(f"SubagentStop: {payload.session_id}")
 
+    # Ensure session exists
+    _create_or_update_session(payload, db, request)
+
     # End the subagent session
     db.end_session(payload.session_id)
 
     # Create subagent stop event
-    event = Event.from_hook_payload(payload)
-    event.hook_type = "SubagentStop"
-    db.save_event(event)
-    db.increment_session_event_count(payload.session_id)
-    await engine.enqueue(event)
+    event = Event.from_hook_payload(payload, hook_type="SubagentStop")
+    await engine.enqueue_persist(event)
 
-    return {
+    return ORJSONResponse({
         "status": "subagent_stopped",
         "session_id": payload.session_id,
-    }
+    })
 
 
 @router.get("/health")
-async def health_check() -> dict[str, str]:
+async def health_check() -> ORJSONResponse:
     """Health check endpoint for the collector."""
-    return {"status": "healthy", "service": "collector"}
+    return ORJSONResponse({"status": "healthy", "service": "collector"})
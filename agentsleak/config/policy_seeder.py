@@ -43,7 +43,7 @@ ACTION_MAP: dict[str, PolicyAction] = {
 }
 
 # Rules to skip — they require runtime context or threshold logic not supported by simple policies
-SKIP_RULES = {"SCOPE-001", "ENUM-001"}
+SKIP_RULES = frozenset({"SCOPE-001", "ENUM-001"})
 
 
 def _resolve_categories(category_spec: str | dict) -> list[EventCategory]:
@@ -61,13 +61,25 @@ class Settings(BaseModel):
     # Processing settings
     batch_size: int = Field(
         default=100,
-        description="Number of events to process in a batch",
+        description="Maximum number of collected events saved in one transaction",
     )
     process_interval: float = Field(
         default=0.1,
         description="Interval between processing batches (seconds)",
     )
 
+    # Concurrency settings
+    threadpool_size: int = Field(
+        default=100,
+        ge=1,
+        description="Worker threads available to sync route handlers",
+    )
+    db_pool_size: int = Field(
+        default=8,
+        ge=1,
+        description="Maximum pooled SQLite connections used by worker threads",
+    )
+
     # CORS settings
     cors_origins: list[str] = Field(
         default_factory=lambda: _get_cors_origins(),
@@ -107,6 +119,8 @@ class Settings(BaseModel):
             "AGENTSLEAK_PORT": ("port", int),
             "AGENTSLEAK_RULES_PATH": ("rules_path", Path),
             "AGENTSLEAK_LOG_LEVEL": ("log_level", str),
+            "AGENTSLEAK_THREADPOOL_SIZE": ("threadpool_size", int),
+            "AGENTSLEAK_DB_POOL_SIZE": ("db_pool_size", int),
             "AGENTSLEAK_DASHBOARD_TOKEN": ("dashboard_token", str),
             "ANTHROPIC_API_KEY": ("anthropic_api_key", str),
         }
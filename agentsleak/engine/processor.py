@@ -6,6 +6,7 @@ import asyncio
 import logging
 import re
 from typing import Any, ClassVar
+from uuid import UUID
 
 from agentsleak.config.settings import Settings, get_settings
 from agentsleak.engine.classifier import (
@@ -47,8 +48,11 @@ class Engine:
         self.settings = settings or get_settings()
         self._database = database
         self._event_queue: asyncio.Queue[Event] = asyncio.Queue()
+        # Collected events waiting for their first (batched) write
+        self._persist_queue: asyncio.Queue[Event] = asyncio.Queue()
         self._running = False
         self._task: asyncio.Task[None] | None = None
+        self._writer_task: asyncio.Task[None] | None = None
         self._policies: list[Policy] = []
         self._sequence_tracker = SequenceTracker()
 
@@ -71,18 +75,22 @@ class Engine:
 
         self._running = True
         self._load_policies()
+        self._writer_task = asyncio.create_task(self._persist_loop())
         self._task = asyncio.create_task(self._process_loop())
         logger.info("Engine processing loop started")
 
     async def stop(self) -> None:
         """Stop the processing loop."""
         self._running = False
-        if self._task:
-            self._task.cancel()
-            try:
-                await self._task
-            except asyncio.CancelledError:
-                pass
+        for task in (self._writer_task, self._task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        # Keep events that were collected but not yet written
+        self._write_batch(self._drain_persist_queue(self._persist_queue.qsize()))
         logger.info("Engine processing loop stopped")
 
     def _load_policies(self) -> None:
@@ -101,6 +109,28 @@ class Engine:
         """Reload policies and sequence rules."""
         self._load_policies()
 
+    # The policy list is swapped rather than mutated so evaluation loops that
+    # are suspended on an await keep iterating a consistent snapshot.
+
+    def add_policy(self, policy: Policy) -> None:
+        """Start evaluating a newly created policy, if it is enabled."""
+        if policy.enabled:
+            self._policies = [*self._policies, policy]
+
+    def replace_policy(self, policy: Policy) -> None:
+        """Swap in an updated policy, dropping it if it is now disabled."""
+        if not policy.enabled:
+            self.remove_policy(policy.id)
+            return
+        policies = [policy if p.id == policy.id else p for p in self._policies]
+        if not any(p.id == policy.id for p in self._policies):
+            policies.append(policy)
+        self._policies = policies
+
+    def remove_policy(self, policy_id: UUID) -> None:
+        """Stop evaluating a deleted policy."""
+        self._policies = [p for p in self._policies if p.id != policy_id]
+
     async def enqueue(self, event: Event) -> None:
         """Add an event to the processing queue.
 
@@ -109,6 +139,78 @@ class Engine:
         """
         await self._event_queue.put(event)
 
+    async def enqueue_persist(self, event: Event) -> None:
+        """Queue a collected event to be saved, then processed.
+
+        The writer task saves queued events in batches, one transaction per
+        batch, and only then hands them to the processing queue, so the
+        processed copy always overwrites the raw one.
+
+        Args:
+            event: The collected event
+        """
+        await self._persist_queue.put(event)
+
+    async def _persist_loop(self) -> None:
+        """Background task that saves collected events in batches."""
+        while self._running:
+            try:
+                try:
+                    first = await asyncio.wait_for(
+                        self._persist_queue.get(),
+                        timeout=self.settings.process_interval,
+                    )
+                except TimeoutError:
+                    continue
+
+                # Whatever queued up behind the first event joins its batch;
+                # an idle collector writes each event without waiting
+                batch = [first, *self._drain_persist_queue(self.settings.batch_size - 1)]
+                self._write_batch(batch)
+                for event in batch:
+                    self._event_queue.put_nowait(event)
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.exception(f"Error persisting events: {e}")
+
+    def _drain_persist_queue(self, limit: int) -> list[Event]:
+        """Take up to limit already-queued events without waiting."""
+        events: list[Event] = []
+        while len(events) < limit and not self._persist_queue.empty():
+            events.append(self._persist_queue.get_nowait())
+        return events
+
+    def _write_batch(self, events: list[Event]) -> None:
+        """Save collected events in one transaction.
+
+        If the batch fails, each session's events are retried on their own,
+        so one bad row (such as an event for a session that was never saved)
+        does not roll back everyone else's.
+        """
+        try:
+            self.database.record_events(events)
+            return
+        except Exception as e:
+            if len({event.session_id for event in events}) == 1:
+                # The processing loop saves each event again once it is handled
+                logger.exception(f"Failed to save {len(events)} collected events: {e}")
+                return
+            logger.warning(f"Failed to save {len(events)} collected events, retrying per session: {e}")
+
+        by_session: dict[str, list[Event]] = {}
+        for event in events:
+            by_session.setdefault(event.session_id, []).append(event)
+        for session_id, session_events in by_session.items():
+            try:
+                self.database.record_events(session_events)
+            except Exception as e:
+                logger.exception(
+                    f"Failed to save {len(session_events)} collected events "
+                    f"for session {session_id}: {e}"
+                )
+
     async def _process_loop(self) -> None:
         """Background task that processes events from the queue."""
         while self._running:
@@ -154,22 +256,26 @@ class Engine:
             # Update session risk score
             self._update_risk_score(event)
 
-            # Build graph from enriched event
-            self._build_graph(event)
+            # Build graph from enriched event and store the processed event
+            # in one transaction, so the graph upserts commit once
+            with self.database.transaction():
+                self._build_graph(event)
 
-            # Mark as processed
-            event.processed = True
-            event.enriched = True
+                # Mark as processed
+                event.processed = True
+                event.enriched = True
 
-            # Update in database
-            self.database.save_event(event)
+                # Update in database
+                self.database.save_event(event)
 
             # Broadcast event via WebSocket
             await self._broadcast_event(event)
 
             logger.debug(
-                f"Processed event: {event.id} "
-                f"(category={event.category.value}, severity={event.severity.value})"
+                "Processed event: %s (category=%s, severity=%s)",
+                event.id,
+                event.category.value,
+                event.severity.value,
             )
 
         except Exception as e:
@@ -220,12 +326,15 @@ class Engine:
         self.enrich(event)
         self.classify(event)
 
-        # Check blocking policies
+        # Check blocking policies; the matching view of the event is built
+        # once, and only if there is a blocking policy to check
+        event_data: dict[str, Any] | None = None
         for policy in self._policies:
             if policy.action != PolicyAction.BLOCK:
                 continue
 
-            event_data = self._event_to_dict(event)
+            if event_data is None:
+                event_data = self._event_to_dict(event)
             if policy.matches(event_data):
                 # Create alert for blocked action
                 alert = Alert(
@@ -33,6 +33,19 @@ class SequenceStep:
     field_patterns: dict[str, str] = field(default_factory=dict)
     # field_patterns maps dot-notation fields to regex patterns
     # e.g. {"tool_input.command": r"curl.*-d"}
+    # Compiled once here; None marks an invalid pattern, which never matches
+    compiled_patterns: list[tuple[str, re.Pattern[str] | None]] = field(
+        init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        self.compiled_patterns = []
+        for field_path, pattern in self.field_patterns.items():
+            try:
+                compiled = re.compile(pattern, re.IGNORECASE)
+            except re.error:
+                compiled = None
+            self.compiled_patterns.append((field_path, compiled))
 
 
 @dataclass
@@ -182,14 +195,11 @@ class SequenceTracker:
                 return False
 
         # Check field patterns
-        for field_path, pattern in step.field_patterns.items():
+        for field_path, pattern in step.compiled_patterns:
             field_value = self._get_nested(event_data, field_path)
-            if field_value is None:
+            if field_value is None or pattern is None:
                 return False
-            try:
-                if not re.search(pattern, str(field_value), re.IGNORECASE):
-                    return False
-            except re.error:
+            if pattern.search(str(field_value)) is None:
                 return False
 
         return True
@@ -5,6 +5,8 @@ These models represent security alerts and policies for detection.
 
 from __future__ import annotations
 
+import functools
+import re
 from datetime import UTC, datetime
 from enum import StrEnum
 from typing import Any
@@ -108,6 +110,15 @@ class ConditionOperator(StrEnum):
     NOT_IN = "not_in"
 
 
+@functools.lru_cache(maxsize=2048)
+def _compile_regex(pattern: str, case_sensitive: bool) -> re.Pattern[str] | None:
+    """Compile a condition's regex once per pattern; None if it is invalid."""
+    try:
+        return re.compile(pattern, 0 if case_sensitive else re.IGNORECASE)
+    except re.error:
+        return None
+
+
 class RuleCondition(BaseModel):
     """A condition for a policy rule."""
 
@@ -144,21 +155,15 @@ class RuleCondition(BaseModel):
             case ConditionOperator.ENDS_WITH:
                 return str(field_value).endswith(str(compare_value))
             case ConditionOperator.MATCHES:
-                import re
-
-                try:
-                    flags = re.IGNORECASE if not self.case_sensitive else 0
-                    return bool(re.search(str(self.value), str(field_value), flags))
-                except re.error:
+                pattern = _compile_regex(str(self.value), self.case_sensitive)
+                if pattern is None:
                     return False
+                return pattern.search(str(field_value)) is not None
             case ConditionOperator.NOT_MATCHES:
-                import re
-
-                try:
-                    flags = re.IGNORECASE if not self.case_sensitive else 0
-                    return not bool(re.search(str(self.value), str(field_value), flags))
-                except re.error:
+                pattern = _compile_regex(str(self.value), self.case_sensitive)
+                if pattern is None:
                     return False
+                return pattern.search(str(field_value)) is None
             case ConditionOperator.GREATER_THAN:
                 return field_value > compare_value
             case ConditionOperator.LESS_THAN:
@@ -231,8 +236,9 @@ class Policy(BaseModel):
 
         # Check category
         if self.categories:
-            event_category = event_data.get("category")
-            if event_category not in [c.value for c in self.categories]:
+            # EventCategory is a StrEnum, so members compare equal to the
+            # category string without building a list of values per call
+            if event_data.get("category") not in self.categories:
                 return False
 
         # Check tool name
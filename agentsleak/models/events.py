@@ -226,12 +226,16 @@ class Event(BaseModel):
     model_config = {"from_attributes": True}
 
     @classmethod
-    def from_hook_payload(cls, payload: HookPayload) -> Event:
-        """Create an Event from a HookPayload."""
+    def from_hook_payload(cls, payload: HookPayload, hook_type: str | None = None) -> Event:
+        """Create an Event from a HookPayload.
+
+        hook_type overrides the payload's own, which is optional for hooks
+        whose type is implied by the collector endpoint.
+        """
         return cls(
             session_id=payload.session_id,
             timestamp=payload.timestamp,
-            hook_type=payload.hook_type,
+            hook_type=hook_type or payload.hook_type,
             tool_name=payload.tool_name,
             tool_input=payload.tool_input,
             tool_result=payload.tool_result,
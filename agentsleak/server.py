@@ -10,11 +10,14 @@ from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI, HTTPException, Request
+import anyio.to_thread
+from fastapi import FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers, QueryParams
+from starlette.types import ASGIApp, Receive, Scope, Send
+from starlette.websockets import WebSocketClose
 
 from agentsleak.api import (
     alerts_router,
@@ -42,10 +45,16 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     """
     settings = get_settings()
 
+    # Sync handlers and dependencies run in AnyIO's default thread pool,
+    # which is capped at 40 threads; size it for concurrent DB requests
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = settings.threadpool_size
+
     # Initialize database
     logger.info(f"Initializing database at {settings.db_path}")
     database = Database(settings)
     set_database(database)
+    app.state.db = database
 
     # Seed default detection policies
     from agentsleak.config.policy_seeder import seed_default_policies
@@ -86,7 +95,7 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     database.close()
 
 
-class ApiKeyAuthMiddleware(BaseHTTPMiddleware):
+class ApiKeyAuthMiddleware:
     """Authentication middleware for AgentsLeak.
 
     Two independent auth mechanisms:
@@ -95,26 +104,37 @@ class ApiKeyAuthMiddleware(BaseHTTPMiddleware):
     2. Dashboard auth: AGENTSLEAK_DASHBOARD_TOKEN protects all other /api/*
        routes via Authorization: Bearer <token> header. WebSocket connections
        pass the token as a ?token= query parameter.
+
+    Implemented as a plain ASGI middleware rather than BaseHTTPMiddleware so
+    requests are not re-wrapped in a task group and memory streams on every
+    call, and so WebSocket scopes are checked too.
     """
 
-    async def dispatch(self, request: Request, call_next):
-        path = request.url.path
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
 
         # --- Collector auth (hook endpoints) ---
         api_key = os.environ.get("AGENTSLEAK_API_KEY")
         if api_key and path.startswith("/api/collect/"):
-            provided_key = request.headers.get("X-AgentsLeak-Key")
+            provided_key = Headers(scope=scope).get("X-AgentsLeak-Key")
             if not provided_key or not hmac.compare_digest(provided_key, api_key):
-                return JSONResponse(
-                    status_code=401,
-                    content={"detail": "Invalid or missing API key"},
-                )
-            return await call_next(request)
+                await self._reject(scope, receive, send, "Invalid or missing API key")
+                return
+            await self.app(scope, receive, send)
+            return
 
         # --- Dashboard auth (API + WebSocket) ---
         dashboard_token = os.environ.get("AGENTSLEAK_DASHBOARD_TOKEN")
         if not dashboard_token:
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
 
         # Skip auth for: health endpoint, collector routes, static assets, SPA
         if (
@@ -123,32 +143,43 @@ class ApiKeyAuthMiddleware(BaseHTTPMiddleware):
             or path.startswith("/assets/")
             or not path.startswith("/api/")
         ):
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
 
         # WebSocket: check ?token= query param
         if path == "/api/ws":
-            token = request.query_params.get("token")
+            token = QueryParams(scope["query_string"]).get("token")
             if not token or not hmac.compare_digest(token, dashboard_token):
-                return JSONResponse(
-                    status_code=401,
-                    content={"detail": "Invalid or missing dashboard token"},
+                await self._reject(
+                    scope, receive, send, "Invalid or missing dashboard token"
                 )
-            return await call_next(request)
+                return
+            await self.app(scope, receive, send)
+            return
 
         # Regular API: check Authorization: Bearer <token>
-        auth_header = request.headers.get("Authorization", "")
+        auth_header = Headers(scope=scope).get("Authorization", "")
         if auth_header.startswith("Bearer "):
             provided_token = auth_header[7:]
         else:
             provided_token = ""
 
         if not provided_token or not hmac.compare_digest(provided_token, dashboard_token):
-            return JSONResponse(
-                status_code=401,
-                content={"detail": "Invalid or missing dashboard token"},
-            )
+            await self._reject(scope, receive, send, "Invalid or missing dashboard token")
+            return
 
-        return await call_next(request)
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _reject(scope: Scope, receive: Receive, send: Send, detail: str) -> None:
+        """Send a 401 response, or close the connection for WebSockets."""
+        if scope["type"] == "websocket":
+            await WebSocketClose(code=status.WS_1008_POLICY_VIOLATION)(
+                scope, receive, send
+            )
+            return
+        response = JSONResponse(status_code=401, content={"detail": detail})
+        await response(scope, receive, send)
 
 
 def create_app(settings: Settings | None = None) -> FastAPI:
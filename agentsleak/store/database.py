@@ -2,12 +2,18 @@
 
 from __future__ import annotations
 
+import functools
 import json
+import queue
 import sqlite3
-from collections.abc import Iterator
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Callable, Iterator
 from contextlib import contextmanager
 from datetime import UTC, datetime, timedelta
-from typing import Any
+from typing import Any, TypedDict, overload
 from uuid import UUID
 
 from agentsleak.config.settings import Settings, get_settings
@@ -31,6 +37,52 @@ def _deserialize_json(value: str | None) -> Any:
     return json.loads(value)
 
 
+def _to_utc(value: datetime) -> datetime:
+    """Return value as an aware UTC datetime, treating naive values as UTC."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=UTC)
+    return value.astimezone(UTC)
+
+
+@overload
+def _dt_to_str(value: datetime) -> str: ...
+
+
+@overload
+def _dt_to_str(value: None) -> None: ...
+
+
+def _dt_to_str(value: datetime | None) -> str | None:
+    """Convert a datetime to the stored form: ISO 8601 in UTC with +00:00.
+
+    Keeping a single offset makes stored timestamps sort lexicographically,
+    so range filters can compare the text columns directly.
+    """
+    if value is None:
+        return None
+    return _to_utc(value).isoformat()
+
+
+def _str_to_dt(value: str) -> datetime:
+    """Parse a stored timestamp, including legacy naive rows, as aware UTC."""
+    return _to_utc(datetime.fromisoformat(value))
+
+
+@overload
+def _intern(value: str) -> str: ...
+
+
+@overload
+def _intern(value: None) -> None: ...
+
+
+def _intern(value: str | None) -> str | None:
+    """Share one string object per distinct value of a low-cardinality column."""
+    if value is None:
+        return None
+    return sys.intern(value)
+
+
 def _uuid_to_str(value: UUID | str | None) -> str | None:
     """Convert UUID to string."""
     if value is None:
@@ -38,6 +90,136 @@ def _uuid_to_str(value: UUID | str | None) -> str | None:
     return str(value)
 
 
+_EVENT_INSERT_SQL = """
+    INSERT OR REPLACE INTO events (
+        id, session_id, timestamp, hook_type, tool_name,
+        tool_input, tool_result, category, severity,
+        file_paths, commands, urls, ip_addresses,
+        processed, enriched, raw_payload
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _event_params(event: Event) -> tuple[Any, ...]:
+    """Column values for _EVENT_INSERT_SQL."""
+    return (
+        _uuid_to_str(event.id),
+        event.session_id,
+        _dt_to_str(event.timestamp),
+        event.hook_type,
+        event.tool_name,
+        _serialize_json(event.tool_input),
+        _serialize_json(event.tool_result),
+        event.category.value,
+        event.severity.value,
+        _serialize_json(event.file_paths),
+        _serialize_json(event.commands),
+        _serialize_json(event.urls),
+        _serialize_json(event.ip_addresses),
+        1 if event.processed else 0,
+        1 if event.enriched else 0,
+        _serialize_json(event.raw_payload),
+    )
+
+
+# WHERE clauses for get_alerts_paginated, in bind order. A query's filter
+# mask has bit i set when clause i is present.
+_ALERT_FILTER_CLAUSES = (
+    " AND status = ?",
+    " AND severity = ?",
+    " AND policy_id = ?",
+    " AND session_id = ?",
+    " AND created_at >= ?",
+    " AND created_at <= ?",
+    " AND blocked = ?",
+    " AND EXISTS (SELECT 1 FROM sessions WHERE sessions.session_id = alerts.session_id"
+    " AND sessions.endpoint_hostname = ?)",
+)
+
+
+@functools.cache
+def _alerts_page_sql(filter_mask: int) -> tuple[str, str]:
+    """Return the (count, page) SQL for a combination of alert filters.
+
+    Building the text once per combination keeps it byte-identical across
+    calls, so sqlite3's per-connection statement cache reuses the prepared
+    statement instead of parsing and planning it again.
+    """
+    where = "".join(
+        clause
+        for bit, clause in enumerate(_ALERT_FILTER_CLAUSES)
+        if filter_mask & (1 << bit)
+    )
+    return (
+        f"SELECT COUNT(*) FROM alerts WHERE 1=1{where}",
+        f"SELECT * FROM alerts WHERE 1=1{where} ORDER BY created_at DESC LIMIT ? OFFSET ?",
+    )
+
+
+class _TTLCache:
+    """Small thread-safe LRU cache whose entries expire after a fixed time-to-live."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        """Counter bumped on every invalidation."""
+        return self._generation
+
+    def get(self, key: Any) -> Any:
+        """Return the cached value for key, or None if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Any, value: Any, generation: int | None = None) -> None:
+        """Store a value, evicting the least recently used entry if full.
+
+        If generation is given and an invalidation happened since it was
+        read, the value may be stale and is not stored.
+        """
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Any) -> None:
+        """Drop a single entry if present."""
+        with self._lock:
+            self._generation += 1
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+
+class SessionEndpoint(TypedDict):
+    """Endpoint identity of one session, as returned by get_session_endpoints."""
+
+    session_id: str
+    endpoint_hostname: str
+    endpoint_user: str | None
+    session_source: str
+
+
 class Database:
     """SQLite database manager for AgentsLeak."""
 
@@ -56,23 +238,81 @@ class Database:
         # Ensure directory exists
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
 
-        # Initialize connection
+        # Read-through caches for hot single-row lookups; write paths invalidate
+        self._policy_cache = _TTLCache(maxsize=1024, ttl=60)
+        self._session_cache = _TTLCache(maxsize=8192, ttl=60)
+        # Session IDs known to exist. Sessions are never deleted, so unlike
+        # _session_cache this survives the per-event counter updates
+        self._known_sessions = _TTLCache(maxsize=10_000, ttl=3600)
+        # Rendered graph API responses, keyed by the API layer; any graph
+        # write clears it once committed
+        self.graph_cache = _TTLCache(maxsize=128, ttl=10)
+        # Rendered policy list responses; policy writes and new alerts (which
+        # change hit counts) clear it once committed
+        self.policy_list_cache = _TTLCache(maxsize=4, ttl=60)
+        # Rendered stats responses, keyed by the API layer. They aggregate
+        # every table, so entries simply expire rather than track each write
+        self.stats_cache = _TTLCache(maxsize=64, ttl=10)
+        # Distinct endpoint count for the dashboard; it only grows when a
+        # session from a new host is saved, which clears it
+        self._endpoint_count_cache = _TTLCache(maxsize=1, ttl=60)
+
+        # Initialize connections. The thread that creates the Database (the
+        # event loop in the server) and in-memory databases use the primary
+        # connection; other threads borrow from a bounded pool so WAL readers
+        # can run alongside the writer
         self._connection: sqlite3.Connection | None = None
+        self._lock = threading.RLock()
+        self._owner_thread = threading.get_ident()
+        self._local = threading.local()
+        self._shared = str(self.db_path) == ":memory:"
+        self._pool: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._pooled: list[sqlite3.Connection] = []
+        self._pool_lock = threading.Lock()
         self._init_schema()
 
+    def _connect(self) -> sqlite3.Connection:
+        """Open and configure a new SQLite connection."""
+        connection = sqlite3.connect(
+            str(self.db_path),
+            check_same_thread=False,
+            # Wait for a concurrent writer instead of failing with SQLITE_BUSY
+            timeout=5.0,
+            # Room for the fixed query templates alongside the one-off
+            # IN (...) lists, which are keyed by their placeholder count
+            cached_statements=512,
+        )
+        connection.row_factory = sqlite3.Row
+        if not self._shared:
+            # Enable WAL mode for better concurrent access; NORMAL sync is
+            # durable under WAL except for the last commits on power loss
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            # Truncate the WAL back to 64 MiB after checkpoints instead of
+            # leaving it at its high-water mark after an ingest burst
+            connection.execute("PRAGMA journal_size_limit=67108864")
+            # Read pages through a 256 MiB memory map instead of the pager
+            connection.execute("PRAGMA mmap_size=268435456")
+        # Keep temp b-trees in memory; the page cache is per connection, and
+        # mmap'd reads are shared through the OS cache, so keep it modest
+        connection.execute("PRAGMA temp_store=MEMORY")
+        connection.execute("PRAGMA cache_size=-16384")
+        # Enable foreign keys
+        connection.execute("PRAGMA foreign_keys = ON")
+        return connection
+
     @property
     def connection(self) -> sqlite3.Connection:
-        """Get or create database connection."""
+        """Get the connection for the calling thread.
+
+        Inside ``transaction()`` this is the connection the transaction
+        holds; otherwise it is the primary connection.
+        """
+        held = getattr(self._local, "connection", None)
+        if held is not None:
+            return held
         if self._connection is None:
-            self._connection = sqlite3.connect(
-                str(self.db_path),
-                check_same_thread=False,
-            )
-            self._connection.row_factory = sqlite3.Row
-            # Enable WAL mode for better concurrent access
-            self._connection.execute("PRAGMA journal_mode=WAL")
-            # Enable foreign keys
-            self._connection.execute("PRAGMA foreign_keys = ON")
+            self._connection = self._connect()
         return self._connection
 
     def _init_schema(self) -> None:
@@ -81,6 +321,11 @@ class Database:
             cursor.executescript(SCHEMA_SQL)
         # Run idempotent migrations
         self._run_migrations()
+        # Refresh planner statistics; analysis_limit bounds the rows sampled
+        # per index so this stays fast on large databases
+        self.connection.execute("PRAGMA analysis_limit=1000")
+        self.connection.execute("ANALYZE")
+        self.connection.commit()
 
     def _run_migrations(self) -> None:
         """Run schema migrations (safe to call multiple times)."""
@@ -89,6 +334,13 @@ class Database:
             "ALTER TABLE sessions ADD COLUMN endpoint_hostname TEXT",
             "ALTER TABLE sessions ADD COLUMN endpoint_user TEXT",
             "ALTER TABLE sessions ADD COLUMN session_source TEXT",
+            # Indexes on migrated columns must be created after the columns exist
+            "CREATE INDEX IF NOT EXISTS idx_sessions_endpoint_hostname ON sessions(endpoint_hostname)",
+            # Superseded by the (column, created_at DESC) composite indexes
+            "DROP INDEX IF EXISTS idx_alerts_session_id",
+            "DROP INDEX IF EXISTS idx_alerts_status",
+            "DROP INDEX IF EXISTS idx_alerts_policy_id",
+            "DROP INDEX IF EXISTS idx_events_session_id",
         ]
         for sql in migrations:
             try:
@@ -98,24 +350,107 @@ class Database:
                 # Column already exists — expected
                 pass
 
+    def _acquire_pooled(self) -> sqlite3.Connection:
+        """Take an idle pooled connection, opening one if under the limit."""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._pool_lock:
+            if len(self._pooled) < self.settings.db_pool_size:
+                connection = self._connect()
+                self._pooled.append(connection)
+                return connection
+        return self._pool.get()
+
     @contextmanager
-    def transaction(self) -> Iterator[sqlite3.Cursor]:
-        """Context manager for database transactions."""
-        cursor = self.connection.cursor()
+    def _hold_connection(self) -> Iterator[sqlite3.Connection]:
+        """Hold a connection for the calling thread until the block exits."""
+        held = getattr(self._local, "connection", None)
+        if held is not None:
+            # Nested transaction on this thread
+            yield held
+            return
+
+        if self._shared or threading.get_ident() == self._owner_thread:
+            with self._lock:
+                self._local.connection = self.connection
+                try:
+                    yield self._local.connection
+                finally:
+                    self._local.connection = None
+            return
+
+        connection = self._acquire_pooled()
+        self._local.connection = connection
         try:
-            yield cursor
-            self.connection.commit()
-        except Exception:
-            self.connection.rollback()
-            raise
+            yield connection
         finally:
-            cursor.close()
+            self._local.connection = None
+            self._pool.put(connection)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Cursor]:
+        """Context manager for database transactions.
+
+        Transactions opened inside another on the same thread join it, so
+        a group of writes wrapped in one outer block commits once. Cache
+        invalidations registered with _after_commit wait for that outer
+        commit and are dropped if it rolls back.
+        """
+        nested = getattr(self._local, "connection", None) is not None
+        callbacks: list[Callable[[], None]] = []
+        with self._hold_connection() as connection:
+            cursor = connection.cursor()
+            if not nested:
+                self._local.after_commit = callbacks
+            try:
+                yield cursor
+                if not nested:
+                    connection.commit()
+            except Exception:
+                if not nested:
+                    connection.rollback()
+                raise
+            finally:
+                cursor.close()
+                if not nested:
+                    self._local.after_commit = None
+        if not nested:
+            for callback in callbacks:
+                callback()
+
+    def _after_commit(self, callback: Callable[[], None]) -> None:
+        """Run callback once the calling thread's open transaction commits.
+
+        Outside a transaction the callback runs immediately.
+        """
+        pending = getattr(self._local, "after_commit", None)
+        if pending is None:
+            callback()
+        else:
+            pending.append(callback)
 
     def close(self) -> None:
-        """Close database connection."""
+        """Close database connections."""
         if self._connection is not None:
             self._connection.close()
             self._connection = None
+        with self._pool_lock:
+            for connection in self._pooled:
+                connection.close()
+            self._pooled.clear()
+            self._pool = queue.LifoQueue()
+
+    def clear_caches(self) -> None:
+        """Drop all cached policy and session lookups and rendered responses."""
+        self._policy_cache.clear()
+        self._session_cache.clear()
+        self._known_sessions.clear()
+        self.graph_cache.clear()
+        self.policy_list_cache.clear()
+        self.stats_cache.clear()
+        self._endpoint_count_cache.clear()
 
     # =========================================================================
     # Session Operations
@@ -140,8 +475,8 @@ class Database:
                 (
                     _uuid_to_str(session.id),
                     session.session_id,
-                    session.started_at.isoformat(),
-                    session.ended_at.isoformat() if session.ended_at else None,
+                    _dt_to_str(session.started_at),
+                    _dt_to_str(session.ended_at),
                     session.cwd,
                     session.parent_session_id,
                     session.event_count,
@@ -152,9 +487,31 @@ class Database:
                     session.session_source,
                 ),
             )
+            if session.endpoint_hostname is not None:
+                self._after_commit(self._endpoint_count_cache.clear)
+            self._after_commit(
+                functools.partial(self._known_sessions.set, session.session_id, True)
+            )
+            self._after_commit(functools.partial(self._session_cache.pop, session.session_id))
+
+    def session_exists(self, session_id: str) -> bool:
+        """Check whether a session has been saved, usually without a query."""
+        if self._known_sessions.get(session_id):
+            return True
+        with self.transaction() as cursor:
+            cursor.execute("SELECT 1 FROM sessions WHERE session_id = ?", (session_id,))
+            exists = cursor.fetchone() is not None
+        if exists:
+            self._known_sessions.set(session_id, True)
+        return exists
 
     def get_session_by_id(self, session_id: str) -> Session | None:
         """Get a session by its Claude Code session ID."""
+        cached = self._session_cache.get(session_id)
+        if cached is not None:
+            return cached
+        # Skip the fill below if a write invalidates while we read
+        generation = self._session_cache.generation
         with self.transaction() as cursor:
             cursor.execute(
                 "SELECT * FROM sessions WHERE session_id = ?",
@@ -163,7 +520,53 @@ class Database:
             row = cursor.fetchone()
             if row is None:
                 return None
-            return self._row_to_session(row)
+            session = self._row_to_session(row)
+        self._session_cache.set(session_id, session, generation)
+        return session
+
+    def get_sessions_by_ids(self, session_ids: list[str]) -> dict[str, Session]:
+        """Get multiple sessions by Claude Code session ID in one query."""
+        if not session_ids:
+            return {}
+        placeholders = ",".join("?" * len(session_ids))
+        with self.transaction() as cursor:
+            cursor.execute(
+                f"SELECT * FROM sessions WHERE session_id IN ({placeholders})",
+                session_ids,
+            )
+            return {
+                row["session_id"]: self._row_to_session(row)
+                for row in cursor.fetchall()
+            }
+
+    def get_session_endpoints(self, session_ids: list[str]) -> list[SessionEndpoint]:
+        """Get endpoint identity and source for sessions that report an endpoint.
+
+        The IDs are bound as one JSON array so the statement text stays the
+        same however many sessions a graph holds.
+        """
+        if not session_ids:
+            return []
+        with self.transaction() as cursor:
+            cursor.execute(
+                """
+                SELECT session_id, endpoint_hostname, endpoint_user,
+                    COALESCE(session_source, 'claude_code') AS session_source
+                FROM sessions
+                WHERE session_id IN (SELECT value FROM json_each(?))
+                    AND endpoint_hostname IS NOT NULL
+                """,
+                (json.dumps(session_ids),),
+            )
+            return [
+                SessionEndpoint(
+                    session_id=row["session_id"],
+                    endpoint_hostname=row["endpoint_hostname"],
+                    endpoint_user=row["endpoint_user"],
+                    session_source=row["session_source"],
+                )
+                for row in cursor.fetchall()
+            ]
 
     def get_sessions(
         self,
@@ -209,17 +612,17 @@ class Database:
         return Session(
             id=UUID(row["id"]),
             session_id=row["session_id"],
-            started_at=datetime.fromisoformat(row["started_at"]),
-            ended_at=datetime.fromisoformat(row["ended_at"]) if row["ended_at"] else None,
+            started_at=_str_to_dt(row["started_at"]),
+            ended_at=_str_to_dt(row["ended_at"]) if row["ended_at"] else None,
             cwd=row["cwd"],
             parent_session_id=row["parent_session_id"],
             event_count=row["event_count"],
             alert_count=row["alert_count"],
             risk_score=risk_score or 0,
-            status=row["status"],
-            endpoint_hostname=endpoint_hostname,
-            endpoint_user=endpoint_user,
-            session_source=session_source,
+            status=_intern(row["status"]),
+            endpoint_hostname=_intern(endpoint_hostname),
+            endpoint_user=_intern(endpoint_user),
+            session_source=_intern(session_source),
         )
 
     def increment_session_event_count(self, session_id: str) -> None:
@@ -229,6 +632,7 @@ class Database:
                 "UPDATE sessions SET event_count = event_count + 1, status = 'active', ended_at = NULL WHERE session_id = ?",
                 (session_id,),
             )
+            self._after_commit(functools.partial(self._session_cache.pop, session_id))
 
     def increment_session_alert_count(self, session_id: str) -> None:
         """Increment the alert count for a session."""
@@ -237,6 +641,7 @@ class Database:
                 "UPDATE sessions SET alert_count = alert_count + 1 WHERE session_id = ?",
                 (session_id,),
             )
+            self._after_commit(functools.partial(self._session_cache.pop, session_id))
 
     def increment_session_risk_score(self, session_id: str, delta: int) -> None:
         """Increment the risk score for a session."""
@@ -245,6 +650,7 @@ class Database:
                 "UPDATE sessions SET risk_score = risk_score + ? WHERE session_id = ?",
                 (delta, session_id),
             )
+            self._after_commit(functools.partial(self._session_cache.pop, session_id))
 
     def end_session(self, session_id: str) -> None:
         """Mark a session as ended."""
@@ -253,6 +659,25 @@ class Database:
                 "UPDATE sessions SET ended_at = ?, status = 'ended' WHERE session_id = ?",
                 (datetime.now(UTC).isoformat(), session_id),
             )
+            self._after_commit(functools.partial(self._session_cache.pop, session_id))
+
+    def end_active_session(self, session_id: str) -> bool:
+        """Mark a session as ended unless it already is.
+
+        Returns False if no active session has that ID.
+        """
+        with self.transaction() as cursor:
+            cursor.execute(
+                """
+                UPDATE sessions SET ended_at = ?, status = 'ended'
+                WHERE session_id = ? AND status != 'ended'
+                """,
+                (datetime.now(UTC).isoformat(), session_id),
+            )
+            ended = cursor.rowcount > 0
+            if ended:
+                self._after_commit(functools.partial(self._session_cache.pop, session_id))
+        return ended
 
     def cleanup_stale_sessions(self, inactive_minutes: int = 10) -> int:
         """Mark active sessions as ended if they have no recent events.
@@ -288,43 +713,43 @@ class Database:
                 """,
                 (now, cutoff, cutoff),
             )
-            return cursor.rowcount
+            closed = cursor.rowcount
+            if closed:
+                self._after_commit(self._session_cache.clear)
+        return closed
 
     # =========================================================================
     # Event Operations
     # =========================================================================
 
+    def record_event(self, event: Event) -> None:
+        """Save a newly collected event and count it on its session in one commit."""
+        self.record_events([event])
+
+    def record_events(self, events: list[Event]) -> None:
+        """Save a batch of collected events and count them on their sessions.
+
+        The whole batch is one transaction: one multi-row insert plus one
+        counter update per distinct session.
+        """
+        if not events:
+            return
+        counts = Counter(event.session_id for event in events)
+        with self.transaction() as cursor:
+            cursor.executemany(_EVENT_INSERT_SQL, [_event_params(e) for e in events])
+            cursor.executemany(
+                "UPDATE sessions SET event_count = event_count + ?, status = 'active', "
+                "ended_at = NULL WHERE session_id = ?",
+                [(count, session_id) for session_id, count in counts.items()],
+            )
+            # Invalidate after commit so the counts are visible to other connections
+            for session_id in counts:
+                self._after_commit(functools.partial(self._session_cache.pop, session_id))
+
     def save_event(self, event: Event) -> None:
         """Save an event to the database."""
         with self.transaction() as cursor:
-            cursor.execute(
-                """
-                INSERT OR REPLACE INTO events (
-                    id, session_id, timestamp, hook_type, tool_name,
-                    tool_input, tool_result, category, severity,
-                    file_paths, commands, urls, ip_addresses,
-                    processed, enriched, raw_payload
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    _uuid_to_str(event.id),
-                    event.session_id,
-                    event.timestamp.isoformat(),
-                    event.hook_type,
-                    event.tool_name,
-                    _serialize_json(event.tool_input),
-                    _serialize_json(event.tool_result),
-                    event.category.value,
-                    event.severity.value,
-                    _serialize_json(event.file_paths),
-                    _serialize_json(event.commands),
-                    _serialize_json(event.urls),
-                    _serialize_json(event.ip_addresses),
-                    1 if event.processed else 0,
-                    1 if event.enriched else 0,
-                    _serialize_json(event.raw_payload),
-                ),
-            )
+            cursor.execute(_EVENT_INSERT_SQL, _event_params(event))
 
     def get_event_by_id(self, event_id: UUID) -> Event | None:
         """Get an event by its ID."""
@@ -363,10 +788,10 @@ class Database:
             params.append(severity)
         if start_time:
             query += " AND timestamp >= ?"
-            params.append(start_time.isoformat())
+            params.append(_dt_to_str(start_time))
         if end_time:
             query += " AND timestamp <= ?"
-            params.append(end_time.isoformat())
+            params.append(_dt_to_str(end_time))
 
         query += " ORDER BY timestamp DESC LIMIT ? OFFSET ?"
         params.extend([limit, offset])
@@ -399,9 +824,9 @@ class Database:
         return Event(
             id=UUID(row["id"]),
             session_id=row["session_id"],
-            timestamp=datetime.fromisoformat(row["timestamp"]),
-            hook_type=row["hook_type"],
-            tool_name=row["tool_name"],
+            timestamp=_str_to_dt(row["timestamp"]),
+            hook_type=_intern(row["hook_type"]),
+            tool_name=_intern(row["tool_name"]),
             tool_input=_deserialize_json(row["tool_input"]),
             tool_result=_deserialize_json(row["tool_result"]),
             category=EventCategory(row["category"]),
@@ -440,8 +865,8 @@ class Database:
                 (
                     _uuid_to_str(alert.id),
                     alert.session_id,
-                    alert.created_at.isoformat(),
-                    alert.updated_at.isoformat(),
+                    _dt_to_str(alert.created_at),
+                    _dt_to_str(alert.updated_at),
                     alert.title,
                     alert.description,
                     alert.severity.value,
@@ -457,6 +882,7 @@ class Database:
                     _serialize_json(alert.metadata),
                 ),
             )
+            self._after_commit(self.policy_list_cache.clear)
 
     def get_alert_by_id(self, alert_id: UUID) -> Alert | None:
         """Get an alert by its ID."""
@@ -521,8 +947,8 @@ class Database:
         return Alert(
             id=UUID(row["id"]),
             session_id=row["session_id"],
-            created_at=datetime.fromisoformat(row["created_at"]),
-            updated_at=datetime.fromisoformat(row["updated_at"]),
+            created_at=_str_to_dt(row["created_at"]),
+            updated_at=_str_to_dt(row["updated_at"]),
             title=row["title"],
             description=row["description"] or "",
             severity=Severity(row["severity"]),
@@ -581,6 +1007,9 @@ class Database:
                     _serialize_json(policy.tags),
                 ),
             )
+            self._after_commit(self.policy_list_cache.clear)
+            # ON CONFLICT(name) keeps the existing row's id, so drop everything
+            self._after_commit(self._policy_cache.clear)
 
     def get_policies(self, enabled_only: bool = True) -> list[Policy]:
         """Get all policies."""
@@ -619,26 +1048,105 @@ class Database:
             alert_title=row["alert_title"] or "",
             alert_description=row["alert_description"] or "",
             tags=_deserialize_json(row["tags"]) or [],
-            created_at=datetime.fromisoformat(row["created_at"]),
-            updated_at=datetime.fromisoformat(row["updated_at"]),
+            created_at=_str_to_dt(row["created_at"]),
+            updated_at=_str_to_dt(row["updated_at"]),
         )
 
-    def get_events_before(
+    def get_event_descriptions_before(
         self,
         session_id: str,
         before: datetime,
         limit: int = 20,
-    ) -> list[Event]:
-        """Get events in a session up to a given timestamp, ordered chronologically."""
-        query = (
-            "SELECT * FROM events WHERE session_id = ? AND timestamp <= ? "
-            "ORDER BY timestamp DESC LIMIT ?"
-        )
+    ) -> list[dict[str, Any]]:
+        """Get short summaries of the events in a session up to a timestamp.
+
+        Only the columns shown in an alert's event chain are read; the
+        description is the first file path, command (cut to 80 characters)
+        or URL, extracted in SQL. Returned in chronological order.
+        """
+        query = """
+            SELECT id, timestamp, tool_name, category, severity,
+                COALESCE(
+                    json_extract(file_paths, '$[0]'),
+                    CASE WHEN length(json_extract(commands, '$[0]')) > 80
+                        THEN substr(json_extract(commands, '$[0]'), 1, 80) || '...'
+                        ELSE json_extract(commands, '$[0]')
+                    END,
+                    json_extract(urls, '$[0]'),
+                    ''
+                ) AS description
+            FROM events
+            WHERE session_id = ? AND timestamp <= ?
+            ORDER BY timestamp DESC
+            LIMIT ?
+        """
         with self.transaction() as cursor:
-            cursor.execute(query, (session_id, before.isoformat(), limit))
+            cursor.execute(query, (session_id, _dt_to_str(before), limit))
             rows = cursor.fetchall()
         # Return in chronological order (oldest first)
-        return [self._row_to_event(row) for row in reversed(rows)]
+        return [
+            {
+                "id": row["id"],
+                "timestamp": _str_to_dt(row["timestamp"]),
+                "tool_name": row["tool_name"],
+                "category": row["category"],
+                "severity": row["severity"],
+                "description": row["description"],
+            }
+            for row in reversed(rows)
+        ]
+
+    def get_timeline_rows(
+        self,
+        session_id: str,
+        after: tuple[datetime, str] | None = None,
+        limit: int = 1000,
+    ) -> tuple[list[dict[str, Any]], int]:
+        """Get one page of a session's events for its timeline.
+
+        Without a cursor this is the session's first events. With a
+        (timestamp, id) cursor it is the events following that one; the id
+        breaks ties between events sharing a timestamp. Rows are returned
+        oldest first, reading only the columns a timeline entry needs, with has_alert set in SQL for events referenced by any of the
+        session's alerts. Returns the rows together with the session's alert
+        count.
+        """
+        query = """
+            SELECT id, timestamp, hook_type, tool_name, category, severity,
+                file_paths, commands, urls,
+                id IN (
+                    SELECT j.value FROM alerts, json_each(alerts.event_ids) AS j
+                    WHERE alerts.session_id = ?1
+                ) AS has_alert
+            FROM events
+            WHERE session_id = ?1
+        """
+        params: list[Any] = [session_id, limit]
+        if after is not None:
+            query += " AND (timestamp, id) > (?3, ?4)"
+            params += [_dt_to_str(after[0]), after[1]]
+        query += " ORDER BY timestamp, id LIMIT ?2"
+
+        with self.transaction() as cursor:
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            cursor.execute("SELECT COUNT(*) FROM alerts WHERE session_id = ?", (session_id,))
+            alert_count = cursor.fetchone()[0]
+        return [
+            {
+                "id": row["id"],
+                "timestamp": _str_to_dt(row["timestamp"]),
+                "hook_type": row["hook_type"],
+                "tool_name": row["tool_name"],
+                "category": row["category"],
+                "severity": row["severity"],
+                "file_paths": _deserialize_json(row["file_paths"]) or [],
+                "commands": _deserialize_json(row["commands"]) or [],
+                "urls": _deserialize_json(row["urls"]) or [],
+                "has_alert": bool(row["has_alert"]),
+            }
+            for row in rows
+        ], alert_count
 
     def get_alert_counts_by_policy(self) -> dict[str, int]:
         """Return {policy_id: alert_count} for all policies that have alerts."""
@@ -674,8 +1182,8 @@ class Database:
                     node.node_type.value,
                     node.label,
                     node.value,
-                    node.first_seen.isoformat(),
-                    node.last_seen.isoformat(),
+                    _dt_to_str(node.first_seen),
+                    _dt_to_str(node.last_seen),
                     node.access_count,
                     node.alert_count,
                     _serialize_json(node.session_ids),
@@ -691,6 +1199,7 @@ class Database:
                 (node.node_type.value, node.value),
             )
             row = cursor.fetchone()
+            self._after_commit(self.graph_cache.clear)
             return row["id"] if row else _uuid_to_str(node.id)
 
     def save_graph_edge(self, edge: GraphEdge) -> None:
@@ -714,8 +1223,8 @@ class Database:
                     _uuid_to_str(edge.source_id),
                     _uuid_to_str(edge.target_id),
                     edge.relation.value,
-                    edge.first_seen.isoformat(),
-                    edge.last_seen.isoformat(),
+                    _dt_to_str(edge.first_seen),
+                    _dt_to_str(edge.last_seen),
                     edge.count,
                     _serialize_json(edge.session_ids),
                     _serialize_json([str(eid) for eid in edge.event_ids]),
@@ -724,6 +1233,7 @@ class Database:
                     _serialize_json(edge.metadata),
                 ),
             )
+            self._after_commit(self.graph_cache.clear)
 
     # =========================================================================
     # Statistics Operations
@@ -744,10 +1254,10 @@ class Database:
             params.append(session_id)
         if start_time:
             query += " AND timestamp >= ?"
-            params.append(start_time.isoformat())
+            params.append(_dt_to_str(start_time))
         if end_time:
             query += " AND timestamp <= ?"
-            params.append(end_time.isoformat())
+            params.append(_dt_to_str(end_time))
 
         with self.transaction() as cursor:
             cursor.execute(query, params)
@@ -775,31 +1285,25 @@ class Database:
             result = cursor.fetchone()
             return result[0] if result else 0
 
-    def get_event_counts_by_session(self, session_ids: list[str]) -> dict[str, int]:
-        """Get actual event counts for multiple sessions in one query."""
-        if not session_ids:
-            return {}
-        placeholders = ",".join("?" * len(session_ids))
-        with self.transaction() as cursor:
-            cursor.execute(
-                f"SELECT session_id, COUNT(*) as cnt FROM events "
-                f"WHERE session_id IN ({placeholders}) GROUP BY session_id",
-                session_ids,
-            )
-            return {row["session_id"]: row["cnt"] for row in cursor.fetchall()}
+    def get_session_counts(self, session_ids: list[str]) -> dict[str, tuple[int, int]]:
+        """Get actual (event_count, alert_count) for multiple sessions in one query.
 
-    def get_alert_counts_by_session(self, session_ids: list[str]) -> dict[str, int]:
-        """Get actual alert counts for multiple sessions in one query."""
+        Each count is an index-only lookup per session; the IDs are bound as
+        one JSON array so the statement text stays the same for any page size.
+        """
         if not session_ids:
             return {}
-        placeholders = ",".join("?" * len(session_ids))
         with self.transaction() as cursor:
             cursor.execute(
-                f"SELECT session_id, COUNT(*) as cnt FROM alerts "
-                f"WHERE session_id IN ({placeholders}) GROUP BY session_id",
-                session_ids,
+                """
+                SELECT ids.value AS session_id,
+                    (SELECT COUNT(*) FROM events WHERE session_id = ids.value) AS events,
+                    (SELECT COUNT(*) FROM alerts WHERE session_id = ids.value) AS alerts
+                FROM json_each(?) AS ids
+                """,
+                (json.dumps(session_ids),),
             )
-            return {row["session_id"]: row["cnt"] for row in cursor.fetchall()}
+            return {row["session_id"]: (row["events"], row["alerts"]) for row in cursor.fetchall()}
 
     def get_session_count(self, status: str | None = None) -> int:
         """Get total session count with optional filtering."""
@@ -848,10 +1352,10 @@ class Database:
             params.append(session_source)
         if from_date:
             base_query += " AND started_at >= ?"
-            params.append(from_date.isoformat())
+            params.append(_dt_to_str(from_date))
         if to_date:
             base_query += " AND started_at <= ?"
-            params.append(to_date.isoformat())
+            params.append(_dt_to_str(to_date))
 
         # Get total count
         with self.transaction() as cursor:
@@ -927,8 +1431,9 @@ class Database:
                 (session_id,),
             )
             row = cursor.fetchone()
-            stats["first_event_at"] = row["first_event_at"] if row else None
-            stats["last_event_at"] = row["last_event_at"] if row else None
+            first, last = (row["first_event_at"], row["last_event_at"]) if row else (None, None)
+            stats["first_event_at"] = _str_to_dt(first) if first else None
+            stats["last_event_at"] = _str_to_dt(last) if last else None
 
         return stats
 
@@ -962,10 +1467,10 @@ class Database:
             params.append(tool_name)
         if from_date:
             base_query += " AND timestamp >= ?"
-            params.append(from_date.isoformat())
+            params.append(_dt_to_str(from_date))
         if to_date:
             base_query += " AND timestamp <= ?"
-            params.append(to_date.isoformat())
+            params.append(_dt_to_str(to_date))
 
         # Get total count
         with self.transaction() as cursor:
@@ -993,48 +1498,49 @@ class Database:
         session_id: str | None = None,
         from_date: datetime | None = None,
         to_date: datetime | None = None,
+        blocked: bool | None = None,
+        endpoint_hostname: str | None = None,
     ) -> dict[str, Any]:
         """Get alerts with pagination and filters."""
-        base_query = "FROM alerts WHERE 1=1"
+        # Values line up with _ALERT_FILTER_CLAUSES; None means no filter
+        values = (
+            status or None,
+            severity or None,
+            _uuid_to_str(policy_id) if policy_id else None,
+            session_id or None,
+            _dt_to_str(from_date),
+            _dt_to_str(to_date),
+            None if blocked is None else int(blocked),
+            endpoint_hostname or None,
+        )
+        filter_mask = 0
         params: list[Any] = []
-
-        if status:
-            base_query += " AND status = ?"
-            params.append(status)
-        if severity:
-            base_query += " AND severity = ?"
-            params.append(severity)
-        if policy_id:
-            base_query += " AND policy_id = ?"
-            params.append(_uuid_to_str(policy_id))
-        if session_id:
-            base_query += " AND session_id = ?"
-            params.append(session_id)
-        if from_date:
-            base_query += " AND created_at >= ?"
-            params.append(from_date.isoformat())
-        if to_date:
-            base_query += " AND created_at <= ?"
-            params.append(to_date.isoformat())
+        for bit, value in enumerate(values):
+            if value is not None:
+                filter_mask |= 1 << bit
+                params.append(value)
+        count_sql, page_sql = _alerts_page_sql(filter_mask)
 
         # Get total count
         with self.transaction() as cursor:
-            cursor.execute(f"SELECT COUNT(*) {base_query}", params)
+            cursor.execute(count_sql, params)
             total = cursor.fetchone()[0]
 
         # Get paginated results
         offset = (page - 1) * page_size
-        query = f"SELECT * {base_query} ORDER BY created_at DESC LIMIT ? OFFSET ?"
         params.extend([page_size, offset])
 
         with self.transaction() as cursor:
-            cursor.execute(query, params)
+            cursor.execute(page_sql, params)
             items = [self._row_to_alert(row) for row in cursor.fetchall()]
 
         return {"items": items, "total": total}
 
-    def update_alert(self, alert_id: UUID, data: dict[str, Any]) -> Alert:
-        """Update an alert with the given data."""
+    def update_alert(self, alert_id: UUID, data: dict[str, Any]) -> Alert | None:
+        """Update an alert with the given data.
+
+        Returns the updated alert, or None if no alert has that ID.
+        """
         set_clauses = []
         params: list[Any] = []
 
@@ -1059,11 +1565,12 @@ class Database:
 
         with self.transaction() as cursor:
             cursor.execute(
-                f"UPDATE alerts SET {', '.join(set_clauses)} WHERE id = ?",
+                f"UPDATE alerts SET {', '.join(set_clauses)} WHERE id = ? RETURNING *",
                 params,
             )
+            row = cursor.fetchone()
 
-        return self.get_alert_by_id(alert_id)  # type: ignore
+        return self._row_to_alert(row) if row else None
 
     def get_all_policies(self, enabled_only: bool = False) -> list[Policy]:
         """Get all policies."""
@@ -1078,15 +1585,35 @@ class Database:
 
     def get_policy_by_id(self, policy_id: UUID) -> Policy | None:
         """Get a policy by its ID."""
+        key = _uuid_to_str(policy_id)
+        cached = self._policy_cache.get(key)
+        if cached is not None:
+            return cached
+        generation = self._policy_cache.generation
         with self.transaction() as cursor:
             cursor.execute(
                 "SELECT * FROM policies WHERE id = ?",
-                (_uuid_to_str(policy_id),),
+                (key,),
             )
             row = cursor.fetchone()
             if row is None:
                 return None
-            return self._row_to_policy(row)
+            policy = self._row_to_policy(row)
+        self._policy_cache.set(key, policy, generation)
+        return policy
+
+    def get_policies_by_ids(self, policy_ids: list[UUID]) -> dict[UUID, Policy]:
+        """Get multiple policies by ID in one query."""
+        if not policy_ids:
+            return {}
+        placeholders = ",".join("?" * len(policy_ids))
+        with self.transaction() as cursor:
+            cursor.execute(
+                f"SELECT * FROM policies WHERE id IN ({placeholders})",
+                [_uuid_to_str(pid) for pid in policy_ids],
+            )
+            policies = [self._row_to_policy(row) for row in cursor.fetchall()]
+        return {p.id: p for p in policies}
 
     def update_policy(self, policy_id: UUID, data: dict[str, Any]) -> Policy:
         """Update a policy with the given data."""
@@ -1129,6 +1656,8 @@ class Database:
                 f"UPDATE policies SET {', '.join(set_clauses)} WHERE id = ?",
                 params,
             )
+            self._after_commit(self.policy_list_cache.clear)
+            self._after_commit(functools.partial(self._policy_cache.pop, _uuid_to_str(policy_id)))
 
         return self.get_policy_by_id(policy_id)  # type: ignore
 
@@ -1144,27 +1673,149 @@ class Database:
                 "DELETE FROM policies WHERE id = ?",
                 (_uuid_to_str(policy_id),),
             )
+            self._after_commit(self.policy_list_cache.clear)
+            self._after_commit(functools.partial(self._policy_cache.pop, _uuid_to_str(policy_id)))
+
+    def get_session_graph(
+        self,
+        session_id: str,
+        from_date: datetime | None = None,
+        to_date: datetime | None = None,
+    ) -> dict[str, Any]:
+        """Get graph nodes and edges for a specific session.
+
+        With a time window, only nodes active in it (last_seen >= from_date,
+        first_seen <= to_date) and the edges between them are returned.
+        ``time_range`` is the (first_seen, last_seen) span of all the
+        session's nodes regardless of the window, or None if it has none.
+        """
+        nodes: list[GraphNode] = []
+        edges: list[GraphEdge] = []
+        time_range: tuple[datetime, datetime] | None = None
+
+        session_filter = "session_ids LIKE ?"
+        session_param = f'%"{session_id}"%'
+        windowed = from_date is not None or to_date is not None
 
-    def get_session_graph(self, session_id: str) -> dict[str, Any]:
-        """Get graph nodes and edges for a specific session."""
+        query = f"SELECT * FROM graph_nodes WHERE {session_filter}"
+        params: list[Any] = [session_param]
+        if from_date:
+            query += " AND last_seen >= ?"
+            params.append(_dt_to_str(from_date))
+        if to_date:
+            query += " AND first_seen <= ?"
+            params.append(_dt_to_str(to_date))
+        query += " ORDER BY access_count DESC"
+
+        with self.transaction() as cursor:
+            # Get nodes associated with this session
+            cursor.execute(query, params)
+            for row in cursor.fetchall():
+                nodes.append(self._row_to_graph_node(row))
 
+            if windowed:
+                cursor.execute(
+                    f"SELECT MIN(first_seen), MAX(last_seen) FROM graph_nodes "
+                    f"WHERE {session_filter}",
+                    (session_param,),
+                )
+                row = cursor.fetchone()
+                if row[0] is not None:
+                    time_range = (_str_to_dt(row[0]), _str_to_dt(row[1]))
+
+            # Get edges associated with these nodes; within a window, only
+            # edges with both ends in it. The IDs are bound as one JSON array
+            # so the statement does not depend on the node count
+            if nodes:
+                join = "AND" if windowed else "OR"
+                cursor.execute(
+                    f"""
+                    SELECT * FROM graph_edges
+                    WHERE source_id IN (SELECT value FROM json_each(?1))
+                    {join} target_id IN (SELECT value FROM json_each(?1))
+                    """,
+                    (json.dumps([_uuid_to_str(n.id) for n in nodes]),),
+                )
+                for row in cursor.fetchall():
+                    edges.append(self._row_to_graph_edge(row))
+
+        # Without a window the nodes are the whole session, so the range
+        # comes from them in one pass. A node's last_seen never precedes its
+        # first_seen, so only those need scanning
+        if nodes and not windowed:
+            min_time = nodes[0].first_seen
+            max_time = nodes[0].last_seen
+            for n in nodes:
+                if n.first_seen < min_time:
+                    min_time = n.first_seen
+                if n.last_seen > max_time:
+                    max_time = n.last_seen
+            time_range = (min_time, max_time)
+
+        return {"nodes": nodes, "edges": edges, "time_range": time_range}
+
+    def get_alert_subgraph(
+        self,
+        session_id: str,
+        event_ids: list[UUID],
+        down_levels: int = 1,
+    ) -> dict[str, Any]:
+        """Get the part of a session graph around a set of events.
+
+        Starts from the session's nodes that contain any of ``event_ids``,
+        walks edges upward to every ancestor and downward ``down_levels``
+        hops, staying within the session's nodes. The walk is done by a
+        recursive CTE so only the resulting subgraph leaves SQLite.
+        """
         nodes: list[GraphNode] = []
         edges: list[GraphEdge] = []
+        if not event_ids:
+            return {"nodes": nodes, "edges": edges}
+
+        session_pattern = f'%"{session_id}"%'
+        event_id_strs = [_uuid_to_str(eid) for eid in event_ids]
+        placeholders = ",".join("?" * len(event_id_strs))
 
-        # Get nodes associated with this session
         with self.transaction() as cursor:
             cursor.execute(
-                """
+                f"""
+                WITH RECURSIVE
+                session_nodes(id) AS (
+                    SELECT id FROM graph_nodes WHERE session_ids LIKE ?
+                ),
+                matched(id) AS (
+                    SELECT n.id FROM graph_nodes n
+                    WHERE n.session_ids LIKE ?
+                    AND EXISTS (
+                        SELECT 1 FROM json_each(n.event_ids) j
+                        WHERE j.value IN ({placeholders})
+                    )
+                ),
+                ancestors(id) AS (
+                    SELECT id FROM matched
+                    UNION
+                    SELECT e.source_id FROM graph_edges e
+                    JOIN ancestors a ON e.target_id = a.id
+                    WHERE e.source_id IN (SELECT id FROM session_nodes)
+                ),
+                descendants(id, depth) AS (
+                    SELECT id, 0 FROM matched
+                    UNION
+                    SELECT e.target_id, d.depth + 1 FROM graph_edges e
+                    JOIN descendants d ON e.source_id = d.id
+                    WHERE d.depth < ?
+                    AND e.target_id IN (SELECT id FROM session_nodes)
+                )
                 SELECT * FROM graph_nodes
-                WHERE session_ids LIKE ?
+                WHERE id IN (SELECT id FROM ancestors)
+                OR id IN (SELECT id FROM descendants)
                 ORDER BY access_count DESC
                 """,
-                (f'%"{session_id}"%',),
+                [session_pattern, session_pattern, *event_id_strs, down_levels],
             )
             for row in cursor.fetchall():
                 nodes.append(self._row_to_graph_node(row))
 
-        # Get edges associated with this session
         if nodes:
             node_ids = [_uuid_to_str(n.id) for n in nodes]
             placeholders = ",".join("?" * len(node_ids))
@@ -1173,7 +1824,7 @@ class Database:
                     f"""
                     SELECT * FROM graph_edges
                     WHERE source_id IN ({placeholders})
-                    OR target_id IN ({placeholders})
+                    AND target_id IN ({placeholders})
                     """,
                     node_ids + node_ids,
                 )
@@ -1217,10 +1868,10 @@ class Database:
 
         if from_date:
             base_query += " AND last_seen >= ?"
-            params.append(from_date.isoformat())
+            params.append(_dt_to_str(from_date))
         if to_date:
             base_query += " AND last_seen <= ?"
-            params.append(to_date.isoformat())
+            params.append(_dt_to_str(to_date))
 
         base_query += " ORDER BY access_count DESC LIMIT ?"
         params.append(limit_nodes)
@@ -1268,8 +1919,8 @@ class Database:
             node_type=NodeType(row["node_type"]),
             label=row["label"],
             value=row["value"],
-            first_seen=datetime.fromisoformat(row["first_seen"]),
-            last_seen=datetime.fromisoformat(row["last_seen"]),
+            first_seen=_str_to_dt(row["first_seen"]),
+            last_seen=_str_to_dt(row["last_seen"]),
             access_count=row["access_count"],
             alert_count=row["alert_count"],
             session_ids=_deserialize_json(row["session_ids"]) or [],
@@ -1291,8 +1942,8 @@ class Database:
             source_id=UUID(row["source_id"]),
             target_id=UUID(row["target_id"]),
             relation=EdgeRelation(row["relation"]),
-            first_seen=datetime.fromisoformat(row["first_seen"]),
-            last_seen=datetime.fromisoformat(row["last_seen"]),
+            first_seen=_str_to_dt(row["first_seen"]),
+            last_seen=_str_to_dt(row["last_seen"]),
             count=row["count"],
             session_ids=_deserialize_json(row["session_ids"]) or [],
             event_ids=event_ids,
@@ -1317,14 +1968,14 @@ class Database:
         al_params: list[Any] = []
         if from_date:
             ev_date_clause += " AND timestamp >= ?"
-            ev_params.append(from_date.isoformat())
+            ev_params.append(_dt_to_str(from_date))
             al_date_clause += " AND created_at >= ?"
-            al_params.append(from_date.isoformat())
+            al_params.append(_dt_to_str(from_date))
         if to_date:
             ev_date_clause += " AND timestamp <= ?"
-            ev_params.append(to_date.isoformat())
+            ev_params.append(_dt_to_str(to_date))
             al_date_clause += " AND created_at <= ?"
-            al_params.append(to_date.isoformat())
+            al_params.append(_dt_to_str(to_date))
 
         # Endpoint filter — restrict to session_ids belonging to the endpoint
         ep_session_clause_ev = ""
@@ -1365,10 +2016,10 @@ class Database:
             sess_params: list[Any] = []
             if from_date:
                 sess_clause += " AND started_at >= ?"
-                sess_params.append(from_date.isoformat())
+                sess_params.append(_dt_to_str(from_date))
             if to_date:
                 sess_clause += " AND started_at <= ?"
-                sess_params.append(to_date.isoformat())
+                sess_params.append(_dt_to_str(to_date))
             sess_clause += ep_sess_clause
             sess_params.extend(ep_sess_params)
             cursor.execute(f"SELECT COUNT(*) FROM sessions {sess_clause}", sess_params)
@@ -1447,7 +2098,7 @@ class Database:
                     "severity": row["severity"],
                     "status": row["status"],
                     "session_id": row["session_id"],
-                    "created_at": datetime.fromisoformat(row["created_at"]),
+                    "created_at": _str_to_dt(row["created_at"]),
                 })
 
         # Recent events (within range)
@@ -1468,7 +2119,7 @@ class Database:
                     "category": row["category"],
                     "severity": row["severity"],
                     "session_id": row["session_id"],
-                    "timestamp": datetime.fromisoformat(row["timestamp"]),
+                    "timestamp": _str_to_dt(row["timestamp"]),
                 })
 
         # Sessions by source
@@ -1554,7 +2205,7 @@ class Database:
                 GROUP BY time_bucket
                 ORDER BY time_bucket
                 """,
-                [from_date.isoformat(), to_date.isoformat()] + extra_params,
+                [_dt_to_str(from_date), _dt_to_str(to_date)] + extra_params,
             )
             for row in cursor.fetchall():
                 events_by_time[row["time_bucket"]] = row["count"]
@@ -1572,7 +2223,7 @@ class Database:
                 GROUP BY time_bucket
                 ORDER BY time_bucket
                 """,
-                [from_date.isoformat(), to_date.isoformat()] + extra_params,
+                [_dt_to_str(from_date), _dt_to_str(to_date)] + extra_params,
             )
             for row in cursor.fetchall():
                 alerts_by_time[row["time_bucket"]] = row["count"]
@@ -1648,10 +2299,10 @@ class Database:
         params: list[Any] = []
         if from_date:
             date_clause += " AND timestamp >= ?"
-            params.append(from_date.isoformat())
+            params.append(_dt_to_str(from_date))
         if to_date:
             date_clause += " AND timestamp <= ?"
-            params.append(to_date.isoformat())
+            params.append(_dt_to_str(to_date))
 
         endpoint_clause = ""
         if endpoint:
@@ -1662,61 +2313,53 @@ class Database:
             endpoint_clause = f" AND session_id IN ({placeholders})"
             params.extend(ep_session_ids)
 
+        # Whitelisted ORDER BY column; anything else sorts by total_access
+        sort_column = {
+            "total_access": "total_access",
+            "read_count": "read_count",
+            "write_count": "write_count",
+            "alert_count": "alert_count",
+        }.get(sort_by, "total_access")
+        params.append(limit)
+
+        # Fan each event's file_paths out with json_each and aggregate per
+        # path; total_access counts every row since only file categories match
         with self.transaction() as cursor:
             cursor.execute(
                 f"""
-                SELECT file_paths, category, timestamp
-                FROM events
+                SELECT j.value AS file_path,
+                       SUM(category = 'file_read') AS read_count,
+                       SUM(category = 'file_write') AS write_count,
+                       SUM(category = 'file_delete') AS delete_count,
+                       COUNT(*) AS total_access,
+                       MAX(timestamp) AS last_accessed,
+                       0 AS alert_count
+                FROM events, json_each(events.file_paths) AS j
                 WHERE category IN ('file_read', 'file_write', 'file_delete')
                   AND file_paths IS NOT NULL AND file_paths != '[]'
+                  AND json_valid(file_paths)
+                  AND j.value IS NOT NULL AND j.value != ''
                   {date_clause}{endpoint_clause}
+                GROUP BY j.value
+                ORDER BY {sort_column} DESC, MIN(events.rowid)
+                LIMIT ?
                 """,
                 params,
             )
-            file_stats: dict[str, dict[str, Any]] = {}
-            for row in cursor.fetchall():
-                try:
-                    paths = json.loads(row["file_paths"])
-                except (TypeError, json.JSONDecodeError):
-                    continue
-                cat = row["category"]
-                ts = row["timestamp"]
-                for fp in paths:
-                    if not fp:
-                        continue
-                    if fp not in file_stats:
-                        file_stats[fp] = {
-                            "file_path": fp,
-                            "read_count": 0,
-                            "write_count": 0,
-                            "delete_count": 0,
-                            "last_accessed": ts,
-                            "alert_count": 0,
-                        }
-                    entry = file_stats[fp]
-                    if cat == "file_read":
-                        entry["read_count"] += 1
-                    elif cat == "file_write":
-                        entry["write_count"] += 1
-                    elif cat == "file_delete":
-                        entry["delete_count"] += 1
-                    if ts and (not entry["last_accessed"] or ts > entry["last_accessed"]):
-                        entry["last_accessed"] = ts
-
-            results = list(file_stats.values())
-            for r in results:
-                r["total_access"] = r["read_count"] + r["write_count"] + r["delete_count"]
-                if r["last_accessed"]:
-                    r["last_accessed"] = datetime.fromisoformat(r["last_accessed"])
-
-            sort_key = {
-                "total_access": "total_access",
-                "read_count": "read_count",
-                "write_count": "write_count",
-                "alert_count": "alert_count",
-            }.get(sort_by, "total_access")
-            results.sort(key=lambda x: x[sort_key], reverse=True)
-            return results[:limit]
+            return [
+                {
+                    "file_path": row["file_path"],
+                    "read_count": row["read_count"],
+                    "write_count": row["write_count"],
+                    "delete_count": row["delete_count"],
+                    "total_access": row["total_access"],
+                    "last_accessed": (
+                        _str_to_dt(row["last_accessed"]) if row["last_accessed"] else None
+                    ),
+                    "alert_count": row["alert_count"],
+                }
+                for row in cursor.fetchall()
+            ]
 
     def get_top_commands(
         self,
@@ -1731,10 +2374,10 @@ class Database:
         params: list[Any] = []
         if from_date:
             date_clause += " AND timestamp >= ?"
-            params.append(from_date.isoformat())
+            params.append(_dt_to_str(from_date))
         if to_date:
             date_clause += " AND timestamp <= ?"
-            params.append(to_date.isoformat())
+            params.append(_dt_to_str(to_date))
 
         endpoint_clause = ""
         if endpoint:
@@ -1783,7 +2426,7 @@ class Database:
             results = list(cmd_stats.values())
             for r in results:
                 if r["last_executed"]:
-                    r["last_executed"] = datetime.fromisoformat(r["last_executed"])
+                    r["last_executed"] = _str_to_dt(r["last_executed"])
 
             sort_key = {
                 "execution_count": "execution_count",
@@ -1807,10 +2450,10 @@ class Database:
         params: list[Any] = []
         if from_date:
             date_clause += " AND timestamp >= ?"
-            params.append(from_date.isoformat())
+            params.append(_dt_to_str(from_date))
         if to_date:
             date_clause += " AND timestamp <= ?"
-            params.append(to_date.isoformat())
+            params.append(_dt_to_str(to_date))
 
         endpoint_clause = ""
         if endpoint:
@@ -1861,7 +2504,7 @@ class Database:
             results = list(domain_stats.values())
             for r in results:
                 if r["last_accessed"]:
-                    r["last_accessed"] = datetime.fromisoformat(r["last_accessed"])
+                    r["last_accessed"] = _str_to_dt(r["last_accessed"])
 
             sort_key = {
                 "access_count": "access_count",
@@ -1902,6 +2545,10 @@ class Database:
 
     def get_unique_endpoint_count(self) -> int:
         """Get the number of unique endpoints (distinct hostname+user pairs)."""
+        cached = self._endpoint_count_cache.get("count")
+        if cached is not None:
+            return cached
+        generation = self._endpoint_count_cache.generation
         with self.transaction() as cursor:
             cursor.execute(
                 """
@@ -1913,7 +2560,9 @@ class Database:
                 """
             )
             result = cursor.fetchone()
-            return result[0] if result else 0
+            count = result[0] if result else 0
+        self._endpoint_count_cache.set("count", count, generation)
+        return count
 
 
 # Global database instance
@@ -52,7 +52,7 @@ CREATE TABLE IF NOT EXISTS events (
     FOREIGN KEY (session_id) REFERENCES sessions(session_id)
 );
 
-CREATE INDEX IF NOT EXISTS idx_events_session_id ON events(session_id);
+CREATE INDEX IF NOT EXISTS idx_events_session_ts ON events(session_id, timestamp DESC);
 CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events(timestamp);
 CREATE INDEX IF NOT EXISTS idx_events_hook_type ON events(hook_type);
 CREATE INDEX IF NOT EXISTS idx_events_tool_name ON events(tool_name);
@@ -83,11 +83,14 @@ CREATE TABLE IF NOT EXISTS alerts (
     FOREIGN KEY (policy_id) REFERENCES policies(id)
 );
 
-CREATE INDEX IF NOT EXISTS idx_alerts_session_id ON alerts(session_id);
 CREATE INDEX IF NOT EXISTS idx_alerts_created_at ON alerts(created_at);
 CREATE INDEX IF NOT EXISTS idx_alerts_severity ON alerts(severity);
-CREATE INDEX IF NOT EXISTS idx_alerts_status ON alerts(status);
-CREATE INDEX IF NOT EXISTS idx_alerts_policy_id ON alerts(policy_id);
+-- Composite indexes matching the alert list's filters + ORDER BY created_at DESC
+CREATE INDEX IF NOT EXISTS idx_alerts_status_created ON alerts(status, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_alerts_list ON alerts(status, severity, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_alerts_session_created ON alerts(session_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_alerts_policy_created ON alerts(policy_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_alerts_blocked_created ON alerts(blocked, created_at DESC);
 
 -- Policies table: Detection policies and rules
 CREATE TABLE IF NOT EXISTS policies (
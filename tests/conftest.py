@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime
 from typing import Any
 from unittest.mock import AsyncMock, MagicMock
@@ -85,6 +86,7 @@ def make_mock_database() -> MagicMock:
     db = MagicMock()
     db.get_session_by_id = MagicMock(return_value=None)
     db.save_event = MagicMock()
+    db.record_events = MagicMock()
     db.save_alert = MagicMock()
     db.save_session = MagicMock()
     db.increment_session_alert_count = MagicMock()
@@ -108,6 +110,7 @@ def make_engine(
     db = database or make_mock_database()
     settings = MagicMock()
     settings.process_interval = 0.1
+    settings.batch_size = 100
     settings.db_path = "/tmp/test.db"
 
     engine = Engine.__new__(Engine)
@@ -116,6 +119,7 @@ def make_engine(
     engine._policies = policies or []
     engine._sequence_tracker = SequenceTracker()
     engine._event_queue = MagicMock()
+    engine._persist_queue = asyncio.Queue()
     engine._processing_task = None
 
     return engine
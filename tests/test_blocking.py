@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+from unittest.mock import MagicMock
+
 import pytest
 
 from agentsleak.models.alerts import ConditionOperator, PolicyAction
@@ -118,6 +120,19 @@ class TestEvaluatePreTool:
         assert decision.allow is False
         assert "First Policy" in decision.reason
 
+    async def test_event_dict_built_once_for_all_block_policies(self):
+        policies = [
+            make_block_policy(name=f"P{i}", categories=[EventCategory.FILE_READ])
+            for i in range(3)
+        ]
+        engine = make_engine(policies=policies)
+        engine._event_to_dict = MagicMock(wraps=engine._event_to_dict)
+        event = make_event(tool_name="Bash", tool_input={"command": "ls"})
+
+        decision = await engine.evaluate_pre_tool(event)
+        assert decision.allow is True
+        engine._event_to_dict.assert_called_once()
+
 
 class TestDecisionToHookResponse:
     def test_allow_response(self):
@@ -141,3 +156,32 @@ class TestDecisionToHookResponse:
         decision = Decision(allow=False)
         response = decision.to_hook_response()
         assert "AgentsLeak policy" in response["hookSpecificOutput"]["permissionDecisionReason"]
+
+
+class TestIncrementalPolicyUpdates:
+    def test_add_skips_disabled_policy(self):
+        engine = make_engine(policies=[])
+        policy = make_block_policy(name="Off").model_copy(update={"enabled": False})
+        engine.add_policy(policy)
+        assert engine._policies == []
+
+    def test_replace_keeps_position_and_drops_disabled(self):
+        first = make_block_policy(name="First")
+        second = make_block_policy(name="Second")
+        engine = make_engine(policies=[first, second])
+
+        renamed = first.model_copy(update={"name": "First v2"})
+        engine.replace_policy(renamed)
+        assert [p.name for p in engine._policies] == ["First v2", "Second"]
+
+        engine.replace_policy(second.model_copy(update={"enabled": False}))
+        assert [p.name for p in engine._policies] == ["First v2"]
+
+        engine.replace_policy(second)
+        assert [p.name for p in engine._policies] == ["First v2", "Second"]
+
+    def test_remove_policy(self):
+        policy = make_block_policy(name="Gone")
+        engine = make_engine(policies=[policy])
+        engine.remove_policy(policy.id)
+        assert engine._policies == []
@@ -0,0 +1,571 @@
+"""Tests for Database query helpers."""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from agentsleak.config.settings import Settings
+from agentsleak.models.alerts import Alert, Policy
+from agentsleak.models.events import Event, EventCategory, Session
+from agentsleak.models.graph import EdgeRelation, GraphEdge, GraphNode, NodeType
+from agentsleak.store.database import Database, _alerts_page_sql
+
+
+@pytest.fixture
+def db(tmp_path):
+    settings = Settings(db_path=tmp_path / "test.db", rules_path=tmp_path / "rules")
+    database = Database(settings)
+    yield database
+    database.close()
+
+
+def _seed_session(db: Database, session_id: str, hostname: str | None = None) -> None:
+    db.save_session(Session(session_id=session_id, endpoint_hostname=hostname))
+
+
+def _seed_alert(db: Database, session_id: str, blocked: bool = False) -> Alert:
+    alert = Alert(
+        session_id=session_id,
+        title="Test alert",
+        description="",
+        blocked=blocked,
+    )
+    db.save_alert(alert)
+    return alert
+
+
+class TestConnection:
+    def test_pragmas(self, db):
+        conn = db.connection
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        assert conn.execute("PRAGMA journal_size_limit").fetchone()[0] == 67108864
+
+    def test_nested_transaction_joins_outer(self, db):
+        _seed_session(db, "s1")
+
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                db.increment_session_event_count("s1")
+                raise RuntimeError("abort")
+
+        assert db.get_session_by_id("s1").event_count == 0
+
+    def test_record_event_counts_session(self, db):
+        _seed_session(db, "s1")
+        assert db.get_session_by_id("s1").event_count == 0
+
+        event = Event(session_id="s1", hook_type="PostToolUse")
+        db.record_event(event)
+
+        assert db.get_event_by_id(event.id) is not None
+        assert db.get_session_by_id("s1").event_count == 1
+
+    def test_record_events_batch_counts_each_session(self, db):
+        _seed_session(db, "s1")
+        _seed_session(db, "s2")
+        events = [
+            Event(session_id="s1", hook_type="PostToolUse"),
+            Event(session_id="s2", hook_type="PostToolUse"),
+            Event(session_id="s1", hook_type="PostToolUse"),
+        ]
+        db.record_events(events)
+
+        assert all(db.get_event_by_id(e.id) is not None for e in events)
+        assert db.get_session_by_id("s1").event_count == 2
+        assert db.get_session_by_id("s2").event_count == 1
+
+    def test_concurrent_writes_from_threads(self, db):
+        _seed_session(db, "s1")
+
+        def work(_):
+            db.increment_session_event_count("s1")
+            return db.get_session_by_id("s1")
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(work, range(200)))
+
+        assert db.get_session_by_id("s1").event_count == 200
+
+    def test_pooled_reader_not_blocked_by_open_write(self, db):
+        _seed_session(db, "s1")
+
+        with db.transaction() as cursor:
+            cursor.execute(
+                "UPDATE sessions SET event_count = 99 WHERE session_id = ?", ("s1",)
+            )
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                # Reads the last committed snapshot instead of waiting
+                session = pool.submit(db.get_session_by_id, "s1").result(timeout=2)
+            assert session.event_count == 0
+
+        db.clear_caches()
+        assert db.get_session_by_id("s1").event_count == 99
+
+class TestGetAlertsPaginated:
+    def test_blocked_filter_applies_to_total(self, db):
+        _seed_session(db, "s1")
+        for i in range(5):
+            _seed_alert(db, "s1", blocked=i < 2)
+
+        result = db.get_alerts_paginated(page=1, page_size=1, blocked=True)
+        assert result["total"] == 2
+        assert len(result["items"]) == 1
+        assert result["items"][0].blocked is True
+
+        result = db.get_alerts_paginated(page=1, page_size=10, blocked=False)
+        assert result["total"] == 3
+        assert all(not a.blocked for a in result["items"])
+
+    def test_endpoint_filter(self, db):
+        _seed_session(db, "s1", hostname="laptop")
+        _seed_session(db, "s2", hostname="server")
+        _seed_alert(db, "s1")
+        _seed_alert(db, "s1")
+        _seed_alert(db, "s2")
+
+        result = db.get_alerts_paginated(endpoint_hostname="laptop")
+        assert result["total"] == 2
+        assert {a.session_id for a in result["items"]} == {"s1"}
+
+        result = db.get_alerts_paginated(endpoint_hostname="unknown")
+        assert result["total"] == 0
+        assert result["items"] == []
+
+    def test_combined_filters_bind_in_order(self, db):
+        _seed_session(db, "s1", hostname="laptop")
+        _seed_session(db, "s2", hostname="laptop")
+        _seed_alert(db, "s1", blocked=True)
+        _seed_alert(db, "s1")
+        _seed_alert(db, "s2", blocked=True)
+
+        result = db.get_alerts_paginated(
+            status="new", session_id="s1", blocked=True, endpoint_hostname="laptop"
+        )
+        assert result["total"] == 1
+        assert result["items"][0].session_id == "s1"
+        assert result["items"][0].blocked is True
+
+    @pytest.mark.parametrize(
+        ("filter_mask", "params"),
+        [(0b1, ["new"]), (0b11, ["new", "high"]), (0b100, ["p"]), (0b1000, ["s1"])],
+    )
+    def test_page_query_avoids_sort(self, db, filter_mask, params):
+        _, page_sql = _alerts_page_sql(filter_mask)
+        plan = db.connection.execute(
+            f"EXPLAIN QUERY PLAN {page_sql}", [*params, 20, 0]
+        ).fetchall()
+        assert not any("TEMP B-TREE" in row[3] for row in plan)
+
+
+class TestTimestamps:
+    def test_offset_bounds_are_compared_in_utc(self, db):
+        _seed_session(db, "s1")
+        alert = _seed_alert(db, "s1")
+        plus_two = timezone(timedelta(hours=2))
+
+        before = (alert.created_at - timedelta(minutes=1)).astimezone(plus_two)
+        after = (alert.created_at + timedelta(minutes=1)).astimezone(plus_two)
+        assert db.get_alerts_paginated(from_date=before)["total"] == 1
+        assert db.get_alerts_paginated(from_date=after)["total"] == 0
+        naive_utc = (alert.created_at + timedelta(minutes=1)).replace(tzinfo=None)
+        assert db.get_alerts_paginated(to_date=naive_utc)["total"] == 1
+
+    def test_legacy_naive_rows_read_as_utc(self, db):
+        _seed_session(db, "s1")
+        alert = _seed_alert(db, "s1")
+        with db.transaction() as cursor:
+            cursor.execute(
+                "UPDATE alerts SET created_at = ? WHERE id = ?",
+                ("2024-01-01 12:00:00", str(alert.id)),
+            )
+
+        created = db.get_alert_by_id(alert.id).created_at
+        assert created == datetime(2024, 1, 1, 12, tzinfo=UTC)
+
+
+class TestUpdateAlert:
+    def test_returns_updated_row(self, db):
+        _seed_session(db, "s1")
+        alert = _seed_alert(db, "s1")
+
+        updated = db.update_alert(alert.id, {"status": "resolved", "tags": ["fp"]})
+        assert updated.id == alert.id
+        assert updated.status == "resolved"
+        assert updated.tags == ["fp"]
+        assert db.get_alert_by_id(alert.id).status == "resolved"
+
+    def test_missing_alert_returns_none(self, db):
+        assert db.update_alert(uuid4(), {"status": "resolved"}) is None
+
+class TestBulkLookups:
+    def test_get_sessions_by_ids(self, db):
+        _seed_session(db, "s1", hostname="laptop")
+        _seed_session(db, "s2", hostname="server")
+
+        sessions = db.get_sessions_by_ids(["s1", "s2", "missing"])
+        assert set(sessions) == {"s1", "s2"}
+        assert sessions["s2"].endpoint_hostname == "server"
+        assert db.get_sessions_by_ids([]) == {}
+
+    def test_session_strings_interned(self, db):
+        _seed_session(db, "s1", hostname="laptop")
+        _seed_session(db, "s2", hostname="laptop")
+
+        sessions = db.get_sessions_by_ids(["s1", "s2"])
+        assert sessions["s1"].status is sessions["s2"].status
+        assert sessions["s1"].endpoint_hostname is sessions["s2"].endpoint_hostname
+
+    def test_get_session_endpoints(self, db):
+        _seed_session(db, "s1", hostname="laptop")
+        _seed_session(db, "s2", hostname="server")
+        _seed_session(db, "s3")
+
+        rows = db.get_session_endpoints(["s1", "s3", "missing"])
+        assert rows == [{
+            "session_id": "s1",
+            "endpoint_hostname": "laptop",
+            "endpoint_user": None,
+            "session_source": "claude_code",
+        }]
+        assert db.get_session_endpoints([]) == []
+
+    def test_get_session_counts(self, db):
+        _seed_session(db, "s1")
+        _seed_session(db, "s2")
+        for _ in range(2):
+            db.save_event(Event(session_id="s1", hook_type="PreToolUse"))
+        _seed_alert(db, "s1")
+
+        assert db.get_session_counts(["s1", "s2"]) == {"s1": (2, 1), "s2": (0, 0)}
+        assert db.get_session_counts([]) == {}
+
+    def test_get_policies_by_ids(self, db):
+        policy = Policy(name="p1")
+        db.save_policy(policy)
+
+        policies = db.get_policies_by_ids([policy.id, uuid4()])
+        assert list(policies) == [policy.id]
+        assert policies[policy.id].name == "p1"
+        assert db.get_policies_by_ids([]) == {}
+
+
+class TestEventDescriptions:
+    def test_description_per_event_kind(self, db):
+        _seed_session(db, "s1")
+        start = datetime(2026, 1, 1, tzinfo=UTC)
+        kinds = [
+            {"file_paths": ["/etc/passwd"], "commands": ["cat /etc/passwd"]},
+            {"commands": ["x" * 100]},
+            {"commands": ["ls"]},
+            {"urls": ["https://example.com"]},
+            {},
+        ]
+        for i, kind in enumerate(kinds):
+            db.save_event(
+                Event(session_id="s1", hook_type="PreToolUse",
+                      timestamp=start + timedelta(seconds=i), **kind)
+            )
+
+        items = db.get_event_descriptions_before("s1", start + timedelta(seconds=3), 3)
+        assert [item["description"] for item in items] == [
+            "x" * 80 + "...",
+            "ls",
+            "https://example.com",
+        ]
+        assert items[0]["timestamp"] == start + timedelta(seconds=1)
+
+        items = db.get_event_descriptions_before("s1", start + timedelta(seconds=10), 10)
+        assert items[0]["description"] == "/etc/passwd"
+        assert items[-1]["description"] == ""
+
+
+class TestSessionTimeline:
+    def test_default_is_first_events_oldest_first(self, db):
+        _seed_session(db, "s1")
+        start = datetime(2026, 1, 1, tzinfo=UTC)
+        for i in (3, 0, 4, 1, 2):
+            db.save_event(
+                Event(session_id="s1", hook_type="PreToolUse",
+                      timestamp=start + timedelta(seconds=i), commands=[f"cmd {i}"])
+            )
+
+        rows, total_alerts = db.get_timeline_rows("s1", limit=3)
+        assert [row["timestamp"] for row in rows] == [
+            start + timedelta(seconds=i) for i in (0, 1, 2)
+        ]
+        assert [row["commands"] for row in rows] == [["cmd 0"], ["cmd 1"], ["cmd 2"]]
+        assert total_alerts == 0
+
+        rows, _ = db.get_timeline_rows("s1", after=(rows[-1]["timestamp"], rows[-1]["id"]))
+        assert [row["commands"] for row in rows] == [["cmd 3"], ["cmd 4"]]
+
+    def test_cursor_walks_every_event_once(self, db):
+        _seed_session(db, "s1")
+        start = datetime(2026, 1, 1, tzinfo=UTC)
+        # Pairs of events share a timestamp, so some pages end mid-tie
+        events = [
+            Event(
+                session_id="s1", hook_type="PreToolUse", timestamp=start + timedelta(seconds=i // 2)
+            )
+            for i in range(25)
+        ]
+        for event in events:
+            db.save_event(event)
+
+        seen: list[str] = []
+        after = None
+        while True:
+            rows, _ = db.get_timeline_rows("s1", after=after, limit=10)
+            if not rows:
+                break
+            seen += [row["id"] for row in rows]
+            after = (rows[-1]["timestamp"], rows[-1]["id"])
+        assert len(seen) == 25
+        assert set(seen) == {str(e.id) for e in events}
+
+    def test_has_alert(self, db):
+        _seed_session(db, "s1")
+        _seed_session(db, "s2")
+        events = [Event(session_id="s1", hook_type="PreToolUse") for _ in range(3)]
+        for event in events:
+            db.save_event(event)
+        for event_ids in ([events[0].id], [events[0].id, events[1].id], []):
+            db.save_alert(
+                Alert(session_id="s1", title="Test alert", description="", event_ids=event_ids)
+            )
+        # Alerts of other sessions do not mark events
+        db.save_alert(
+            Alert(session_id="s2", title="Test alert", description="", event_ids=[events[2].id])
+        )
+
+        rows, total_alerts = db.get_timeline_rows("s1")
+        flags = {row["id"]: row["has_alert"] for row in rows}
+        assert flags == {
+            str(events[0].id): True,
+            str(events[1].id): True,
+            str(events[2].id): False,
+        }
+        assert total_alerts == 3
+
+
+class TestTopFiles:
+    def test_counts_per_path(self, db):
+        _seed_session(db, "s1")
+        start = datetime(2026, 1, 1, tzinfo=UTC)
+        accesses = [
+            (EventCategory.FILE_READ, ["/a", "/b"]),
+            (EventCategory.FILE_WRITE, ["/a", ""]),
+            (EventCategory.FILE_DELETE, ["/a"]),
+            (EventCategory.COMMAND_EXEC, ["/b"]),
+        ]
+        for i, (category, paths) in enumerate(accesses):
+            db.save_event(
+                Event(session_id="s1", hook_type="PostToolUse", category=category,
+                      timestamp=start + timedelta(seconds=i), file_paths=paths)
+            )
+
+        files = db.get_top_files()
+        assert [f["file_path"] for f in files] == ["/a", "/b"]
+        assert files[0] == {
+            "file_path": "/a",
+            "read_count": 1,
+            "write_count": 1,
+            "delete_count": 1,
+            "total_access": 3,
+            "last_accessed": start + timedelta(seconds=2),
+            "alert_count": 0,
+        }
+        assert files[1]["total_access"] == 1
+
+        assert [f["file_path"] for f in db.get_top_files(limit=1, sort_by="read_count")] == ["/a"]
+        assert db.get_top_files(from_date=start + timedelta(seconds=3)) == []
+
+
+class TestLookupCaches:
+    def test_session_cache_invalidated_on_write(self, db):
+        _seed_session(db, "s1")
+        assert db.get_session_by_id("s1").event_count == 0
+        assert db.get_session_by_id("s1") is db.get_session_by_id("s1")
+
+        db.increment_session_event_count("s1")
+        assert db.get_session_by_id("s1").event_count == 1
+
+        db.end_session("s1")
+        assert db.get_session_by_id("s1").status == "ended"
+
+    def test_session_cache_cleared_when_grouped_write_commits(self, db):
+        _seed_session(db, "s1")
+        stale = db.get_session_by_id("s1")
+
+        with db.transaction():
+            db.increment_session_event_count("s1")
+            # Another connection reading now still sees the old row
+            db._session_cache.set("s1", stale)
+        assert db.get_session_by_id("s1").event_count == 1
+
+    def test_session_exists_survives_counter_updates(self, db):
+        assert db.session_exists("s1") is False
+        _seed_session(db, "s1")
+        assert db.session_exists("s1") is True
+
+        db.increment_session_event_count("s1")
+        assert db._known_sessions.get("s1") is True
+
+    def test_end_active_session_only_once(self, db):
+        _seed_session(db, "s1")
+        assert db.get_session_by_id("s1").status == "active"
+
+        assert db.end_active_session("s1") is True
+        assert db.get_session_by_id("s1").status == "ended"
+        assert db.end_active_session("s1") is False
+        assert db.end_active_session("missing") is False
+
+    def test_policy_cache_invalidated_on_write(self, db):
+        policy = Policy(name="p1")
+        db.save_policy(policy)
+        assert db.get_policy_by_id(policy.id).enabled is True
+
+        db.update_policy(policy.id, {"enabled": False})
+        assert db.get_policy_by_id(policy.id).enabled is False
+
+        db.delete_policy(policy.id)
+        assert db.get_policy_by_id(policy.id) is None
+
+    def test_graph_cache_cleared_when_graph_write_commits(self, db):
+        db.graph_cache.set("view", b"{}")
+        node = GraphNode(node_type=NodeType.FILE, label="a", value="/a")
+
+        with db.transaction():
+            db.save_graph_node(node)
+            # Other connections cannot see the write yet
+            assert db.graph_cache.get("view") == b"{}"
+        assert db.graph_cache.get("view") is None
+
+        db.graph_cache.set("view", b"{}")
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                db.save_graph_node(node)
+                raise RuntimeError("abort")
+        assert db.graph_cache.get("view") == b"{}"
+
+    def test_policy_list_cache_cleared_on_policy_and_alert_writes(self, db):
+        policy = Policy(name="p1")
+        _seed_session(db, "s1")
+        writes = [
+            lambda: db.save_policy(policy),
+            lambda: db.update_policy(policy.id, {"enabled": False}),
+            lambda: _seed_alert(db, "s1"),
+            lambda: db.delete_policy(policy.id),
+        ]
+        for write in writes:
+            db.policy_list_cache.set(False, b"{}")
+            write()
+            assert db.policy_list_cache.get(False) is None
+
+    def test_endpoint_count_cleared_by_new_host_session(self, db):
+        _seed_session(db, "s1", hostname="laptop")
+        assert db.get_unique_endpoint_count() == 1
+
+        _seed_session(db, "s2")
+        _seed_session(db, "s3", hostname="laptop")
+        assert db.get_unique_endpoint_count() == 1
+
+        _seed_session(db, "s4", hostname="server")
+        assert db.get_unique_endpoint_count() == 2
+
+
+class TestSessionGraph:
+    def test_time_window(self, db):
+        start = datetime(2026, 1, 1, tzinfo=UTC)
+
+        def node(value, first, last, session="s1"):
+            n = GraphNode(
+                node_type=NodeType.FILE,
+                label=value,
+                value=value,
+                first_seen=start + timedelta(hours=first),
+                last_seen=start + timedelta(hours=last),
+                session_ids=[session],
+            )
+            db.save_graph_node(n)
+            return n
+
+        early = node("/early", 0, 1)
+        middle = node("/middle", 2, 3)
+        late = node("/late", 4, 5)
+        foreign = node("/foreign", 2, 3, session="s2")
+        for source, target in ((early, middle), (middle, late), (middle, foreign)):
+            db.save_graph_edge(
+                GraphEdge(source_id=source.id, target_id=target.id, relation=EdgeRelation.READS)
+            )
+
+        graph = db.get_session_graph("s1")
+        assert len(graph["nodes"]) == 3
+        assert len(graph["edges"]) == 3
+        assert graph["time_range"] == (start, start + timedelta(hours=5))
+
+        graph = db.get_session_graph(
+            "s1", from_date=start + timedelta(hours=1), to_date=start + timedelta(hours=3)
+        )
+        assert {n.value for n in graph["nodes"]} == {"/early", "/middle"}
+        assert [(e.source_id, e.target_id) for e in graph["edges"]] == [(early.id, middle.id)]
+        assert graph["time_range"] == (start, start + timedelta(hours=5))
+
+        graph = db.get_session_graph("s1", from_date=start + timedelta(days=1))
+        assert graph["nodes"] == []
+        assert graph["edges"] == []
+        assert graph["time_range"] == (start, start + timedelta(hours=5))
+
+        assert db.get_session_graph("missing")["time_range"] is None
+
+
+class TestAlertSubgraph:
+    def test_ancestors_and_one_level_down(self, db):
+        trigger = uuid4()
+
+        def node(node_type, value, session="s1", event_ids=()):
+            n = GraphNode(
+                node_type=node_type,
+                label=value,
+                value=value,
+                session_ids=[session],
+                event_ids=list(event_ids),
+            )
+            db.save_graph_node(n)
+            return n
+
+        def edge(source, target, relation=EdgeRelation.EXECUTES):
+            db.save_graph_edge(
+                GraphEdge(source_id=source.id, target_id=target.id, relation=relation)
+            )
+
+        root = node(NodeType.SESSION, "s1")
+        cmd = node(NodeType.COMMAND, "cat secret", event_ids=[trigger])
+        other_cmd = node(NodeType.COMMAND, "ls")
+        read = node(NodeType.FILE, "/secret")
+        grandchild = node(NodeType.URL, "https://example.com")
+        foreign = node(NodeType.FILE, "/elsewhere", session="s2")
+        edge(root, cmd)
+        edge(root, other_cmd)
+        edge(cmd, read, EdgeRelation.READS)
+        edge(read, grandchild, EdgeRelation.RELATED_TO)
+        edge(cmd, foreign, EdgeRelation.READS)
+
+        graph = db.get_alert_subgraph("s1", [trigger])
+        assert {n.id for n in graph["nodes"]} == {root.id, cmd.id, read.id}
+        assert {(e.source_id, e.target_id) for e in graph["edges"]} == {
+            (root.id, cmd.id),
+            (cmd.id, read.id),
+        }
+
+        graph = db.get_alert_subgraph("s1", [trigger], down_levels=2)
+        assert grandchild.id in {n.id for n in graph["nodes"]}
+
+        assert db.get_alert_subgraph("s1", [uuid4()]) == {"nodes": [], "edges": []}
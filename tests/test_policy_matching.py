@@ -162,3 +162,19 @@ class TestRuleConditionEvaluate:
     def test_invalid_regex_returns_false(self):
         cond = make_condition("tool_input.command", ConditionOperator.MATCHES, "[invalid")
         assert not cond.evaluate({"tool_input": {"command": "anything"}})
+
+    def test_regex_case_sensitivity_cached_separately(self):
+        pattern = r"^Curl\b"
+        insensitive = make_condition("tool_input.command", ConditionOperator.MATCHES, pattern)
+        sensitive = make_condition(
+            "tool_input.command", ConditionOperator.MATCHES, pattern, case_sensitive=True
+        )
+        assert insensitive.evaluate({"tool_input": {"command": "curl x"}})
+        assert not sensitive.evaluate({"tool_input": {"command": "curl x"}})
+
+    def test_not_matches_regex(self):
+        cond = make_condition("tool_input.command", ConditionOperator.NOT_MATCHES, r"^git\b")
+        assert cond.evaluate({"tool_input": {"command": "ls"}})
+        assert not cond.evaluate({"tool_input": {"command": "git status"}})
+        invalid = make_condition("tool_input.command", ConditionOperator.NOT_MATCHES, "[invalid")
+        assert not invalid.evaluate({"tool_input": {"command": "ls"}})
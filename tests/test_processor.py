@@ -0,0 +1,74 @@
+"""Tests for the Engine's batched writes of collected events."""
+
+from __future__ import annotations
+
+import asyncio
+
+from agentsleak.config.settings import Settings
+from agentsleak.models.events import Session
+from agentsleak.store.database import Database
+
+from .conftest import make_engine, make_event
+
+
+class TestPersistBatching:
+    async def _run_writer(self, engine, expected: int) -> None:
+        engine._running = True
+        writer = asyncio.create_task(engine._persist_loop())
+        while engine._event_queue.put_nowait.call_count < expected:
+            await asyncio.sleep(0.01)
+        writer.cancel()
+
+    async def test_queued_events_share_one_write(self):
+        engine = make_engine()
+        events = [make_event(), make_event(), make_event()]
+        for event in events:
+            await engine.enqueue_persist(event)
+
+        await self._run_writer(engine, len(events))
+
+        engine.database.record_events.assert_called_once_with(events)
+        forwarded = [c.args[0] for c in engine._event_queue.put_nowait.call_args_list]
+        assert forwarded == events
+
+    async def test_batch_size_caps_each_write(self):
+        engine = make_engine()
+        engine.settings.batch_size = 2
+        for _ in range(3):
+            await engine.enqueue_persist(make_event())
+
+        await self._run_writer(engine, 3)
+
+        sizes = [len(c.args[0]) for c in engine.database.record_events.call_args_list]
+        assert sizes == [2, 1]
+
+    async def test_failed_write_still_forwards(self):
+        engine = make_engine()
+        engine.database.record_events.side_effect = RuntimeError("locked")
+        event = make_event()
+        await engine.enqueue_persist(event)
+
+        await self._run_writer(engine, 1)
+
+        engine._event_queue.put_nowait.assert_called_once_with(event)
+
+    def test_failed_batch_retries_each_session(self, tmp_path):
+        database = Database(Settings(db_path=tmp_path / "test.db", rules_path=tmp_path / "rules"))
+        database.save_session(Session(session_id="s1"))
+        database.save_session(Session(session_id="s2"))
+        engine = make_engine(database=database)
+        # The unknown session's event fails the foreign key and the batch
+        batch = [
+            make_event(session_id="s1"),
+            make_event(session_id="unknown"),
+            make_event(session_id="s2"),
+            make_event(session_id="s1"),
+        ]
+
+        engine._write_batch(batch)
+
+        assert database.get_session_by_id("s1").event_count == 2
+        assert database.get_session_by_id("s2").event_count == 1
+        saved = [database.get_event_by_id(e.id) is not None for e in batch]
+        assert saved == [True, False, True, True]
+        database.close()
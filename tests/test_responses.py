@@ -0,0 +1,54 @@
+"""Tests for shared API response classes."""
+
+from __future__ import annotations
+
+import json
+from datetime import UTC, datetime
+from uuid import uuid4
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from agentsleak.api.responses import ORJSONPageResponse, page_body
+
+
+class TestORJSONPageResponse:
+    @pytest.mark.parametrize("count", [0, 1, 3])
+    def test_renders_valid_page(self, count):
+        ids = [uuid4() for _ in range(count)]
+        created = datetime(2024, 1, 1, tzinfo=UTC)
+        app = FastAPI()
+
+        @app.get("/page")
+        def page() -> ORJSONPageResponse:
+            return ORJSONPageResponse(
+                ({"id": i, "created_at": created} for i in ids),
+                total=count,
+                page=1,
+            )
+
+        response = TestClient(app).get("/page")
+        assert response.headers["content-type"] == "application/json"
+        assert json.loads(response.content) == {
+            "items": [{"id": str(i), "created_at": "2024-01-01T00:00:00Z"} for i in ids],
+            "total": count,
+            "page": 1,
+        }
+
+    def test_items_key(self):
+        app = FastAPI()
+
+        @app.get("/timeline")
+        def timeline() -> ORJSONPageResponse:
+            return ORJSONPageResponse(iter([1, 2]), items_key="entries", session_id="s1")
+
+        response = TestClient(app).get("/timeline")
+        assert json.loads(response.content) == {"entries": [1, 2], "session_id": "s1"}
+
+
+class TestPageBody:
+    @pytest.mark.parametrize("fields", [{}, {"total": 2, "page": 1}])
+    def test_wraps_encoded_items(self, fields):
+        body = page_body(b'[{"id":1},{"id":2}]', **fields)
+        assert json.loads(body) == {"items": [{"id": 1}, {"id": 2}], **fields}
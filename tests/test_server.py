@@ -0,0 +1,69 @@
+"""Tests for the ASGI auth middleware."""
+
+from __future__ import annotations
+
+import pytest
+from fastapi import FastAPI, WebSocket
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from agentsleak.server import ApiKeyAuthMiddleware
+
+
+@pytest.fixture
+def client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(ApiKeyAuthMiddleware)
+
+    @app.get("/api/health")
+    async def health() -> dict[str, str]:
+        return {"status": "ok"}
+
+    @app.get("/api/alerts")
+    async def alerts() -> dict[str, str]:
+        return {"status": "ok"}
+
+    @app.post("/api/collect/pre-tool-use")
+    async def collect() -> dict[str, str]:
+        return {"status": "ok"}
+
+    @app.websocket("/api/ws")
+    async def ws(websocket: WebSocket) -> None:
+        await websocket.accept()
+        await websocket.send_json({"type": "connected"})
+        await websocket.close()
+
+    return TestClient(app)
+
+
+class TestApiKeyAuthMiddleware:
+    def test_open_when_unconfigured(self, client, monkeypatch):
+        monkeypatch.delenv("AGENTSLEAK_API_KEY", raising=False)
+        monkeypatch.delenv("AGENTSLEAK_DASHBOARD_TOKEN", raising=False)
+        assert client.get("/api/alerts").status_code == 200
+        assert client.post("/api/collect/pre-tool-use").status_code == 200
+
+    def test_collector_key(self, client, monkeypatch):
+        monkeypatch.setenv("AGENTSLEAK_API_KEY", "secret")
+        assert client.post("/api/collect/pre-tool-use").status_code == 401
+        response = client.post(
+            "/api/collect/pre-tool-use", headers={"X-AgentsLeak-Key": "secret"}
+        )
+        assert response.status_code == 200
+
+    def test_dashboard_token(self, client, monkeypatch):
+        monkeypatch.setenv("AGENTSLEAK_DASHBOARD_TOKEN", "tok")
+        response = client.get("/api/alerts")
+        assert response.status_code == 401
+        assert response.json() == {"detail": "Invalid or missing dashboard token"}
+        response = client.get("/api/alerts", headers={"Authorization": "Bearer tok"})
+        assert response.status_code == 200
+        assert client.get("/api/health").status_code == 200
+
+    def test_websocket_token(self, client, monkeypatch):
+        monkeypatch.setenv("AGENTSLEAK_DASHBOARD_TOKEN", "tok")
+        with pytest.raises(WebSocketDisconnect):
+            with client.websocket_connect("/api/ws?token=wrong") as ws:
+                ws.receive_json()
+        with client.websocket_connect("/api/ws?token=tok") as ws:
+            assert ws.receive_json() == {"type": "connected"}
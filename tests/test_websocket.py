@@ -0,0 +1,161 @@
+"""Tests for ConnectionManager subscription routing."""
+
+from __future__ import annotations
+
+import asyncio
+import gc
+from unittest.mock import AsyncMock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from agentsleak.api.websocket import ConnectionManager, router
+
+
+async def _connect(manager: ConnectionManager) -> AsyncMock:
+    websocket = AsyncMock()
+    await manager.connect(websocket)
+    return websocket
+
+
+async def _flush(manager: ConnectionManager) -> None:
+    """Wait until every writer task has handled its queued messages."""
+    for queue in list(manager._queues.values()):
+        await queue.join()
+    await asyncio.gather(*manager._closing)
+
+
+class TestBroadcast:
+    async def test_exact_and_wildcard_channels(self):
+        manager = ConnectionManager()
+        default = await _connect(manager)
+        watcher = await _connect(manager)
+        await manager.subscribe(watcher, ["session:*"])
+
+        await manager.broadcast("session:abc", {"type": "event"})
+        await _flush(manager)
+        default.send_text.assert_not_called()
+        watcher.send_text.assert_called_once_with('{"type":"event"}')
+
+        await manager.broadcast("events", {"type": "event"})
+        await _flush(manager)
+        default.send_text.assert_called_once()
+        assert watcher.send_text.call_count == 2
+
+    async def test_unsubscribe_and_disconnect_prune_indexes(self):
+        manager = ConnectionManager()
+        websocket = await _connect(manager)
+        await manager.subscribe(websocket, ["session:*"])
+        await manager.unsubscribe(websocket, ["session:*", "events"])
+
+        await manager.broadcast("events", {"type": "event"})
+        await _flush(manager)
+        websocket.send_text.assert_not_called()
+        assert "session:" not in manager.prefix_index
+
+        await manager.disconnect(websocket)
+        assert not manager.exact_index
+        assert websocket not in manager.subscriptions
+
+    async def test_failed_send_disconnects(self):
+        manager = ConnectionManager()
+        websocket = await _connect(manager)
+        websocket.send_text.side_effect = RuntimeError("closed")
+
+        await manager.broadcast("alerts", {"type": "alert"})
+        await _flush(manager)
+        assert websocket not in manager.active_connections
+        assert "alerts" not in manager.exact_index
+
+    async def test_slow_subscriber_does_not_block_others(self, monkeypatch):
+        monkeypatch.setattr("agentsleak.api.websocket._SEND_TIMEOUT_SECONDS", 0.01)
+        manager = ConnectionManager()
+        slow = await _connect(manager)
+        fast = await _connect(manager)
+
+        async def stall(text: str) -> None:
+            await asyncio.sleep(1)
+
+        slow.send_text.side_effect = stall
+        await manager.broadcast("events", {"type": "event"})
+        await _flush(manager)
+        fast.send_text.assert_called_once()
+        assert slow not in manager.active_connections
+        slow.close.assert_awaited_once_with(code=1013)
+        assert fast in manager.active_connections
+
+    async def test_dropped_connection_is_collected(self):
+        manager = ConnectionManager()
+        websocket = await _connect(manager)
+        del websocket
+        gc.collect()
+
+        assert not manager.active_connections
+        assert not manager.subscriptions
+        await manager.broadcast("events", {"type": "event"})
+
+    async def test_full_queue_drops_connection(self, monkeypatch):
+        monkeypatch.setattr("agentsleak.api.websocket._SEND_QUEUE_SIZE", 2)
+        manager = ConnectionManager()
+        websocket = await _connect(manager)
+
+        # The writer has not run yet, so the third message overflows
+        for _ in range(3):
+            await manager.broadcast("events", {"type": "event"})
+        assert websocket not in manager.active_connections
+        await manager.broadcast("events", {"type": "event"})
+        await _flush(manager)
+        websocket.close.assert_awaited_once_with(code=1013)
+
+    async def test_stuck_close_does_not_block_broadcast(self, monkeypatch):
+        monkeypatch.setattr("agentsleak.api.websocket._SEND_QUEUE_SIZE", 1)
+        manager = ConnectionManager()
+        stuck = await _connect(manager)
+        await manager.subscribe(stuck, ["session:*"])
+
+        async def hang(code: int) -> None:
+            await asyncio.sleep(10)
+
+        stuck.close.side_effect = hang
+        # The writer has not run yet, so the second message overflows
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for _ in range(2):
+            await manager.broadcast("session:abc", {"type": "event"})
+        assert loop.time() - started < 0.5
+        assert stuck not in manager.active_connections
+        assert manager._closing
+
+        for close in manager._closing:
+            close.cancel()
+        await asyncio.gather(*manager._closing, return_exceptions=True)
+
+    async def test_broadcast_multi_sends_once(self):
+        manager = ConnectionManager()
+        websocket = await _connect(manager)
+        await manager.subscribe(websocket, ["session:abc"])
+
+        await manager.broadcast_multi(["events", "session:abc"], {"type": "event"})
+        await _flush(manager)
+        websocket.send_text.assert_called_once()
+
+
+class TestEndpoint:
+    def test_malformed_messages_leave_subscriptions_intact(self):
+        app = FastAPI()
+        app.include_router(router)
+
+        with TestClient(app).websocket_connect("/ws") as ws:
+            assert ws.receive_json()["data"]["subscriptions"] == ["alerts", "events"]
+
+            ws.send_text("[1, 2]")
+            assert ws.receive_json()["type"] == "error"
+
+            ws.send_json({"action": "subscribe", "channels": "session:*"})
+            assert ws.receive_json()["data"]["channels"] == ["alerts", "events"]
+
+            ws.send_json({"action": "subscribe", "channels": [1, None, "session:*"]})
+            assert ws.receive_json()["data"]["channels"] == ["alerts", "events", "session:*"]
+
+            ws.send_json({"action": "unsubscribe", "channels": [{"x": 1}, "events"]})
+            assert ws.receive_json()["data"]["channels"] == ["alerts", "session:*"]